@@ -0,0 +1,263 @@
+#
+# Copyright (C) 2026 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+"""The com_redhat_kdump section of a kickstart file.
+
+The parser of the section is kept apart from the installer, so the offline
+tools can read kickstart files without pyanaconda.
+"""
+import functools
+import logging
+import re
+import shlex
+
+from pykickstart.errors import KickstartParseError
+from pykickstart.options import KSOptionParser
+from pykickstart.version import F27
+
+from com_redhat_kdump.crashkernel import parse_reserved_memory
+from com_redhat_kdump.dump_level import check_dump_level, check_dump_threads
+from com_redhat_kdump.i18n import _
+from com_redhat_kdump.kdump_conf import parse_directive, check_directives, check_drivers, \
+    DRIVERS_ALL
+
+log = logging.getLogger(__name__)
+
+__all__ = ["ADDON_NAME", "KdumpAddonSection", "get_option_parser", "read_addon_data"]
+
+ADDON_NAME = "com_redhat_kdump"
+
+
+@functools.lru_cache(maxsize=None)
+def get_option_parser(version):
+    """Return the parser of the %addon line for the given kickstart version.
+
+    The parser is created once per version and reused for every section.
+
+    :param version: a pykickstart version
+    :return: an instance of KSOptionParser
+    """
+    op = KSOptionParser(
+        prog="addon com_redhat_kdump", version=version,
+        description="Configure the Kdump Addon."
+    )
+    op.add_argument(
+        "--enable", action="store_true", default=True,
+        version=version, dest="enabled", help="Enable kdump"
+    )
+    op.add_argument(
+        "--enablefadump", action="store_true", default=False,
+        version=version, dest="enablefadump", help="Enable dump mode fadump"
+    )
+    op.add_argument(
+        "--disable", action="store_false",
+        version=version, dest="enabled", help="Disable kdump"
+    )
+    op.add_argument(
+        "--reserve-mb", type=str, dest="reserve_mb",
+        version=version, default="auto", help="Amount of memory in MB to reserve for kdump."
+    )
+    op.add_argument(
+        "--dump-level", type=int, dest="dump_level",
+        version=version, default=-1, help="The dump level of makedumpfile from 0 to 31."
+    )
+    op.add_argument(
+        "--dump-threads", type=str, dest="dump_threads",
+        version=version, default="0", help="The number of makedumpfile threads or auto."
+    )
+    op.add_argument(
+        "--drivers", type=str, dest="drivers",
+        version=version, default=DRIVERS_ALL, help="The drivers of the kdump initramfs."
+    )
+    return op
+
+
+class KdumpAddonSection(object):
+    """The com_redhat_kdump section of a kickstart file.
+
+    The section doesn't depend on the installer, the kickstart data of
+    the service adds the AddonData base to it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.enabled = False
+        self.reserve_mb = "auto"
+        self.enablefadump = False
+        self.dump_level = -1
+        self.dump_threads = 0
+        self.drivers = DRIVERS_ALL
+        self.kdump_conf = {}
+
+    def __str__(self):
+        """Generate the kickstart representation."""
+        addon_str = "%addon com_redhat_kdump"
+
+        if self.enabled:
+            addon_str += " --enable"
+        else:
+            addon_str += " --disable"
+
+        if self.enabled and self.reserve_mb:
+            addon_str += " --reserve-mb='%s'" % self.reserve_mb
+
+        if self.enablefadump:
+            addon_str += " --enablefadump"
+
+        if self.enabled and self.dump_level != -1:
+            addon_str += " --dump-level=%d" % self.dump_level
+
+        if self.enabled and self.dump_threads:
+            addon_str += " --dump-threads=%s" % (
+                "auto" if self.dump_threads == -1 else self.dump_threads
+            )
+
+        if self.enabled and self.drivers != DRIVERS_ALL:
+            addon_str += " --drivers=%s" % self.drivers
+
+        addon_str += "\n"
+
+        for name, value in self.kdump_conf.items():
+            addon_str += "%s %s\n" % (name, value)
+
+        addon_str += "\n%end\n"
+        return addon_str
+
+    def handle_header(self, args, line_number=None):
+        """Handle the arguments of the %addon line.
+
+        :param args: a list of additional arguments
+        :param line_number: a line number
+        :raise: KickstartParseError for invalid arguments
+        """
+        op = get_option_parser(F27)
+        opts = op.parse_args(args=args, lineno=line_number)
+
+        # Validate the reserve-mb argument
+        # Allow a final 'M' for consistency with the crashkernel kernel
+        # parameter. Strip it if found. And strip quotes.
+        opts.reserve_mb = opts.reserve_mb.strip("'\"")
+
+        if re.match(r'^\d+M$', opts.reserve_mb):
+            opts.reserve_mb = opts.reserve_mb[:-1]
+
+        # Accept also a range table and a map of arch patterns.
+        try:
+            parse_reserved_memory(opts.reserve_mb)
+        except ValueError:
+            msg = _("Invalid value '%s' for --reserve-mb") % opts.reserve_mb
+            raise KickstartParseError(msg, lineno=line_number)
+
+        if opts.dump_level != -1:
+            try:
+                check_dump_level(opts.dump_level)
+            except ValueError:
+                msg = _("Invalid value '%s' for --dump-level") % opts.dump_level
+                raise KickstartParseError(msg, lineno=line_number)
+
+        opts.dump_threads = opts.dump_threads.strip("'\"")
+
+        try:
+            dump_threads = -1 if opts.dump_threads == "auto" else int(opts.dump_threads)
+
+            if dump_threads != -1:
+                check_dump_threads(dump_threads)
+        except ValueError:
+            msg = _("Invalid value '%s' for --dump-threads") % opts.dump_threads
+            raise KickstartParseError(msg, lineno=line_number)
+
+        opts.drivers = opts.drivers.strip("'\"")
+
+        try:
+            check_drivers(opts.drivers)
+        except ValueError:
+            msg = _("Invalid value '%s' for --drivers") % opts.drivers
+            raise KickstartParseError(msg, lineno=line_number)
+
+        # Store the parsed arguments
+        self.enabled = opts.enabled
+        self.reserve_mb = opts.reserve_mb
+        self.enablefadump = opts.enablefadump
+        self.dump_level = opts.dump_level
+        self.dump_threads = dump_threads
+        self.drivers = opts.drivers
+
+    def handle_line(self, line, line_number=None):
+        """Handle one line of the section.
+
+        The lines are directives of kdump.conf.
+
+        :param line: a line to parse
+        :param line_number: a line number
+        :raise: KickstartParseError for invalid lines
+        """
+        line = line.strip()
+
+        if not line or line.startswith("#"):
+            return
+
+        try:
+            name, value = parse_directive(line)
+
+            if name in self.kdump_conf:
+                raise ValueError("The directive {} is specified more than once".format(name))
+
+            directives = dict(self.kdump_conf)
+            directives[name] = value
+            check_directives(directives)
+        except ValueError as e:
+            raise KickstartParseError(str(e), lineno=line_number)
+
+        self.kdump_conf[name] = value
+
+
+def read_addon_data(lines):
+    """Read the com_redhat_kdump section of a kickstart file.
+
+    Only the section of the add-on is parsed, the rest of the kickstart
+    file is skipped without any validation.
+
+    :param lines: an iterable of lines of the kickstart file
+    :return: an instance of KdumpAddonSection
+    :raise: KickstartParseError for an invalid section
+    """
+    data = KdumpAddonSection()
+    in_section = False
+
+    for line_number, line in enumerate(lines, 1):
+        stripped = line.strip()
+
+        if in_section:
+            if stripped == "%end":
+                in_section = False
+            else:
+                data.handle_line(line, line_number=line_number)
+            continue
+
+        if not stripped.startswith("%addon"):
+            continue
+
+        try:
+            args = shlex.split(stripped)
+        except ValueError as e:
+            raise KickstartParseError(str(e), lineno=line_number)
+
+        if len(args) > 1 and args[1] == ADDON_NAME:
+            data.handle_header(args[2:], line_number=line_number)
+            in_section = True
+
+    return data
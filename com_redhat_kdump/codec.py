@@ -0,0 +1,206 @@
+#
+# Copyright (C) 2026 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+"""Selection of the compression codecs of makedumpfile."""
+import logging
+import random
+import re
+import time
+import zlib
+
+log = logging.getLogger(__name__)
+
+__all__ = ["CODEC_FLAGS", "CODEC_PREFERENCE", "get_compressors", "parse_codecs", "get_codec",
+           "set_codec", "generate_pages", "benchmark_codecs", "choose_codec"]
+
+# The options of makedumpfile for the codecs
+CODEC_FLAGS = {
+    "zlib": "-c",
+    "lzo": "-l",
+    "snappy": "-p",
+    "zstd": "-z",
+}
+
+# The codecs from the fastest one if they can't be measured. makedumpfile
+# compresses the pages with lzo1x_1 and snappy faster than with zstd and
+# zlib at level 1, and lzo is the default codec of kdump-utils.
+CODEC_PREFERENCE = ("lzo", "snappy", "zstd", "zlib")
+
+# The optional codecs reported by makedumpfile -v
+_ENABLED_RE = re.compile(r'^(lzo|snappy|zstd)\s+enabled\s*$', re.MULTILINE)
+
+
+def get_compressors():
+    """Return the codecs that can be measured in the installer.
+
+    The codecs are compressed with the levels used by makedumpfile. The
+    codecs other than zlib are measured only if their Python bindings
+    are available.
+
+    :return: a dictionary of codec names and compress functions
+    """
+    compressors = {"zlib": lambda data: zlib.compress(data, 1)}
+
+    try:
+        import lzo
+        compressors["lzo"] = lambda data: lzo.compress(data, 1, False)
+    except ImportError:
+        log.debug("The lzo codec can't be measured.")
+
+    try:
+        import snappy
+        compressors["snappy"] = snappy.compress
+    except ImportError:
+        log.debug("The snappy codec can't be measured.")
+
+    try:
+        import zstandard
+        compressors["zstd"] = zstandard.ZstdCompressor(level=1).compress
+    except ImportError:
+        log.debug("The zstd codec can't be measured.")
+
+    return compressors
+
+
+def parse_codecs(output):
+    """Parse the codecs supported by makedumpfile.
+
+    :param output: the output of makedumpfile -v
+    :return: a set of codec names
+    """
+    return {"zlib"} | set(_ENABLED_RE.findall(output or ""))
+
+
+def get_codec(collector):
+    """Return the codec of a core collector.
+
+    :param collector: a value of the core_collector directive
+    :return: a codec name or None if the collector doesn't compress
+    """
+    args = collector.split()
+
+    if not args or args[0] != "makedumpfile":
+        return None
+
+    for codec, flag in CODEC_FLAGS.items():
+        if flag in args:
+            return codec
+
+    return None
+
+
+def set_codec(collector, codec):
+    """Replace the codec of a core collector.
+
+    :param collector: a value of the core_collector directive
+    :param codec: a codec name
+    :return: a new value of the core_collector directive
+    """
+    flags = set(CODEC_FLAGS.values())
+    return " ".join(
+        CODEC_FLAGS[codec] if arg in flags else arg
+        for arg in collector.split()
+    )
+
+
+def generate_pages(count=1024, page_size=4096, seed=0):
+    """Generate synthetic pages of memory.
+
+    A quarter of the pages is random data, a half is text-like data of
+    a small vocabulary and a quarter is sparse data, mostly zeros. The
+    zero pages are left out, makedumpfile excludes them.
+
+    :param count: a number of pages
+    :param page_size: a size of the page in bytes
+    :param seed: a seed of the generator
+    :return: a list of pages
+    """
+    generator = random.Random(seed)
+    words = [generator.randbytes(generator.randint(2, 12)) for _i in range(256)]
+    pages = []
+
+    for i in range(count):
+        kind = i % 4
+
+        if kind == 0:
+            page = generator.randbytes(page_size)
+        elif kind == 3:
+            page = bytearray(page_size)
+            for _i in range(16):
+                offset = generator.randrange(0, page_size - 8)
+                page[offset:offset + 8] = generator.getrandbits(64).to_bytes(8, "little")
+            page = bytes(page)
+        else:
+            page = b"".join(generator.choices(words, k=page_size // 4))[:page_size]
+            page = page.ljust(page_size, b"\0")
+
+        pages.append(page)
+
+    return pages
+
+
+def benchmark_codecs(codecs, pages, compressors=None):
+    """Measure the codecs on the given pages.
+
+    The pages are compressed one by one like makedumpfile does.
+
+    :param codecs: a list of codec names
+    :param pages: a list of pages
+    :param compressors: a dictionary of compress functions or None
+    :return: a dictionary of codecs and tuples of throughput in MB/s and ratio
+    """
+    compressors = compressors or get_compressors()
+    size = sum(len(page) for page in pages)
+    results = {}
+
+    for codec in codecs:
+        compress = compressors.get(codec)
+
+        if not compress:
+            continue
+
+        start = time.perf_counter()
+        compressed = sum(len(compress(page)) for page in pages)
+        elapsed = time.perf_counter() - start
+
+        results[codec] = (size / (1024 ** 2) / max(elapsed, 1e-9), size / max(compressed, 1))
+
+    return results
+
+
+def choose_codec(codecs, results=None, current=None):
+    """Choose the fastest of the supported codecs.
+
+    The codec with the highest measured throughput is chosen if the
+    current codec and another supported codec are measured. Otherwise,
+    the first supported codec of CODEC_PREFERENCE is chosen.
+
+    :param codecs: a set of codecs supported by makedumpfile
+    :param results: a dictionary of codecs and tuples of throughput and ratio
+    :param current: the codec of the core collector or None
+    :return: a codec name or None
+    """
+    measured = {codec: result for codec, result in (results or {}).items() if codec in codecs}
+
+    if len(measured) > 1 and (current is None or current in measured):
+        return max(measured, key=lambda codec: measured[codec][0])
+
+    for codec in CODEC_PREFERENCE:
+        if codec in codecs:
+            return codec
+
+    return None
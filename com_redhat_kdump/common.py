@@ -18,28 +18,119 @@
 #
 # Red Hat Author(s): David Shea <dshea@redhat.com>
 #
+import glob
+import hashlib
+import logging
+import os
 import re
-__all__ = ["getReservedMemory", "getTotalMemory", "getMemoryBounds", "getLuksDevices"]
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+__all__ = ["MemoryProbe", "memoryProbe", "getReservedMemory", "getTotalMemory", "getMemoryBounds",
+           "getRecommendedMemory", "computeMemoryBounds", "computeRecommendedMemory",
+           "loadReservationRules", "clampReservedMemory", "checkReservedMemory", "getLuksDevices",
+           "getDumpTargetDevice", "StorageProbe", "storageProbe", "getTargetLuksDevices",
+           "probeCapabilities", "probeMemUsage", "getDumpEstimate"]
 
-import blivet.arch
 from pyanaconda.modules.common.structures.storage import DeviceData
 from pyanaconda.modules.common.constants.services import STORAGE
 
-_reservedMemory = None
-def getReservedMemory():
-    """Return the amount of memory currently reserved for kdump in MB."""
-    global _reservedMemory
+from com_redhat_kdump.constants import MAX_STORAGE_CALLS, FADUMP_CAPABLE_FILE
+from com_redhat_kdump.dump_level import parse_mem_usage, estimate_dump
+from com_redhat_kdump.kdump_conf import TARGET_DIRECTIVES, REMOTE_TARGET_DIRECTIVES
+from com_redhat_kdump.reservation import loadReservationRules, getReservationRules, \
+    computeMemoryBounds, computeRecommendedMemory, clampReservedMemory, checkReservedMemory
+from com_redhat_kdump.structures import KdumpCapabilities
+from com_redhat_kdump.tracing import tracer
 
-    # Check if the value has already been read
-    if _reservedMemory is not None:
-        return _reservedMemory
+log = logging.getLogger(__name__)
 
-    try:
-        with open("/sys/kernel/kexec_crash_size", "r") as fobj:
-            _reservedMemory = int(fobj.read()) / (1024*1024)
-            return _reservedMemory
-    except (ValueError, IOError):
-        return 0
+class MemoryProbe(object):
+    """A snapshot of the memory information of the system.
+
+       The total memory and the architecture don't change, they are read
+       once and kept until the snapshot is invalidated. Only the amount
+       of memory reserved for kdump can be changed by writing
+       /sys/kernel/kexec_crash_size, it is read again when it gets older
+       than ttl seconds.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._timestamp = None
+        self._memTotal = None
+        self._reservedMemory = 0
+        self._arch = None
+
+    def invalidate(self):
+        """Drop the snapshot, the next access reads the values again."""
+        self._timestamp = None
+        self._memTotal = None
+        self._arch = None
+
+    def _updateReservedMemory(self):
+        if self._timestamp is not None and time.monotonic() - self._timestamp < self.ttl:
+            return
+
+        self._reservedMemory = self._readReservedMemory()
+        self._timestamp = time.monotonic()
+
+    @staticmethod
+    def _readMemTotal():
+        memkb = 0
+        fd = open('/proc/meminfo').read()
+        matched = re.search(r'^MemTotal:\s+(\d+)', fd)
+        if matched:
+            memkb = int(matched.groups()[0])
+
+        # total_memory return memory in KB, convert to MB
+        return memkb / 1024
+
+    @staticmethod
+    def _readReservedMemory():
+        # A failed read is kept in the snapshot as well
+        try:
+            with open("/sys/kernel/kexec_crash_size", "r") as fobj:
+                return int(fobj.read()) / (1024*1024)
+        except (ValueError, IOError):
+            return 0
+
+    @staticmethod
+    def _readArch():
+        # Import blivet on the first probe, it is slow to import
+        import blivet.arch
+        return blivet.arch.get_arch()
+
+    @property
+    def reservedMemory(self):
+        """The amount of memory currently reserved for kdump in MB."""
+        self._updateReservedMemory()
+        return self._reservedMemory
+
+    @property
+    def totalMemory(self):
+        """The total amount of system memory in MB."""
+        # A change of the reservation moves the memory between the two
+        # values, so their sum is kept.
+        if self._memTotal is None:
+            self._updateReservedMemory()
+            self._memTotal = self._readMemTotal() + self._reservedMemory
+        return self._memTotal
+
+    @property
+    def arch(self):
+        """The architecture of the system."""
+        if self._arch is None:
+            self._arch = self._readArch()
+        return self._arch
+
+# The snapshot shared by the service and the spokes
+memoryProbe = MemoryProbe()
+
+def getReservedMemory():
+    """Return the amount of memory currently reserved for kdump in MB."""
+    return memoryProbe.reservedMemory
 
 def getTotalMemory():
     """Return the total amount of system memory in MB
@@ -47,16 +138,40 @@ def getTotalMemory():
        This is the amount reported by /proc/meminfo plus the aount
        currently reserved for kdump.
     """
-    memkb = 0
-    fd = open('/proc/meminfo').read()
-    matched = re.search(r'^MemTotal:\s+(\d+)', fd)
-    if matched:
-        memkb = int(matched.groups()[0])
+    return memoryProbe.totalMemory
+
+def _getSysfsDrivers(path, link="driver"):
+    """Return a set of the drivers of a sysfs device and of its parents.
+
+       The link is driver for the names of the drivers or driver/module
+       for the names of their modules, built-in drivers have no module.
+    """
+    drivers = set()
 
-    # total_memory return memory in KB, convert to MB
-    availMem = memkb / 1024
+    # Collect the drivers of the device and of its parents (HBA, PCI).
+    path = os.path.realpath(path)
 
-    return availMem + getReservedMemory()
+    while path.startswith("/sys/devices/"):
+        driver = os.path.join(path, link)
+        if os.path.islink(driver):
+            drivers.add(os.path.basename(os.readlink(driver)))
+        path = os.path.dirname(path)
+
+    return drivers
+
+def getDeviceDrivers(link="driver"):
+    """Return a set of the drivers of the block and network devices."""
+    drivers = set()
+    paths = glob.glob("/sys/class/net/*/device") + glob.glob("/sys/block/*/device")
+
+    for path in paths:
+        drivers.update(_getSysfsDrivers(path, link))
+
+    return drivers
+
+def getDeviceModules():
+    """Return a set of the modules of the block and network devices."""
+    return getDeviceDrivers(link="driver/module")
 
 def getMemoryBounds():
     """Return a tuple of (lower, upper, step) for kdump reservation limits.
@@ -64,43 +179,412 @@ def getMemoryBounds():
        If there is not enough memory available to use kdump, both lower and
        upper will be 0.
     """
+    return computeMemoryBounds(memoryProbe.totalMemory, memoryProbe.arch)
 
-    totalMemory = getTotalMemory()
-    arch = blivet.arch.get_arch()
-
-    if arch.startswith('ppc64'):
-        lowerBound = 384
-        minUsable = 1024
-        step = 1
-    elif arch == 'aarch64':
-        lowerBound = 512
-        minUsable = 512
-        step = 1
-    else:
-        lowerBound = 160
-        minUsable = 512
-        step = 1
+def getRecommendedMemory():
+    """Return the recommended kdump reservation in MB for this system."""
+    return computeRecommendedMemory(
+        memoryProbe.totalMemory,
+        memoryProbe.arch,
+        cpus=os.cpu_count() or 1,
+        pageSize=os.sysconf("SC_PAGE_SIZE"),
+        drivers=getDeviceDrivers()
+    )
 
-    upperBound = (totalMemory - minUsable) - (totalMemory % step)
+def _getDeviceData(device_tree, device_name):
+    """Fetch the data of one device from the storage device tree."""
+    return DeviceData.from_structure(device_tree.GetDeviceData(device_name))
 
-    if upperBound < lowerBound:
-        upperBound = lowerBound = 0
+@tracer.traced("getLuksDevices")
+def getLuksDevices(object_path, max_calls=MAX_STORAGE_CALLS, cancel=None, cache=None):
+    """Return the names of the LUKS devices in the applied partitioning.
 
-    return (lowerBound, upperBound, step)
+       The device data are fetched with up to max_calls concurrent DBus
+       calls, the order of the returned names follows the device tree.
+       The devices in the cache, a dictionary of names and device data,
+       are not fetched again and the fetched devices are added to it.
 
-def getLuksDevices(object_path):
+       If the cancel event is set, no more device data are fetched and
+       None is returned.
+    """
     devs = []
 
-    partitioning = STORAGE.get_proxy(object_path)
-    device_tree = STORAGE.get_proxy(partitioning.GetDeviceTree())
+    partitioning = tracer.trace_proxy(STORAGE.get_proxy(object_path), "Partitioning")
+    device_tree = tracer.trace_proxy(STORAGE.get_proxy(partitioning.GetDeviceTree()), "DeviceTree")
     devices = device_tree.GetDevices()
 
-    for device_name in devices:
-        device_data = DeviceData.from_structure(
-            device_tree.GetDeviceData(device_name)
-        )
+    if not devices:
+        return devs
 
-        if device_data.type == 'luks/dm-crypt':
+    cache = {} if cache is None else cache
+    missing = [name for name in devices if name not in cache]
+
+    def fetch(device_name):
+        if cancel is not None and cancel.is_set():
+            return None
+        return _getDeviceData(device_tree, device_name)
+
+    if missing:
+        # Fetch the first device in this thread, so the proxy is fully
+        # initialized before it is shared by the worker threads.
+        devices_data = [fetch(missing[0])]
+
+        if max_calls > 1 and len(missing) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_calls, len(missing) - 1)) as executor:
+                devices_data.extend(executor.map(fetch, missing[1:]))
+        else:
+            devices_data.extend(fetch(name) for name in missing[1:])
+
+        if cancel is not None and cancel.is_set():
+            log.debug("The scan of the LUKS devices was cancelled.")
+            return None
+
+        cache.update(zip(missing, devices_data))
+
+    for device_name in devices:
+        if cache[device_name].type == 'luks/dm-crypt':
             devs.append(device_name)
 
     return devs
+
+# The path of the dump in the kdump.conf of kdump-utils
+DEFAULT_DUMP_PATH = "/var/crash"
+
+def _getMountPointDevice(mountPoints, path):
+    """Return the device of the mount point that contains the path."""
+    matches = [
+        mountPoint for mountPoint in mountPoints
+        if path == mountPoint or path.startswith(mountPoint.rstrip("/") + "/")
+    ]
+
+    if not matches:
+        return None
+
+    return mountPoints[max(matches, key=len)]
+
+def getDumpTargetDevice(device_tree, kdump_conf=None, mountPoints=None):
+    """Return the name of the local device the dump is written to.
+
+       The device is the target of kdump.conf or the device mounted at
+       the path of the dump. Return an empty string for a remote target
+       and None if the device can't be found.
+    """
+    kdump_conf = kdump_conf or {}
+    targets = [name for name in kdump_conf if name in TARGET_DIRECTIVES]
+
+    if not targets:
+        if mountPoints is None:
+            mountPoints = device_tree.GetMountPoints()
+
+        path = kdump_conf.get("path", DEFAULT_DUMP_PATH)
+        return _getMountPointDevice(mountPoints, path)
+
+    if targets[0] in REMOTE_TARGET_DIRECTIVES:
+        return ""
+
+    return device_tree.ResolveDevice(kdump_conf[targets[0]]) or None
+
+class StorageProbe(object):
+    """A cache of the storage scans of the spokes.
+
+       The device tree is identified by a fingerprint of the device names,
+       the mount points and the kdump.conf directives. A scan of the same
+       fingerprint returns the previous result without fetching any device.
+       Otherwise only the devices that were added, or whose parents were
+       removed, are fetched again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._devices = {}
+        self._fingerprint = None
+        self._result = None
+
+    def invalidate(self):
+        """Drop the cache, the next scan fetches the devices again."""
+        with self._lock:
+            self._devices = {}
+            self._fingerprint = None
+            self._result = None
+
+    @staticmethod
+    def _getFingerprint(devices, mountPoints, kdump_conf):
+        data = repr((sorted(devices), sorted(mountPoints.items()), sorted((kdump_conf or {}).items())))
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def _dropChangedDevices(self, devices):
+        present = set(devices)
+
+        for name, device_data in list(self._devices.items()):
+            if name not in present or not present.issuperset(device_data.parents):
+                del self._devices[name]
+
+    def _getDeviceData(self, device_tree, device_name):
+        device_data = self._devices.get(device_name)
+
+        if device_data is None:
+            device_data = self._devices[device_name] = _getDeviceData(device_tree, device_name)
+
+        return device_data
+
+    def getTargetLuksDevices(self, object_path, kdump_conf=None, cancel=None):
+        """Return the names of the LUKS devices the dump target depends on.
+
+           See getTargetLuksDevices.
+        """
+        with self._lock:
+            partitioning = tracer.trace_proxy(STORAGE.get_proxy(object_path), "Partitioning")
+            device_tree = tracer.trace_proxy(STORAGE.get_proxy(partitioning.GetDeviceTree()),
+                                             "DeviceTree")
+            devices = device_tree.GetDevices()
+            mountPoints = device_tree.GetMountPoints()
+
+            fingerprint = self._getFingerprint(devices, mountPoints, kdump_conf)
+
+            if fingerprint == self._fingerprint:
+                log.debug("The device tree has not changed, skip the scan.")
+                return list(self._result)
+
+            self._dropChangedDevices(devices)
+            devs = self._scan(object_path, device_tree, mountPoints, kdump_conf, cancel)
+
+            if devs is not None:
+                self._fingerprint = fingerprint
+                self._result = list(devs)
+
+            return devs
+
+    def _scan(self, object_path, device_tree, mountPoints, kdump_conf, cancel):
+        target = getDumpTargetDevice(device_tree, kdump_conf, mountPoints)
+
+        if target is None:
+            log.debug("The dump target is not found, check all devices.")
+            return getLuksDevices(object_path, cancel=cancel, cache=self._devices)
+
+        devs = []
+        pending = [target] if target else []
+        visited = set(pending)
+
+        while pending:
+            if cancel is not None and cancel.is_set():
+                log.debug("The scan of the dump target was cancelled.")
+                return None
+
+            device_data = self._getDeviceData(device_tree, pending.pop())
+
+            if device_data.type == 'luks/dm-crypt':
+                devs.append(device_data.name)
+
+            for parent in device_data.parents:
+                if parent not in visited:
+                    visited.add(parent)
+                    pending.append(parent)
+
+        log.debug("The dump target %s depends on the LUKS devices %s.", target or "(remote)", devs)
+        return devs
+
+# The cache shared by the spokes
+storageProbe = StorageProbe()
+
+# The modules of the storage layers per device type
+LAYER_MODULES = {
+    "luks/dm-crypt": ("dm_mod", "dm_crypt"),
+    "lvmlv": ("dm_mod",),
+    "lvmthinlv": ("dm_mod", "dm_thin_pool"),
+    "lvmvg": ("dm_mod",),
+    "dm-multipath": ("dm_mod", "dm_multipath"),
+    "mdarray": ("md_mod",),
+    "iscsi": ("iscsi_tcp",),
+    "fcoe": ("fcoe",),
+    "zfcp": ("zfcp",),
+}
+
+# The storage layers that don't need any modules
+PLAIN_LAYERS = ("partition",)
+
+# The modules of the md RAID levels
+RAID_LEVEL_MODULES = {
+    "raid0": "raid0",
+    "raid1": "raid1",
+    "raid4": "raid456",
+    "raid5": "raid456",
+    "raid6": "raid456",
+    "raid10": "raid10",
+}
+
+def getTargetModules(device_tree, kdump_conf=None, unknown=None):
+    """Return a set of the modules the dump target depends on.
+
+       The modules of the storage layers are given by the types of the
+       ancestors of the dump target, the modules of the disks and their
+       HBAs are read from sysfs. Return None for a remote target or if
+       the target can't be found. The names of the devices with unknown
+       modules, an unknown layer or a disk without modules in sysfs,
+       are added to the given unknown list.
+    """
+    target = getDumpTargetDevice(device_tree, kdump_conf)
+
+    if not target:
+        return None
+
+    modules = set()
+    pending = [target]
+    visited = set(pending)
+
+    while pending:
+        device_data = _getDeviceData(device_tree, pending.pop())
+        modules.update(LAYER_MODULES.get(device_data.type, ()))
+        found = device_data.type in LAYER_MODULES or device_data.type in PLAIN_LAYERS
+
+        level = RAID_LEVEL_MODULES.get(device_data.attrs.get("level", ""))
+        if level:
+            modules.add(level)
+
+        # The disks are the roots of the device tree.
+        if not device_data.parents:
+            name = os.path.basename(device_data.path or device_data.name)
+            drivers = _getSysfsDrivers("/sys/block/%s/device" % name, "driver/module")
+            modules.update(drivers)
+            found = found or bool(drivers)
+
+        if not found and unknown is not None:
+            unknown.append(device_data.name)
+
+        for parent in device_data.parents:
+            if parent not in visited:
+                visited.add(parent)
+                pending.append(parent)
+
+    log.debug("The dump target %s depends on the modules %s.", target, sorted(modules))
+    return modules
+
+def _readModuleSize(module):
+    """Return the size in bytes of a loaded module or 0."""
+    try:
+        with open("/sys/module/%s/coresize" % module, "r") as f:
+            return int(f.read())
+    except (IOError, ValueError):
+        return 0
+
+def estimateModulesSaving(modules, arch):
+    """Return the memory in MB saved by the capture kernel without the modules.
+
+       The estimate is the size of the loaded modules and the extra
+       reservation of their drivers in the reservation rules.
+    """
+    rules = getReservationRules(arch)
+    size = sum(_readModuleSize(module) for module in set(modules))
+    extra = sum(rules["drivers"].get(module, 0) for module in set(modules))
+    return size / (1024 * 1024) + extra
+
+def getTargetLuksDevices(object_path, kdump_conf=None, cancel=None):
+    """Return the names of the LUKS devices the dump target depends on.
+
+       Only the ancestors of the dump target are fetched, every device
+       once. The dump path depends on dm-crypt if the list isn't empty.
+       If the target can't be found, all LUKS devices of the applied
+       partitioning are returned. The devices are cached by storageProbe.
+
+       If the cancel event is set, None is returned.
+    """
+    return storageProbe.getTargetLuksDevices(object_path, kdump_conf, cancel)
+
+# The architectures that support crashkernel=X,high and crashkernel=Y,low
+CRASHKERNEL_HIGH_LOW_ARCHES = ("x86_64", "aarch64", "riscv64", "loongarch64")
+
+def _readKernelConfig(option):
+    """Return the value of an option of the running kernel config.
+
+       Return n for options that are not set, None if there is no config.
+    """
+    release = os.uname().release
+
+    for path in ("/lib/modules/%s/config" % release, "/boot/config-%s" % release):
+        try:
+            with open(path, "r") as f:
+                config = f.read()
+        except IOError:
+            continue
+
+        matched = re.search(r'^%s=(.*)$' % re.escape(option), config, re.MULTILINE)
+        return matched.group(1).strip() if matched else "n"
+
+    return None
+
+def _hasKernelSymbol(name):
+    """Is the given symbol in /proc/kallsyms?"""
+    try:
+        with open("/proc/kallsyms", "r") as f:
+            return re.search(r'\s%s$' % re.escape(name), f.read(), re.MULTILINE) is not None
+    except IOError:
+        return False
+
+def _hasCma():
+    """Is the contiguous memory allocator available?"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            return re.search(r'^CmaTotal:', f.read(), re.MULTILINE) is not None
+    except IOError:
+        return False
+
+def probeCapabilities():
+    """Probe the kdump capabilities of the running system.
+
+       Return an instance of KdumpCapabilities.
+    """
+    capabilities = KdumpCapabilities()
+    capabilities.fadump = os.path.exists(FADUMP_CAPABLE_FILE)
+    capabilities.crashkernel_high_low = memoryProbe.arch in CRASHKERNEL_HIGH_LOW_ARCHES
+    capabilities.crashkernel_cma = _hasCma()
+
+    kexecFile = _readKernelConfig("CONFIG_KEXEC_FILE")
+    if kexecFile is not None:
+        capabilities.kexec_file_load = kexecFile == "y"
+    else:
+        capabilities.kexec_file_load = _hasKernelSymbol("sys_kexec_file_load")
+
+    capabilities.current_reservation = int(memoryProbe.reservedMemory)
+
+    log.debug("Probed the kdump capabilities: %s", capabilities)
+    return capabilities
+
+# The page usage of the running system, see probeMemUsage
+_memUsage = None
+_memUsageProbed = False
+_memUsageLock = threading.Lock()
+
+def probeMemUsage():
+    """Probe the page usage of the running system with makedumpfile.
+
+       The system is probed only once, the result is kept for the
+       estimates of the dump. Return a dictionary of page types and
+       their shares or None.
+    """
+    global _memUsage, _memUsageProbed
+    from pyanaconda.core import util
+
+    with _memUsageLock:
+        if _memUsageProbed:
+            return _memUsage
+
+        _memUsageProbed = True
+
+        try:
+            with tracer.span("execWithCapture", command="makedumpfile --mem-usage"):
+                output = util.execWithCapture("makedumpfile", ["--mem-usage", "/proc/kcore"],
+                                              filter_stderr=True)
+        except (FileNotFoundError, OSError) as e:
+            log.debug("Can't probe the page usage: %s", e)
+            return None
+
+        _memUsage = parse_mem_usage(output)
+        log.debug("Probed the page usage: %s", _memUsage)
+        return _memUsage
+
+def getDumpEstimate(level):
+    """Return a tuple of the vmcore size in MB and the dump duration in seconds.
+
+       The page usage probed by makedumpfile is used if available,
+       the model of a typical system otherwise.
+    """
+    return estimate_dump(memoryProbe.totalMemory, level, _memUsage)
@@ -26,6 +26,46 @@ from pyanaconda.modules.common.constants.namespaces import ADDONS_NAMESPACE
 # The constants
 FADUMP_CAPABLE_FILE = "/proc/device-tree/rtas/ibm,configure-kernel-dump"
 
+# The directory of the modules of the installed kernels
+KERNEL_MODULES_DIR = "/usr/lib/modules"
+
+# The kdump initramfs of a kernel version, see mkdumprd
+KDUMP_INITRAMFS_FILE = "/boot/initramfs-{}kdump.img"
+
+# The kernel of a kernel version in a boot entry
+KERNEL_IMAGE_FILE = "/boot/vmlinuz-{}"
+
+# The configuration file of kdump
+KDUMP_CONF_FILE = "/etc/kdump.conf"
+
+# The settings of the capture kernel
+KDUMP_SYSCONFIG_FILE = "/etc/sysconfig/kdump"
+
+# The maximal number of storage DBus calls kept in flight at once
+MAX_STORAGE_CALLS = 16
+
+# The file the recorded spans are written to at the end of the installation
+TRACE_FILE = "/tmp/kdump-anaconda-addon.trace.json"
+
+# The file the spans of the UI are exported to for the kdump service
+UI_TRACE_FILE = "/tmp/kdump-anaconda-addon.ui.trace.json"
+
+# The maximal number of kdump initramfs images built at once
+MAX_INITRAMFS_BUILDS = 4
+
+# The target time in seconds from the start of the service to its registration
+STARTUP_TIME_TARGET = 0.5
+
+# The delay in seconds of the storage scan, a burst of storage changes is
+# scanned once
+STORAGE_SCAN_DELAY = 0.5
+
+# The name of the thread that scans the storage for the GUI spoke
+THREAD_KDUMP_STORAGE_SCAN = "AnaKdumpStorageScanThread"
+
+# The name of the thread that probes the page usage for the spokes
+THREAD_KDUMP_MEM_USAGE = "AnaKdumpMemUsageThread"
+
 # DBus constants
 KDUMP_NAMESPACE = (
     *ADDONS_NAMESPACE,
@@ -40,3 +80,4 @@ KDUMP = DBusServiceIdentifier(
 # To mark ENCRYPTION_WARNING as translatable
 _ = lambda x: x
 ENCRYPTION_WARNING = _('Encrypted storage is in use, using an encrypted device as dump target for kdump might fail. Please verify if kdump is working properly after the installation finished. For more details see the "Notes on encrypted dump target" section in /usr/share/doc/kdump-utils/kexec-kdump-howto.txt.')
+DUMP_ESTIMATE = _('Estimated vmcore size: %(size)s, dump duration: %(duration)s')
@@ -0,0 +1,384 @@
+#
+# Copyright (C) 2026 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import bisect
+import fnmatch
+import functools
+import logging
+import re
+
+log = logging.getLogger(__name__)
+
+__all__ = ["CrashkernelTable", "parse_size", "format_size", "parse_reserved_memory",
+           "get_reserved_memory", "get_crashkernel_value", "get_reservation",
+           "get_default_crashkernel", "add_crashkernel", "get_kernel_arguments"]
+
+_SIZE_RE = re.compile(r'^(\d+)([KMGT]?)$')
+
+_UNITS = {
+    "": 1,
+    "K": 1024,
+    "M": 1024 ** 2,
+    "G": 1024 ** 3,
+    "T": 1024 ** 4,
+}
+
+# The default crashkernel values of kdump-utils per arch and dump mode
+DEFAULT_CRASHKERNEL = {
+    ("x86_64", "kdump"): "1G-4G:192M,4G-64G:256M,64G-:512M",
+    ("s390x", "kdump"): "1G-4G:192M,4G-64G:256M,64G-:512M",
+    ("aarch64", "kdump"): "1G-4G:256M,4G-64G:320M,64G-:576M",
+    ("ppc64le", "kdump"): "2G-4G:384M,4G-16G:512M,16G-64G:1G,64G-128G:2G,128G-:4G",
+    ("ppc64le", "fadump"): "4G-16G:768M,16G-64G:1G,64G-128G:2G,128G-1T:4G,1T-2T:6G,"
+                           "2T-4T:12G,4T-8T:20G,8T-16T:36G,16T-32T:64G,32T-64T:128G,64T-:180G",
+}
+
+# The extra reservation in MB per makedumpfile thread, it covers the per-CPU
+# data of the additional CPU of the capture kernel and the buffers of the thread
+DUMP_THREAD_MEMORY = 16
+
+# Allow a string of digits optionally followed by 'M'
+_MB_RE = re.compile(r'^\d+M?$')
+
+# An entry of a per-arch map: <arch>=<value>
+_ARCH_RE = re.compile(r'^([A-Za-z0-9_*?]+)=(.*)$')
+
+
+def parse_size(text):
+    """Parse a size in the syntax of the kernel command line.
+
+    A size without a unit is in bytes.
+
+    :param text: a string like 512M or 4G
+    :return: a number of bytes
+    :raise: ValueError for invalid sizes
+    """
+    matched = _SIZE_RE.match(text.strip().upper())
+
+    if not matched:
+        raise ValueError("Invalid size '{}'".format(text))
+
+    number, unit = matched.groups()
+    return int(number) * _UNITS[unit]
+
+
+def format_size(size):
+    """Format a number of bytes in the syntax of the kernel command line.
+
+    :param size: a number of bytes
+    :return: a string with the largest exact unit
+    """
+    for unit in ("T", "G", "M", "K"):
+        if size and size % _UNITS[unit] == 0:
+            return "{}{}".format(size // _UNITS[unit], unit)
+
+    return str(size)
+
+
+class CrashkernelTable(object):
+    """A compiled crashkernel range table.
+
+    The table is parsed from the syntax of the crashkernel kernel
+    parameter, for example 1G-4G:192M,4G-64G:256M,64G-:512M. The ranges
+    are sorted, don't overlap and are looked up in O(log n).
+    """
+
+    def __init__(self, ranges, offset=None):
+        """Create a table.
+
+        :param ranges: a list of (start, end, size) in bytes, end may be None
+        :param offset: an offset in bytes or None
+        :raise: ValueError for empty, invalid or overlapping ranges
+        """
+        if not ranges:
+            raise ValueError("No ranges")
+
+        self._ranges = sorted(ranges, key=lambda r: r[0])
+        self._starts = [start for start, _end, _size in self._ranges]
+        self._offset = offset
+
+        previous_end = 0
+        for index, (start, end, _size) in enumerate(self._ranges):
+            if end is not None and end <= start:
+                raise ValueError("Invalid range {}-{}".format(format_size(start), format_size(end)))
+
+            if index and (previous_end is None or start < previous_end):
+                raise ValueError("Overlapping range at {}".format(format_size(start)))
+
+            previous_end = end
+
+    @classmethod
+    def parse(cls, text):
+        """Parse a table.
+
+        :param text: a string like 1G-4G:192M,4G-:256M[@offset]
+        :return: an instance of CrashkernelTable
+        :raise: ValueError for invalid tables
+        """
+        offset = None
+
+        if "@" in text:
+            text, offset_text = text.rsplit("@", 1)
+            offset = parse_size(offset_text)
+
+        ranges = []
+
+        for item in text.split(","):
+            if ":" not in item or "-" not in item:
+                raise ValueError("Invalid range '{}'".format(item))
+
+            interval, size = item.split(":", 1)
+            start, end = interval.split("-", 1)
+            ranges.append((
+                parse_size(start),
+                parse_size(end) if end.strip() else None,
+                parse_size(size)
+            ))
+
+        return cls(ranges, offset)
+
+    @property
+    def ranges(self):
+        """The sorted list of (start, end, size) in bytes."""
+        return list(self._ranges)
+
+    @property
+    def offset(self):
+        """The offset in bytes or None."""
+        return self._offset
+
+    def lookup(self, memory):
+        """Return the reservation for the given amount of memory.
+
+        :param memory: an amount of memory in MB
+        :return: the reserved memory in MB, 0 if no range applies
+        """
+        memory = int(memory * _UNITS["M"])
+        index = bisect.bisect_right(self._starts, memory) - 1
+
+        if index < 0:
+            return 0
+
+        _start, end, size = self._ranges[index]
+
+        if end is not None and memory >= end:
+            return 0
+
+        return size // _UNITS["M"]
+
+    def __str__(self):
+        text = ",".join(
+            "{}-{}:{}".format(format_size(start), format_size(end) if end is not None else "",
+                              format_size(size))
+            for start, end, size in self._ranges
+        )
+
+        if self._offset is not None:
+            text += "@" + format_size(self._offset)
+
+        return text
+
+    def __eq__(self, other):
+        return isinstance(other, CrashkernelTable) and str(self) == str(other)
+
+
+def _parse_entry(text):
+    """Parse auto, a number of MB or a range table."""
+    text = text.strip()
+
+    if text == "auto":
+        return text
+
+    if _MB_RE.match(text):
+        return int(text.rstrip("M"))
+
+    return CrashkernelTable.parse(text)
+
+
+@functools.lru_cache(maxsize=256)
+def parse_reserved_memory(value):
+    """Parse a value of the reserved memory.
+
+    The value is auto, a number of MB, a range table or a map of arch
+    patterns separated by semicolons, for example
+    x86_64=1G-4G:192M,4G-:256M;ppc64*=2G-:1G;*=auto. The compiled
+    values are cached.
+
+    :param value: a string with the value
+    :return: a tuple of (arch pattern, entry), an entry is auto, int or table
+    :raise: ValueError for invalid values
+    """
+    if "=" not in value:
+        return (("*", _parse_entry(value)),)
+
+    entries = []
+
+    for item in value.split(";"):
+        matched = _ARCH_RE.match(item.strip())
+
+        if not matched:
+            raise ValueError("Invalid entry '{}'".format(item))
+
+        pattern, text = matched.groups()
+        entries.append((pattern, _parse_entry(text)))
+
+    return tuple(entries)
+
+
+@functools.lru_cache(maxsize=256)
+def get_reserved_memory(value, arch):
+    """Return the entry of the reserved memory for the given arch.
+
+    :param value: a string with the value
+    :param arch: an architecture
+    :return: auto, a number of MB, a table or None if no entry matches
+    :raise: ValueError for invalid values
+    """
+    for pattern, entry in parse_reserved_memory(value):
+        if fnmatch.fnmatch(arch, pattern):
+            return entry
+
+    return None
+
+
+@functools.lru_cache(maxsize=256)
+def get_crashkernel_value(value, arch):
+    """Return the value of the crashkernel parameter for the given arch.
+
+    :param value: a string with the reserved memory
+    :param arch: an architecture
+    :return: auto, a size like 256M, a range table or None
+    """
+    entry = get_reserved_memory(value, arch)
+
+    if entry is None or entry == "auto":
+        return entry
+
+    if isinstance(entry, int):
+        return "{}M".format(entry)
+
+    return str(entry)
+
+
+def get_reservation(value, arch, total_memory):
+    """Return the amount of memory the value reserves on a system.
+
+    :param value: a string with the reserved memory
+    :param arch: an architecture
+    :param total_memory: the total memory of the system in MB
+    :return: a number of MB, None for auto or no matching entry
+    """
+    entry = get_reserved_memory(value, arch)
+
+    if entry is None or entry == "auto":
+        return None
+
+    if isinstance(entry, int):
+        return entry
+
+    return entry.lookup(total_memory)
+
+
+def get_default_crashkernel(arch, dump_mode):
+    """Return the default crashkernel value of kdump-utils.
+
+    The value doesn't include the adjustments kdumpctl makes for the
+    hardware of the running system, for example for SME or mlx5.
+
+    :param arch: an architecture
+    :param dump_mode: kdump or fadump
+    :return: a range table or None
+    """
+    return DEFAULT_CRASHKERNEL.get((arch, dump_mode), DEFAULT_CRASHKERNEL.get((arch, "kdump")))
+
+
+def add_crashkernel(value, delta):
+    """Add an amount of memory to a crashkernel value.
+
+    Like kdumpctl does, the amount is added to every range of a table.
+
+    :param value: a size like 256M or a range table, optionally with ,high or ,low
+    :param delta: an amount of memory in MB
+    :return: a new crashkernel value
+    :raise: ValueError for invalid values
+    """
+    suffix = ""
+
+    if value.endswith((",high", ",low")):
+        value, suffix = value.rsplit(",", 1)
+        suffix = "," + suffix
+
+    if _SIZE_RE.match(value.strip().upper()):
+        return format_size(parse_size(value) + delta * _UNITS["M"]) + suffix
+
+    table = CrashkernelTable.parse(value)
+    ranges = [(start, end, size + delta * _UNITS["M"]) for start, end, size in table.ranges]
+    return str(CrashkernelTable(ranges, table.offset)) + suffix
+
+
+def get_kernel_arguments(kdump_enabled, fadump_enabled, fadump_capable, reserved_memory, arch,
+                         get_default, dump_threads=0):
+    """Return the kernel arguments for kdump and fadump.
+
+    The reservation computed from auto or a range table is increased for
+    the threads of makedumpfile, an amount in MB is used as it is.
+
+    :param kdump_enabled: is kdump enabled?
+    :param fadump_enabled: is fadump enabled?
+    :param fadump_capable: does the system support fadump?
+    :param reserved_memory: a string with the reserved memory
+    :param arch: an architecture
+    :param get_default: a function that returns the default crashkernel value
+    :param dump_threads: a number of makedumpfile threads
+    :return: a list of kernel arguments
+    """
+    args = []
+
+    # Enable fadump.
+    if fadump_enabled and fadump_capable:
+        args.append('fadump=on')
+        dump_threads = 0
+
+    # Set crashkernel argument
+    if kdump_enabled:
+        # Ensure that a plain amount is an amount in MB and pick
+        # the entry of this arch from a map of arch patterns.
+        ck_val = get_crashkernel_value(reserved_memory, arch)
+        fixed = ck_val is not None and _MB_RE.match(ck_val)
+
+        if ck_val is None:
+            log.warning("No reservation is specified for %s, will use the default "
+                        "crashkernel.", arch)
+            ck_val = 'auto'
+
+        if ck_val == 'auto':
+            ck_val = get_default()
+
+            if not ck_val:
+                log.error("Can't retrieve the default crashkernel, will set crashkernel=auto.")
+                ck_val = 'auto'
+
+        if dump_threads and not fixed and ck_val != 'auto':
+            try:
+                ck_val = add_crashkernel(ck_val, dump_threads * DUMP_THREAD_MEMORY)
+            except ValueError as e:
+                log.warning("Can't add the reservation for %d dump threads to %s: %s",
+                            dump_threads, ck_val, e)
+
+        args.append('crashkernel=%s' % ck_val)
+
+    return args
@@ -0,0 +1,271 @@
+#
+# Copyright (C) 2026 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+"""Dump levels and threads of makedumpfile and the estimate of the vmcore."""
+import re
+
+__all__ = ["DEFAULT_DUMP_LEVEL", "DEFAULT_CORE_COLLECTOR", "check_dump_level", "get_dump_level",
+           "set_dump_level", "check_dump_threads", "pick_dump_threads", "set_dump_threads",
+           "parse_mem_usage", "estimate_dump", "format_dump_size", "format_duration"]
+
+# The dump level of the default core collector of kdump-utils
+DEFAULT_DUMP_LEVEL = 31
+
+# The default core collector of kdump-utils
+DEFAULT_CORE_COLLECTOR = "makedumpfile -l --message-level 7 -d 31"
+
+# The page types of makedumpfile --mem-usage and the bits of the dump
+# level that exclude them. The bit 4 excludes all cache pages.
+EXCLUDED_PAGES = {
+    "ZERO": 1,
+    "NON_PRI_CACHE": 2 | 4,
+    "PRI_CACHE": 4,
+    "USER": 8,
+    "FREE": 16,
+}
+
+# The share of the page types on a typical installed system
+DEFAULT_MEM_USAGE = {
+    "ZERO": 0.05,
+    "NON_PRI_CACHE": 0.15,
+    "PRI_CACHE": 0.05,
+    "USER": 0.15,
+    "FREE": 0.50,
+    "KERN_DATA": 0.10,
+}
+
+# The compression ratio of the dumped pages
+COMPRESSION_RATIO = 3.0
+
+# The throughput in MB/s of the filtering of the memory and of the dump of
+# the pages by a single CPU in the capture kernel
+SCAN_THROUGHPUT = 8192
+DUMP_THROUGHPUT = 150
+
+# The maximal number of makedumpfile threads
+MAX_DUMP_THREADS = 64
+
+# The maximal number of makedumpfile threads picked automatically
+AUTO_DUMP_THREADS = 8
+
+_DUMP_LEVEL_RE = re.compile(r'^(-d|--dump-level)(=?)(\d*)$')
+_MEM_USAGE_RE = re.compile(r'^(\w+)\s+(\d+)\s+(yes|no)\b', re.MULTILINE)
+_TOTAL_PAGES_RE = re.compile(r'^Total pages on system:\s+(\d+)', re.MULTILINE)
+
+
+def check_dump_level(level):
+    """Check the dump level of makedumpfile.
+
+    :param level: a number from 0 to 31
+    :raise: ValueError for an invalid level
+    """
+    if not 0 <= level <= 31:
+        raise ValueError("Invalid dump level {}, use a number from 0 to 31".format(level))
+
+
+def _find_dump_level(args):
+    """Return the index of the dump level option and the index of its value."""
+    for i, arg in enumerate(args):
+        matched = _DUMP_LEVEL_RE.match(arg)
+
+        if not matched:
+            continue
+
+        if matched.group(3):
+            return i, i
+
+        if i + 1 < len(args) and args[i + 1].isdigit():
+            return i, i + 1
+
+    return None, None
+
+
+def get_dump_level(collector):
+    """Return the dump level of a core collector.
+
+    :param collector: a value of the core_collector directive
+    :return: a dump level or None if it is not set
+    """
+    args = collector.split()
+
+    if not args or args[0] != "makedumpfile":
+        return None
+
+    i, j = _find_dump_level(args)
+
+    if i is None:
+        return None
+
+    if i == j:
+        return int(_DUMP_LEVEL_RE.match(args[i]).group(3))
+
+    return int(args[j])
+
+
+def set_dump_level(collector, level):
+    """Set the dump level of a core collector.
+
+    Only makedumpfile supports the dump levels, other collectors are
+    returned unchanged.
+
+    :param collector: a value of the core_collector directive
+    :param level: a dump level
+    :return: a new value of the core_collector directive
+    """
+    args = collector.split()
+
+    if not args or args[0] != "makedumpfile":
+        return collector
+
+    i, j = _find_dump_level(args)
+
+    if i is None:
+        args.extend(["-d", str(level)])
+    else:
+        args[i:j + 1] = ["-d", str(level)]
+
+    return " ".join(args)
+
+
+def check_dump_threads(threads):
+    """Check the number of makedumpfile threads.
+
+    :param threads: a number from 0 to MAX_DUMP_THREADS
+    :raise: ValueError for an invalid number
+    """
+    if not 0 <= threads <= MAX_DUMP_THREADS:
+        raise ValueError("Invalid number of dump threads {}, use a number from 0 to {}".format(
+            threads, MAX_DUMP_THREADS
+        ))
+
+
+def pick_dump_threads(cpus):
+    """Pick the number of makedumpfile threads for a system.
+
+    One CPU of the capture kernel is left to the main thread of makedumpfile.
+    A single worker thread is slower than no threads, so small systems dump
+    without threads.
+
+    :param cpus: a number of CPUs of the system
+    :return: a number of threads
+    """
+    threads = min((cpus or 1) - 1, AUTO_DUMP_THREADS)
+    return threads if threads > 1 else 0
+
+
+def set_dump_threads(collector, threads):
+    """Set the number of threads of a core collector.
+
+    Only makedumpfile supports the threads, other collectors are returned
+    unchanged. No threads remove the option.
+
+    :param collector: a value of the core_collector directive
+    :param threads: a number of threads
+    :return: a new value of the core_collector directive
+    """
+    args = collector.split()
+
+    if not args or args[0] != "makedumpfile":
+        return collector
+
+    result = []
+    skip = False
+
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg == "--num-threads":
+            skip = True
+        elif not arg.startswith("--num-threads="):
+            result.append(arg)
+
+    if threads:
+        result.extend(["--num-threads", str(threads)])
+
+    return " ".join(result)
+
+
+def parse_mem_usage(output):
+    """Parse the output of makedumpfile --mem-usage.
+
+    :param output: the output of makedumpfile --mem-usage
+    :return: a dictionary of page types and their shares or None
+    """
+    total = _TOTAL_PAGES_RE.search(output or "")
+
+    if not total or not int(total.group(1)):
+        return None
+
+    total = int(total.group(1))
+    return {
+        name: int(pages) / total
+        for name, pages, _excludable in _MEM_USAGE_RE.findall(output)
+    }
+
+
+def estimate_dump(total_memory, level, mem_usage=None):
+    """Estimate the size of the vmcore and the duration of the dump.
+
+    The dumped pages are all pages that are not excluded by the dump
+    level. The duration is the time of the filtering of the whole memory
+    and of the compression and write of the dumped pages.
+
+    :param total_memory: the total memory in MB
+    :param level: a dump level
+    :param mem_usage: a dictionary of page types and their shares or None
+    :return: a tuple of the size in MB and the duration in seconds
+    """
+    mem_usage = mem_usage or DEFAULT_MEM_USAGE
+    excluded = sum(
+        share for name, share in mem_usage.items()
+        if level & EXCLUDED_PAGES.get(name, 0)
+    )
+    dumped = total_memory * max(1.0 - excluded, 0.0)
+    duration = total_memory / SCAN_THROUGHPUT + dumped / DUMP_THROUGHPUT
+    return dumped / COMPRESSION_RATIO, duration
+
+
+def format_dump_size(size):
+    """Format a size in MB for humans.
+
+    :param size: a size in MB
+    :return: a string
+    """
+    if size < 1024:
+        return "%d MB" % size
+
+    if size < 1024 ** 2:
+        return "%.1f GB" % (size / 1024)
+
+    return "%.1f TB" % (size / 1024 ** 2)
+
+
+def format_duration(duration):
+    """Format a duration in seconds for humans.
+
+    :param duration: a duration in seconds
+    :return: a string
+    """
+    minutes = round(duration / 60)
+
+    if minutes < 1:
+        return "< 1 min"
+
+    if minutes < 60:
+        return "%d min" % minutes
+
+    return "%d h %02d min" % divmod(minutes, 60)
@@ -21,20 +21,31 @@
 
 """Kdump anaconda GUI configuration"""
 
-import os.path
+import logging
+import threading
 from gi.repository import Gtk
 
 from pyanaconda.flags import flags
+from pyanaconda.threading import threadMgr, AnacondaThread
 from pyanaconda.modules.common.constants.services import STORAGE
 from pyanaconda.modules.common.util import is_module_available
 from pyanaconda.ui.categories.system import SystemCategory
 from pyanaconda.ui.gui.spokes import NormalSpoke
-from pyanaconda.ui.gui.utils import fancy_set_sensitive
+from pyanaconda.ui.gui.utils import fancy_set_sensitive, gtk_call_once
 from pyanaconda.ui.communication import hubQ
 
 from com_redhat_kdump.i18n import _, N_
-from com_redhat_kdump.constants import FADUMP_CAPABLE_FILE, KDUMP, ENCRYPTION_WARNING
-from com_redhat_kdump.common import getTotalMemory, getMemoryBounds, getLuksDevices
+from com_redhat_kdump.constants import KDUMP, ENCRYPTION_WARNING, DUMP_ESTIMATE, \
+    THREAD_KDUMP_STORAGE_SCAN, THREAD_KDUMP_MEM_USAGE, STORAGE_SCAN_DELAY, UI_TRACE_FILE
+from com_redhat_kdump.common import getTotalMemory, getMemoryBounds, getRecommendedMemory, \
+    getTargetLuksDevices, memoryProbe, probeMemUsage, getDumpEstimate
+from com_redhat_kdump.crashkernel import get_reservation
+from com_redhat_kdump.dump_level import DEFAULT_DUMP_LEVEL, format_dump_size, format_duration
+from com_redhat_kdump.proxy import get_kdump_proxy
+from com_redhat_kdump.structures import KdumpConfiguration, KdumpCapabilities
+from com_redhat_kdump.tracing import tracer
+
+log = logging.getLogger(__name__)
 
 __all__ = ["KdumpSpoke"]
 
@@ -63,10 +74,14 @@ class KdumpSpoke(NormalSpoke):
     def __init__(self, *args):
         NormalSpoke.__init__(self, *args)
         self._reserveMem = 0
-        self._proxy = KDUMP.get_proxy()
+        self._reserveTable = None
+        self._proxy = get_kdump_proxy()
         self._ready = True
         self._luks_devs = []
         self._checked_luks_devs = []
+        self._scanGeneration = 0
+        self._scanCancel = None
+        self._memUsageStarted = False
 
     def initialize(self):
         NormalSpoke.initialize(self)
@@ -82,8 +97,12 @@ class KdumpSpoke(NormalSpoke):
         self._autoWarn = self.builder.get_object("autoReservationWarning")
         self._reserveTypeGrid = self.builder.get_object("kdumpReserveTypeGrid")
         self._reserveMemoryGrid = self.builder.get_object("kdumpReserveMemoryGrid")
+        self._dumpLevelGrid = self.builder.get_object("kdumpDumpLevelGrid")
+        self._dumpLevelSpin = self.builder.get_object("dumpLevelSpin")
+        self._dumpEstimateLabel = self.builder.get_object("dumpEstimateLabel")
 
-        if os.path.exists(FADUMP_CAPABLE_FILE):
+        capabilities = KdumpCapabilities.from_structure(self._proxy.Capabilities)
+        if capabilities.fadump:
             self._fadumpButton.show()
         else:
             self._fadumpButton.hide()
@@ -92,9 +111,11 @@ class KdumpSpoke(NormalSpoke):
         lower, upper, step = getMemoryBounds()
         adjustment = Gtk.Adjustment(lower, lower, upper, step, step, 0)
         self._toBeReservedSpin.set_adjustment(adjustment)
-        self._toBeReservedSpin.set_value(lower)
+        self._toBeReservedSpin.set_value(getRecommendedMemory())
         self._rangeReservedMemMBLabel.set_text("  (%d - %d MB)" % (lower, upper))
 
+        self._dumpLevelSpin.set_adjustment(Gtk.Adjustment(DEFAULT_DUMP_LEVEL, 0, 31, 1, 1, 0))
+
         # Connect a callback to the PropertiesChanged signal.
         storage = STORAGE.get_proxy()
         storage.PropertiesChanged.connect(self._check_storage_change)
@@ -103,10 +124,15 @@ class KdumpSpoke(NormalSpoke):
         # If a reserve amount is requested, set it in the spin button
         # Strip the trailing 'M'
         reserveMB = self._proxy.ReservedMemory
+        self._reserveTable = None
         if reserveMB != "auto":
             if reserveMB and reserveMB[-1] == 'M':
                 reserveMB = reserveMB[:-1]
-            if reserveMB:
+            if reserveMB and not reserveMB.isdigit():
+                # Show the amount a range table reserves on this system
+                # and keep the table unless the amount is changed.
+                reserveMB = self._get_table_reservation(self._proxy.ReservedMemory)
+            if reserveMB and reserveMB != "auto":
                 self._toBeReservedSpin.set_value(int(reserveMB))
 
         # Set the various labels. Use the spin button signal handler to set the
@@ -114,6 +140,11 @@ class KdumpSpoke(NormalSpoke):
         self._totalMemMB.set_text("%d" % getTotalMemory())
         self._toBeReservedSpin.emit("value-changed")
 
+        # Show the default level of the core collector if no level is set.
+        dumpLevel = self._proxy.DumpLevel
+        self._dumpLevelSpin.set_value(dumpLevel if dumpLevel != -1 else DEFAULT_DUMP_LEVEL)
+        self._dumpLevelSpin.emit("value-changed")
+
         # Set the states on the toggle buttons and let the signal handlers set
         # the sensitivities on the related widgets. Set the radio button first,
         # since the radio buttons' bailiwick is a subset of that of the
@@ -139,30 +170,117 @@ class KdumpSpoke(NormalSpoke):
             self.set_warning(_(ENCRYPTION_WARNING))
 
     def apply(self):
-        # Copy the GUI state into the AddonData object
-        self._proxy.KdumpEnabled = self._enableButton.get_active()
+        # Copy the GUI state into the kdump configuration
+        configuration = KdumpConfiguration()
+        configuration.kdump_enabled = self._enableButton.get_active()
         if self._autoButton.get_active():
-            self._proxy.ReservedMemory = "auto"
+            reserveMB = "auto"
         else:
-            self._proxy.ReservedMemory = "%d" % self._toBeReservedSpin.get_value_as_int()
-        self._proxy.FadumpEnabled = self._fadumpButton.get_active()
+            reserveMB = "%d" % self._toBeReservedSpin.get_value_as_int()
+        if self._reserveTable and self._reserveTable[1] == reserveMB:
+            reserveMB = self._reserveTable[0]
+        configuration.reserved_memory = reserveMB
+        configuration.fadump_enabled = self._fadumpButton.get_active()
+
+        # Keep the default level of the core collector unless it is changed.
+        dumpLevel = self._dumpLevelSpin.get_value_as_int()
+        if self._proxy.DumpLevel == -1 and dumpLevel == DEFAULT_DUMP_LEVEL:
+            dumpLevel = -1
+        configuration.dump_level = dumpLevel
+
+        # Keep the values the spoke doesn't show.
+        configuration.dump_threads = self._proxy.DumpThreads
+        configuration.drivers = self._proxy.Drivers
+        configuration.kdump_conf = self._proxy.KdumpConf
+        self._proxy.SetConfiguration(KdumpConfiguration.to_structure(configuration))
 
         # This hub have been visited, use should now be aware of the crypted devices issue
         self._checked_luks_devs = self._luks_devs
 
+        # Export the spans of the spoke for the trace of the service.
+        tracer.export(UI_TRACE_FILE)
+
+    def _get_table_reservation(self, value):
+        reserveMB = get_reservation(value, memoryProbe.arch, getTotalMemory())
+        if reserveMB is None:
+            self._reserveTable = (value, "auto")
+        else:
+            self._reserveTable = (value, "%d" % reserveMB)
+        return self._reserveTable[1]
+
+    def _start_mem_usage_probe(self):
+        # Probe the page usage for the estimates of the dump only once
+        # the dump level is shown.
+        if self._memUsageStarted:
+            return
+
+        self._memUsageStarted = True
+        threadMgr.add(AnacondaThread(
+            name=THREAD_KDUMP_MEM_USAGE,
+            target=self._probe_mem_usage
+        ))
+
+    def _probe_mem_usage(self):
+        if probeMemUsage():
+            gtk_call_once(self._dumpLevelSpin.emit, "value-changed")
+
     def _check_storage_change(self, interface, changed, invalid):
+        partition = changed.get("AppliedPartitioning")
+        if not partition:
+            return
+
+        # A newer partitioning makes the scan in progress obsolete.
+        if self._scanCancel:
+            self._scanCancel.set()
+
+        self._scanGeneration += 1
+        self._scanCancel = threading.Event()
+
         self._ready = False
         # pylint: disable=no-member
         hubQ.send_not_ready(self.__class__.__name__)
 
-        partition = changed.get("AppliedPartitioning")
-        if partition:
-            self._luks_devs = getLuksDevices(partition.unpack())
-
+        # Scan the storage in the background, so the hub is not blocked.
+        threadMgr.add(AnacondaThread(
+            name="%s-%d" % (THREAD_KDUMP_STORAGE_SCAN, self._scanGeneration),
+            target=self._scan_storage,
+            args=(partition.unpack(), self._proxy.KdumpConf, self._scanGeneration,
+                  self._scanCancel)
+        ))
+
+    def _scan_storage(self, object_path, kdump_conf, generation, cancel):
+        # A newer change during the delay cancels this scan.
+        if cancel.wait(STORAGE_SCAN_DELAY):
+            return
+
+        luks_devs = None
+
+        try:
+            # Check only the devices the dump target depends on.
+            luks_devs = getTargetLuksDevices(object_path, kdump_conf, cancel=cancel)
+        except Exception:  # pylint: disable=broad-except
+            # The check is only advisory, don't block the hub.
+            log.exception("Failed to check the encrypted devices of the dump target.")
+        finally:
+            gtk_call_once(self._finish_storage_scan, generation, luks_devs)
+
+    def _finish_storage_scan(self, generation, luks_devs):
+        # Drop the result of an outdated scan.
+        if generation != self._scanGeneration:
+            return
+
+        # Keep the previous devices if the scan has failed.
+        if luks_devs is not None:
+            self._luks_devs = luks_devs
+
+        self._scanCancel = None
         self._ready = True
         # pylint: disable=no-member
         hubQ.send_ready(self.__class__.__name__)
 
+        # Export the spans of the scan for the trace of the service.
+        tracer.export(UI_TRACE_FILE)
+
     @property
     def ready(self):
         return self._ready
@@ -201,10 +319,13 @@ class KdumpSpoke(NormalSpoke):
         if status:
             self._autoButton.emit("toggled")
             self._reserveTypeGrid.show()
+            self._dumpLevelGrid.show()
+            self._start_mem_usage_probe()
         else:
             self._autoWarn.hide()
             self._reserveMemoryGrid.hide()
             self._reserveTypeGrid.hide()
+            self._dumpLevelGrid.hide()
             self._fadumpButton.set_active(False)
 
     def on_reservation_toggled(self, radiobutton, user_data=None):
@@ -234,3 +355,10 @@ class KdumpSpoke(NormalSpoke):
         if totalMemText:
             totalMem = int(self._totalMemMB.get_text())
             self._usableMemMB.set_text("%d" % (totalMem - reserveMem))
+
+    def on_dump_level_changed(self, spinbutton, user_data=None):
+        size, duration = getDumpEstimate(spinbutton.get_value_as_int())
+        self._dumpEstimateLabel.set_text(_(DUMP_ESTIMATE) % {
+            "size": format_dump_size(size),
+            "duration": format_duration(duration),
+        })
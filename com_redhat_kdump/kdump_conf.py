@@ -0,0 +1,272 @@
+#
+# Copyright (C) 2026 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+"""Support for the directives of /etc/kdump.conf and for /etc/sysconfig/kdump."""
+import logging
+import os
+import re
+import shlex
+import tempfile
+
+log = logging.getLogger(__name__)
+
+__all__ = ["TARGET_DIRECTIVES", "REMOTE_TARGET_DIRECTIVES", "DIRECTIVES", "parse_directive",
+           "check_directives", "read_directives", "merge_kdump_conf", "set_nr_cpus",
+           "write_file_atomically", "DRIVERS_ALL", "DRIVERS_TARGET", "DRIVERS_MINIMAL",
+           "DRIVERS_MODES", "check_drivers"]
+
+# The directives that specify the dump target
+TARGET_DIRECTIVES = (
+    "raw", "nfs", "ssh", "virtiofs", "ext2", "ext3", "ext4", "xfs", "btrfs", "minix"
+)
+
+# The directives of the dump targets on other machines or on the host
+REMOTE_TARGET_DIRECTIVES = ("nfs", "ssh", "virtiofs")
+
+# The directives supported by kdump-utils
+DIRECTIVES = TARGET_DIRECTIVES + (
+    "path", "core_collector", "sshkey", "kdump_post", "kdump_pre", "extra_bins",
+    "extra_modules", "auto_reset_crashkernel", "failure_action", "default", "final_action",
+    "force_rebuild", "force_no_rebuild", "dracut_args", "fence_kdump_args", "fence_kdump_nodes",
+)
+
+# The allowed values of some directives
+_CHOICES = {
+    "failure_action": ("reboot", "halt", "poweroff", "shell", "dump_to_rootfs"),
+    "default": ("reboot", "halt", "poweroff", "shell", "dump_to_rootfs"),
+    "final_action": ("reboot", "halt", "poweroff"),
+    "auto_reset_crashkernel": ("yes", "no"),
+    "force_rebuild": ("0", "1"),
+    "force_no_rebuild": ("0", "1"),
+}
+
+# Keep the drivers selected by dracut
+DRIVERS_ALL = "all"
+
+# Add the drivers of the dump target
+DRIVERS_TARGET = "target"
+
+# Add the drivers of the dump target and omit the other drivers of the devices
+DRIVERS_MINIMAL = "minimal"
+
+# The selections of the drivers of the kdump initramfs
+DRIVERS_MODES = (DRIVERS_ALL, DRIVERS_TARGET, DRIVERS_MINIMAL)
+
+# The directives that are aliases of each other
+_ALIASES = {
+    "default": "failure_action",
+}
+
+
+def parse_directive(line):
+    """Parse a line with a directive of kdump.conf.
+
+    :param line: a string like core_collector makedumpfile -l -d 31
+    :return: a tuple of the directive and its value
+    :raise: ValueError for invalid directives
+    """
+    fields = line.strip().split(None, 1)
+
+    if len(fields) != 2 or not fields[1].strip():
+        raise ValueError("Invalid directive '{}'".format(line.strip()))
+
+    name, value = fields[0], fields[1].strip()
+
+    if name not in DIRECTIVES:
+        raise ValueError("Unknown directive '{}'".format(name))
+
+    return name, value
+
+
+def check_directives(directives):
+    """Check the directives of kdump.conf.
+
+    :param directives: a dictionary of directives and their values
+    :raise: ValueError for invalid directives
+    """
+    for name, value in directives.items():
+        parse_directive("{} {}".format(name, value))
+
+        choices = _CHOICES.get(name)
+        if choices and value not in choices:
+            raise ValueError("Invalid value '{}' of {}, use one of: {}".format(
+                value, name, ", ".join(choices)
+            ))
+
+    targets = [name for name in directives if name in TARGET_DIRECTIVES]
+    if len(targets) > 1:
+        raise ValueError("Only one dump target can be specified: {}".format(", ".join(targets)))
+
+    if "default" in directives and "failure_action" in directives:
+        raise ValueError("The directives default and failure_action can't be used together")
+
+    path = directives.get("path")
+    if path is not None and not path.startswith("/"):
+        raise ValueError("The path '{}' is not absolute".format(path))
+
+    collector = directives.get("core_collector", "").split()
+    if "ssh" in directives and collector and collector[0] == "makedumpfile" \
+            and "-F" not in collector:
+        raise ValueError("The core_collector makedumpfile requires -F for the ssh target")
+
+
+def check_drivers(drivers):
+    """Check the selection of the drivers of the kdump initramfs.
+
+    :param drivers: one of DRIVERS_MODES
+    :raise: ValueError for an invalid selection
+    """
+    if drivers not in DRIVERS_MODES:
+        raise ValueError("Invalid drivers {}, use one of {}".format(
+            drivers, ", ".join(DRIVERS_MODES)
+        ))
+
+
+def read_directives(text):
+    """Read the active directives from the content of kdump.conf.
+
+    :param text: the content of kdump.conf
+    :return: a dictionary of directives and their values
+    """
+    directives = {}
+
+    for line in text.splitlines():
+        stripped = line.strip()
+
+        if not stripped or stripped.startswith("#"):
+            continue
+
+        fields = stripped.split(None, 1)
+        directives.setdefault(fields[0], fields[1] if len(fields) > 1 else "")
+
+    return directives
+
+
+def _get_key(name):
+    """Return the key of a directive, the directives with the same key replace each other."""
+    name = _ALIASES.get(name, name)
+    return "target" if name in TARGET_DIRECTIVES else name
+
+
+def merge_kdump_conf(text, directives):
+    """Merge directives into the content of kdump.conf.
+
+    The first active line of a directive is replaced with the new value
+    and other active lines of the directive are dropped. A new dump target
+    replaces the previous one. Comments are kept and the directives that
+    are not in the file yet are appended.
+
+    :param text: the content of kdump.conf
+    :param directives: a dictionary of directives and their values
+    :return: the merged content
+    """
+    pending = {
+        _get_key(name): "{} {}".format(name, value)
+        for name, value in directives.items()
+    }
+
+    lines = []
+    merged = set()
+
+    for line in text.splitlines():
+        stripped = line.strip()
+
+        if not stripped or stripped.startswith("#"):
+            lines.append(line)
+            continue
+
+        key = _get_key(stripped.split(None, 1)[0])
+
+        if key not in pending:
+            lines.append(line)
+        elif key not in merged:
+            lines.append(pending[key])
+            merged.add(key)
+
+    lines.extend(line for key, line in pending.items() if key not in merged)
+    return "\n".join(lines) + "\n"
+
+
+# The kernel command line of the capture kernel in /etc/sysconfig/kdump
+_COMMANDLINE_APPEND_RE = re.compile(r'^KDUMP_COMMANDLINE_APPEND=(.*)$', re.MULTILINE)
+
+# The kernel arguments that limit the number of CPUs
+_CPUS_ARGS = ("nr_cpus", "maxcpus")
+
+
+def set_nr_cpus(text, cpus):
+    """Set the number of CPUs of the capture kernel.
+
+    The nr_cpus and maxcpus arguments of KDUMP_COMMANDLINE_APPEND are
+    set to the number, ppc64le limits the CPUs with maxcpus. The nr_cpus
+    argument is added if there is none of them.
+
+    :param text: the content of /etc/sysconfig/kdump
+    :param cpus: a number of CPUs
+    :return: the new content
+    """
+    matched = _COMMANDLINE_APPEND_RE.search(text)
+    args = []
+
+    if matched:
+        args = " ".join(shlex.split(matched.group(1))).split()
+
+    limits = [i for i, arg in enumerate(args) if arg.split("=", 1)[0] in _CPUS_ARGS]
+
+    for i in limits:
+        args[i] = "{}={}".format(args[i].split("=", 1)[0], cpus)
+
+    if not limits:
+        args.append("nr_cpus={}".format(cpus))
+
+    line = 'KDUMP_COMMANDLINE_APPEND="{}"'.format(" ".join(args))
+
+    if matched:
+        return text[:matched.start()] + line + text[matched.end():]
+
+    if text and not text.endswith("\n"):
+        text += "\n"
+
+    return text + line + "\n"
+
+
+def write_file_atomically(path, text):
+    """Replace the content of a file with one atomic rename.
+
+    The permissions of the existing file are kept.
+
+    :param path: a path to the file
+    :param text: the new content
+    """
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o644
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".kdump.conf.")
+
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
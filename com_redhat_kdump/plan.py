@@ -0,0 +1,200 @@
+#
+# Copyright (C) 2026 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+"""Offline planner of kdump reservations for a fleet of hosts.
+
+Usage: python -m com_redhat_kdump.plan [-j N] kickstart inventory
+
+The inventory is a CSV file with a header or a file of JSON lines with
+the fields host, arch, memory (in MB or with a unit like 64G), cpus and
+fadump. For every host, the kernel arguments the add-on would produce
+with the given kickstart are written to the standard output as CSV.
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import sys
+
+from pykickstart.errors import KickstartParseError
+
+from com_redhat_kdump.addon_section import read_addon_data
+from com_redhat_kdump.crashkernel import parse_size, get_default_crashkernel, get_kernel_arguments
+from com_redhat_kdump.dump_level import pick_dump_threads
+from com_redhat_kdump.reservation import computeMemoryBounds, clampReservedMemory, checkReservedMemory
+
+log = logging.getLogger(__name__)
+
+__all__ = ["Host", "plan_host", "read_inventory", "main"]
+
+# The settings of the kickstart in the worker processes
+_settings = None
+
+
+class Host(object):
+    """A host of the inventory."""
+
+    def __init__(self, name, arch, memory, cpus=1, fadump=False):
+        self.name = name
+        self.arch = arch
+        self.memory = memory
+        self.cpus = cpus
+        self.fadump = fadump
+
+    @classmethod
+    def from_record(cls, record):
+        """Create a host from a record of the inventory.
+
+        :param record: a dictionary of fields
+        :return: an instance of Host
+        :raise: ValueError for invalid records
+        """
+        memory = str(record["memory"]).strip()
+
+        if memory.isdigit():
+            memory = int(memory)
+        else:
+            memory = parse_size(memory) // 1024 ** 2
+
+        return cls(
+            name=str(record.get("host", "")),
+            arch=str(record["arch"]).strip(),
+            memory=memory,
+            cpus=int(record.get("cpus") or 1),
+            fadump=str(record.get("fadump", "")).strip().lower() in ("1", "true", "yes", "on")
+        )
+
+
+def plan_host(settings, host):
+    """Return the kernel arguments the add-on would produce for a host.
+
+    :param settings: a dictionary with the kickstart settings
+    :param host: an instance of Host
+    :return: a tuple of the kernel arguments and a warning or None
+    """
+    reserved_memory = settings["reserved_memory"]
+    lower, upper, _step = computeMemoryBounds(host.memory, host.arch)
+
+    # Apply the checks of the service.
+    warning = None
+    if reserved_memory.isdigit():
+        reserved_memory = clampReservedMemory(reserved_memory, lower, upper)
+    elif reserved_memory != "auto":
+        warning = checkReservedMemory(reserved_memory, host.memory, host.arch)
+
+    dump_mode = "fadump" if settings["fadump_enabled"] else "kdump"
+
+    dump_threads = settings.get("dump_threads", 0)
+    if dump_threads == -1:
+        dump_threads = pick_dump_threads(host.cpus)
+
+    args = get_kernel_arguments(
+        kdump_enabled=settings["kdump_enabled"],
+        fadump_enabled=settings["fadump_enabled"],
+        fadump_capable=host.fadump,
+        reserved_memory=reserved_memory,
+        arch=host.arch,
+        get_default=lambda: get_default_crashkernel(host.arch, dump_mode),
+        dump_threads=dump_threads
+    )
+
+    return " ".join(args), warning
+
+
+def read_inventory(fileobj):
+    """Read records from an inventory in CSV or JSON lines.
+
+    :param fileobj: a file object
+    :return: a generator of dictionaries
+    """
+    first = fileobj.readline()
+
+    if first.lstrip().startswith("{"):
+        yield json.loads(first)
+
+        for line in fileobj:
+            if line.strip():
+                yield json.loads(line)
+
+        return
+
+    yield from csv.DictReader(_chain(first, fileobj))
+
+
+def _chain(first, fileobj):
+    yield first
+    yield from fileobj
+
+
+def _init_worker(settings):
+    global _settings
+    _settings = settings
+
+
+def _plan_record(record):
+    try:
+        host = Host.from_record(record)
+    except (KeyError, ValueError) as e:
+        return record.get("host", ""), "", "Invalid record: %s" % e
+
+    args, warning = plan_host(_settings, host)
+    return host.name, args, warning or ""
+
+
+def main(argv=None):
+    """Run the planner."""
+    parser = argparse.ArgumentParser(
+        prog="python -m com_redhat_kdump.plan",
+        description="Plan the kdump reservation of every host of an inventory."
+    )
+    parser.add_argument("kickstart", help="a kickstart file")
+    parser.add_argument("inventory", help="a CSV or JSON lines inventory, - for stdin")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="the number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=1024,
+                        help="the number of hosts sent to a worker at once")
+    opts = parser.parse_args(argv)
+
+    try:
+        with open(opts.kickstart, "r") as f:
+            data = read_addon_data(f)
+    except KickstartParseError as e:
+        print("{}: {}".format(opts.kickstart, e), file=sys.stderr)
+        return 1
+
+    settings = {
+        "kdump_enabled": data.enabled,
+        "fadump_enabled": data.enablefadump,
+        "reserved_memory": data.reserve_mb,
+        "dump_threads": data.dump_threads,
+    }
+
+    inventory = sys.stdin if opts.inventory == "-" else open(opts.inventory, "r")
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["host", "arguments", "warning"])
+
+    with inventory, multiprocessing.Pool(opts.jobs, _init_worker, (settings,)) as pool:
+        # Stream the results in the order of the inventory.
+        for row in pool.imap(_plan_record, read_inventory(inventory), opts.chunk_size):
+            writer.writerow(row)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#
+# Copyright (C) 2026 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+import logging
+
+from dasbus.signal import Signal
+from dasbus.typing import unwrap_variant
+
+from com_redhat_kdump.constants import KDUMP
+
+log = logging.getLogger(__name__)
+
+__all__ = ["CachedProxy", "get_kdump_proxy"]
+
+# The properties of the kdump module cached by the UI
+KDUMP_PROPERTIES = ("KdumpEnabled", "FadumpEnabled", "ReservedMemory", "DumpLevel",
+                    "DumpThreads", "Drivers", "KdumpConf", "Capabilities")
+
+# The cached properties of the kdump module that never change
+KDUMP_CONSTANT_PROPERTIES = ("Capabilities",)
+
+# The proxy shared by the spokes
+_kdump_proxy = None
+
+
+class CachedProxy(object):
+    """A DBus proxy that serves the properties from a local cache.
+
+    The properties are loaded by one GetAll call at the first read and
+    kept up to date by the PropertiesChanged signal. Writes go through to
+    the DBus object and update the cached value. Method calls go through
+    to the DBus object and refill the cache by one GetAll call, so the
+    next read returns the values set by the service. The constant
+    properties are never dropped from the cache.
+    """
+
+    def __init__(self, proxy, interface_name, properties, constants=()):
+        """Create a cached proxy.
+
+        :param proxy: a DBus proxy of the object
+        :param interface_name: a name of the DBus interface of the properties
+        :param properties: a list of names of the cached properties
+        :param constants: a list of names of the cached properties that never change
+        """
+        self.__dict__.update(
+            _proxy=proxy,
+            _interface_name=interface_name,
+            _properties=frozenset(properties),
+            _constants=frozenset(constants),
+            _cache={},
+            _loaded=False,
+            hits=0,
+            misses=0,
+        )
+        proxy.PropertiesChanged.connect(self._on_properties_changed)
+
+    def _on_properties_changed(self, interface, changed, invalid):
+        if interface != self._interface_name:
+            return
+
+        for name, value in changed.items():
+            if name in self._properties and self._loaded:
+                self._cache[name] = unwrap_variant(value)
+
+        for name in invalid:
+            if name not in self._constants:
+                self._cache.pop(name, None)
+
+    def invalidate(self):
+        """Drop the cached properties except for the constant ones."""
+        self.__dict__["_loaded"] = False
+
+        for name in list(self._cache):
+            if name not in self._constants:
+                del self._cache[name]
+
+    def _load(self):
+        """Load the cached properties by one GetAll call."""
+        self.__dict__["misses"] += 1
+        values = self._proxy.GetAll(self._interface_name)
+
+        for name in self._properties:
+            if name in self._constants and name in self._cache:
+                continue
+
+            if name in values:
+                self._cache[name] = unwrap_variant(values[name])
+
+        self.__dict__["_loaded"] = True
+
+    def __getattr__(self, name):
+        if name in self._properties:
+            if name in self._cache:
+                self.__dict__["hits"] += 1
+            elif not self._loaded:
+                self._load()
+            else:
+                # Read again a property invalidated by the service.
+                self.__dict__["misses"] += 1
+                self._cache[name] = getattr(self._proxy, name)
+
+            return self._cache[name]
+
+        member = getattr(self._proxy, name)
+
+        # Return the signals and other attributes as they are.
+        if not callable(member) or isinstance(member, Signal):
+            return member
+
+        def call(*args, **kwargs):
+            try:
+                return member(*args, **kwargs)
+            finally:
+                # The call might have changed the properties.
+                if self._loaded:
+                    self._load()
+
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._proxy, name, value)
+
+        # The service may adjust the value, it reports the
+        # adjusted value by the PropertiesChanged signal.
+        if name in self._properties and self._loaded:
+            self._cache[name] = value
+
+
+def get_kdump_proxy():
+    """Return the cached proxy of the kdump module shared by the spokes.
+
+    :return: an instance of CachedProxy
+    """
+    global _kdump_proxy
+
+    if _kdump_proxy is None:
+        _kdump_proxy = CachedProxy(
+            KDUMP.get_proxy(), KDUMP.interface_name, KDUMP_PROPERTIES, KDUMP_CONSTANT_PROPERTIES
+        )
+
+    return _kdump_proxy
@@ -0,0 +1,207 @@
+#
+# Copyright (C) 2026 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+"""The rules of the kdump reservation.
+
+The rules give the bounds and the recommended size of the reservation
+from the total memory and the arch. The defaults can be overridden by
+the operator in RESERVATION_RULES_FILE.
+"""
+import bisect
+import configparser
+import fnmatch
+import logging
+
+from com_redhat_kdump.crashkernel import get_reserved_memory, get_reservation
+
+__all__ = ["loadReservationRules", "getReservationRules", "computeMemoryBounds",
+           "computeRecommendedMemory", "clampReservedMemory", "checkReservedMemory"]
+
+log = logging.getLogger(__name__)
+
+# The operator's reservation rules, see DEFAULT_RESERVATION_RULES
+RESERVATION_RULES_FILE = "/etc/kdump-anaconda-addon/reservation.conf"
+
+# The reservation rules in MB, the sections are matched with the arch and
+# the DEFAULT section applies to all of them.
+#   lower, min_usable, step: the bounds of the reservation
+#   tiers: the recommended reservation from the given total memory on
+#   per_cpu_kb: the extra KB per CPU
+#   page_size_64k: the extra reservation for kernels with 64K pages
+#   drivers: the extra reservation for the given storage and network drivers
+DEFAULT_RESERVATION_RULES = """
+[DEFAULT]
+lower = 160
+min_usable = 512
+step = 1
+tiers = 0:192 4096:256 65536:512
+per_cpu_kb = 0
+page_size_64k = 0
+drivers =
+
+[ppc64*]
+lower = 384
+min_usable = 1024
+tiers = 0:384 4096:512 16384:1024 65536:2048 131072:4096
+
+[aarch64]
+lower = 512
+tiers = 0:256 4096:320 65536:576
+page_size_64k = 100
+drivers = mlx5_core:150
+"""
+
+_reservationRules = None
+_archRules = {}
+def loadReservationRules(path=RESERVATION_RULES_FILE):
+    """Load the reservation rules.
+
+       The rules from the given file override the default rules.
+    """
+    global _reservationRules
+    _archRules.clear()
+
+    parser = configparser.ConfigParser()
+    parser.read_string(DEFAULT_RESERVATION_RULES)
+
+    if path and parser.read(path):
+        log.debug("Loaded the reservation rules from %s.", path)
+
+    _reservationRules = parser
+    return parser
+
+def _parsePairs(value):
+    """Parse a string of name:number pairs."""
+    pairs = []
+
+    for item in value.split():
+        name, number = item.rsplit(":", 1)
+        pairs.append((name, int(number)))
+
+    return pairs
+
+def getReservationRules(arch):
+    """Return a dictionary of the reservation rules for the given arch."""
+    if _reservationRules is not None and arch in _archRules:
+        return _archRules[arch]
+
+    parser = _reservationRules if _reservationRules is not None else loadReservationRules()
+    section = parser.defaults()
+
+    for name in parser.sections():
+        if fnmatch.fnmatch(arch, name):
+            section = parser[name]
+            break
+
+    rules = _archRules[arch] = {
+        "lower": int(section["lower"]),
+        "min_usable": int(section["min_usable"]),
+        "step": int(section["step"]),
+        "tiers": sorted((int(total), mb) for total, mb in _parsePairs(section["tiers"])),
+        "per_cpu_kb": int(section["per_cpu_kb"]),
+        "page_size_64k": int(section["page_size_64k"]),
+        "drivers": dict(_parsePairs(section["drivers"])),
+    }
+    return rules
+
+def computeMemoryBounds(totalMemory, arch):
+    """Return a tuple of (lower, upper, step) for the given memory and arch.
+
+       If there is not enough memory available to use kdump, both lower and
+       upper will be 0.
+    """
+    rules = getReservationRules(arch)
+    lowerBound = rules["lower"]
+    minUsable = rules["min_usable"]
+    step = rules["step"]
+
+    upperBound = (totalMemory - minUsable) - (totalMemory % step)
+
+    if upperBound < lowerBound:
+        upperBound = lowerBound = 0
+
+    return (lowerBound, upperBound, step)
+
+def computeRecommendedMemory(totalMemory, arch, cpus=1, pageSize=4096, drivers=()):
+    """Return the recommended kdump reservation in MB.
+
+       The reservation is given by the tier of the total memory, increased
+       for the CPUs, the page size and the drivers, and kept in the bounds.
+    """
+    lowerBound, upperBound, step = computeMemoryBounds(totalMemory, arch)
+
+    if not upperBound:
+        return 0
+
+    rules = getReservationRules(arch)
+    tiers = rules["tiers"]
+
+    index = bisect.bisect_right([total for total, _mb in tiers], totalMemory) - 1
+    recommended = tiers[max(index, 0)][1] if tiers else lowerBound
+    recommended += -(-rules["per_cpu_kb"] * cpus // 1024)
+
+    if pageSize >= 65536:
+        recommended += rules["page_size_64k"]
+
+    for driver in set(drivers):
+        recommended += rules["drivers"].get(driver, 0)
+
+    # Round up to the step.
+    recommended += -recommended % step
+
+    return min(max(recommended, lowerBound), upperBound)
+
+def clampReservedMemory(value, lowerBound, upperBound):
+    """Keep a number of MB in the kdump reservation limits.
+
+       Other values are returned as they are.
+    """
+    if value.isdigit():
+        if int(value) > upperBound:
+            value = str(int(upperBound))
+        if int(value) < lowerBound:
+            value = str(int(lowerBound))
+    return value
+
+def checkReservedMemory(value, totalMemory, arch):
+    """Check the reserved memory against the kdump reservation limits.
+
+       The value is auto, a number of MB, a crashkernel range table or
+       a map of arch patterns, see crashkernel.parse_reserved_memory.
+
+       Return a message describing the problem or None if the value fits.
+    """
+    try:
+        entry = get_reserved_memory(value, arch)
+        reservation = get_reservation(value, arch, totalMemory)
+    except ValueError as e:
+        return "Invalid value '%s': %s" % (value, e)
+
+    if entry is None:
+        return "No reservation is specified for %s" % arch
+
+    if reservation is None:
+        return None
+
+    lowerBound, upperBound, _step = computeMemoryBounds(totalMemory, arch)
+
+    if not lowerBound <= reservation <= upperBound:
+        return "The reservation of %d MB is out of bounds (%d - %d MB)" % (
+            reservation, lowerBound, upperBound
+        )
+
+    return None
@@ -16,6 +16,10 @@
 # Red Hat, Inc.
 #
 
+# Measure the time to the publication of the service.
+import time
+start_time = time.monotonic()
+
 # Initialize the service.
 from pyanaconda.modules.common import init
 init()
@@ -26,5 +30,5 @@ check_initial_conditions()
 
 # Start the service.
 from com_redhat_kdump.service.kdump import KdumpService
-service = KdumpService()
+service = KdumpService(start_time=start_time)
 service.run()
@@ -15,34 +15,168 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
+import glob
 import logging
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
 from pyanaconda.core import util
-from pyanaconda.modules.common.constants.objects import BOOTLOADER
-from pyanaconda.modules.common.constants.services import STORAGE, PAYLOADS
+from pyanaconda.modules.common.constants.objects import BOOTLOADER, DEVICE_TREE
+from pyanaconda.modules.common.constants.services import STORAGE
 from pyanaconda.modules.common.task import Task
-from pyanaconda.modules.payloads.payload.dnf.utils import get_kernel_version_list
 
-from com_redhat_kdump.constants import FADUMP_CAPABLE_FILE
-from com_redhat_kdump.common import getLuksDevices
+from com_redhat_kdump.constants import KDUMP_CONF_FILE, KDUMP_SYSCONFIG_FILE, \
+    KERNEL_MODULES_DIR, KERNEL_IMAGE_FILE, KDUMP_INITRAMFS_FILE, MAX_INITRAMFS_BUILDS
+from com_redhat_kdump.common import getTargetModules, getDeviceModules, estimateModulesSaving, \
+    memoryProbe
+from com_redhat_kdump.crashkernel import get_kernel_arguments
+from com_redhat_kdump.codec import parse_codecs, get_codec, set_codec, generate_pages, \
+    benchmark_codecs, choose_codec
+from com_redhat_kdump.dump_level import DEFAULT_CORE_COLLECTOR, get_dump_level, set_dump_level, \
+    set_dump_threads
+from com_redhat_kdump.kdump_conf import read_directives, merge_kdump_conf, set_nr_cpus, \
+    write_file_atomically
+from com_redhat_kdump.tracing import tracer, read_spans
 
 log = logging.getLogger(__name__)
 
-__all__ = ["KdumpBootloaderConfigurationTask", "KdumpInstallationTask"]
+__all__ = ["KdumpBootloaderConfigurationTask", "KdumpInstallationTask", "KdumpConfigurationTask",
+           "KdumpCodecSelectionTask", "KdumpDriversTask", "KdumpKernelArgumentsTask",
+           "KdumpInitramfsTask", "KdumpTracingTask"]
+
+
+class DefaultCrashkernel(object):
+    """The default crashkernel values provided by kdumpctl.
+
+    The values are resolved per dump mode and kernel version by kdumpctl
+    of the installed system or of the installer, which apply the arch
+    and hardware specific adjustments. The values are kept by the
+    instance, so every kernel is resolved once per task.
+    """
+
+    def __init__(self, sysroot):
+        """Create a cache of the default values.
+
+        :param sysroot: a path to the root of the installed system
+        """
+        self._sysroot = sysroot
+        self._values = {}
+        self._installer_values = {}
+
+    def get(self, dump_mode, kernel_version=None):
+        """Return the default crashkernel value.
+
+        If kdumpctl of the installed system can't resolve the value, the
+        value of the installer kdumpctl is returned. The installer doesn't
+        have the files of the installed kernels, so its value is resolved
+        without the kernel version and kept apart from the values of the
+        kernels.
+
+        :param dump_mode: kdump or fadump
+        :param kernel_version: a kernel version or None for the default kernel
+        :return: a crashkernel value or None
+        """
+        key = (dump_mode, kernel_version)
+
+        if key not in self._values:
+            self._values[key] = self._resolve(dump_mode, kernel_version)
+
+        if self._values[key]:
+            return self._values[key]
+
+        if dump_mode not in self._installer_values:
+            self._installer_values[dump_mode] = self._resolve_installer(dump_mode)
+
+        return self._installer_values[dump_mode]
+
+    def get_all(self, dump_mode, kernel_versions, max_workers=8):
+        """Return the default crashkernel values of the given kernels.
+
+        The kernels are resolved concurrently.
+
+        :param dump_mode: kdump or fadump
+        :param kernel_versions: a list of kernel versions
+        :param max_workers: a maximal number of kdumpctl processes at once
+        :return: a dictionary of kernel versions and crashkernel values or None
+        """
+        if not kernel_versions:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(kernel_versions))) as executor:
+            values = executor.map(lambda version: self.get(dump_mode, version), kernel_versions)
+            return dict(zip(kernel_versions, values))
+
+    def _resolve(self, dump_mode, kernel_version):
+        argv = ['get-default-crashkernel', dump_mode]
+
+        if kernel_version:
+            argv.append(kernel_version)
+
+        try:
+            with tracer.span("execWithCapture", command="kdumpctl get-default-crashkernel"):
+                ck_val = util.execWithCapture(command='kdumpctl', argv=argv,
+                                              root=self._sysroot, filter_stderr=True)
+        except FileNotFoundError:
+            log.warning("Can't retrieve the default crashkernel value from "
+                        "the installed kdump-utils, try to retrieve it from "
+                        "the installer kdump-utils")
+            return None
+
+        return self._strip(ck_val)
+
+    def _resolve_installer(self, dump_mode):
+        # If the installer doesn't have kdumpctl, the target system's
+        # kdumpctl i.e. /mnt/sysimage/bin/kdumpctl would be used again. To
+        # prevent this, exeplicty ask for the installer's kdumpctl
+        try:
+            with tracer.span("execWithCapture", command="/usr/bin/kdumpctl get-default-crashkernel"):
+                ck_val = util.execWithCapture(command='/usr/bin/kdumpctl',
+                                              argv=['get-default-crashkernel', dump_mode],
+                                              filter_stderr=True)
+        except FileNotFoundError:
+            log.warning("Can't retrieve the default crashkernel value "
+                        "from installer kdump-utils either because it's "
+                        "not installed")
+            return None
+
+        return self._strip(ck_val)
+
+    @staticmethod
+    def _strip(ck_val):
+        if ck_val:
+            # remove the trailing newline otherwise installing bootloader would
+            # fail
+            return ck_val.rstrip()
+
+        return None
+
+
+def get_installed_kernels(root):
+    """Return the versions of the kernels installed in the system.
+
+    :param root: a path to the root of the system
+    :return: a sorted list of kernel versions
+    """
+    pattern = os.path.join(root, KERNEL_MODULES_DIR.lstrip("/"), "*", "vmlinuz")
+    return sorted(os.path.basename(os.path.dirname(path)) for path in glob.glob(pattern))
 
 
 class KdumpBootloaderConfigurationTask(Task):
     """The bootloader configuration task for kdump and fadump"""
 
-    def __init__(self, sysroot, kdump_enabled, fadump_enabled, reserved_memory):
+    def __init__(self, sysroot, kdump_enabled, fadump_enabled, reserved_memory, fadump_capable=False,
+                 dump_threads=0, kernels=None, default_crashkernel=None):
         """Create a task."""
         super().__init__()
         self._sysroot = sysroot
+        self._kernels = kernels or []
         self._kdump_enabled = kdump_enabled
         self._fadump_enabled = fadump_enabled
+        self._fadump_capable = fadump_capable
         self._reserved_memory = reserved_memory
+        self._dump_threads = dump_threads
+        self._default_crashkernel = default_crashkernel or DefaultCrashkernel(sysroot)
 
     @property
     def name(self):
@@ -53,40 +187,17 @@ class KdumpBootloaderConfigurationTask(Task):
         if fadump_enabled:
             dump_mode = 'fadump'
 
-        args = {'command': 'kdumpctl',
-                'argv': ['get-default-crashkernel', dump_mode],
-                'root': self._sysroot,
-                'filter_stderr': True}
-
-        ck_val = None
-        try:
-            ck_val = util.execWithCapture(**args)
-        except FileNotFoundError:
-            log.warning("Can't retrieve the default crashkernel value from "
-                        "the installed kdump-utils, try to retrieve it from "
-                        "the installer kdump-utils")
+        # The installed kernels can share one value. Otherwise the value
+        # of every kernel is set by KdumpKernelArgumentsTask.
+        if self._kernels:
+            values = set(self._default_crashkernel.get_all(dump_mode, self._kernels).values())
 
-        if not ck_val:
-            del args['root']
-            # If the installer doesn't have kdumpctl, the target system's
-            # kdumpctl i.e. /mnt/sysimage/bin/kdumpctl would be used again. To
-            # prevent this, exeplicty ask for the installer's kdumpctl
-            args['command'] = '/usr/bin/kdumpctl'
-            try:
-                ck_val = util.execWithCapture(**args)
-            except FileNotFoundError:
-                log.warning("Can't retrieve the default crashkernel value "
-                            "from installer kdump-utils either because it's "
-                            "not installed")
-                pass
+            if len(values) == 1 and None not in values:
+                return values.pop()
 
-        if ck_val:
-            # remove the trailing newline otherwise installing bootloader would
-            # fail
-            return ck_val.rstrip()
-
-        return None
+        return self._default_crashkernel.get(dump_mode)
 
+    @tracer.traced("KdumpBootloaderConfigurationTask.run")
     def run(self):
         """Run the task."""
         # Update the bootloader arguments.
@@ -98,28 +209,15 @@ class KdumpBootloaderConfigurationTask(Task):
             if not arg.startswith('crashkernel=')
         ]
 
-        # Enable fadump.
-        if self._fadump_enabled and os.path.exists(FADUMP_CAPABLE_FILE):
-            args.append('fadump=on')
-
-        # Set crashkernel argument
-        if self._kdump_enabled:
-            if self._reserved_memory == 'auto':
-                ck_arg = None
-                ck_val = self.get_default_crashkernel(self._fadump_enabled)
-                if ck_val:
-                    ck_arg = 'crashkernel=%s' % ck_val
-                else:
-                    log.error("Can't retrieve the default crashkernel, will set crashkernel=auto.")
-                    ck_arg = 'crashkernel=auto'
-
-            else:
-                # Ensure that the amount is an amount in MB.
-                if self._reserved_memory[-1] != 'M':
-                    self._reserved_memory += 'M'
-                ck_arg = 'crashkernel=%s' % self._reserved_memory
-
-            args.append(ck_arg)
+        args.extend(get_kernel_arguments(
+            kdump_enabled=self._kdump_enabled,
+            fadump_enabled=self._fadump_enabled,
+            fadump_capable=self._fadump_capable,
+            reserved_memory=self._reserved_memory,
+            arch=memoryProbe.arch,
+            get_default=lambda: self.get_default_crashkernel(self._fadump_enabled),
+            dump_threads=self._dump_threads
+        ))
 
         bootloader_proxy.ExtraArguments = args
 
@@ -152,8 +250,407 @@ class KdumpInstallationTask(Task):
             log.debug("kdump.serivce will be disabled.")
             systemctl_action = "disable"
 
-        util.execWithRedirect(
-            "systemctl",
-            [systemctl_action, "kdump.service"],
-            root=self._sysroot
-        )
+        with tracer.span("execWithRedirect", command="systemctl " + systemctl_action) as span:
+            rc = util.execWithRedirect(
+                "systemctl",
+                [systemctl_action, "kdump.service"],
+                root=self._sysroot
+            )
+            span.set("rc", rc)
+
+
+class KdumpConfigurationTask(Task):
+    """The installation task for the configuration of kdump."""
+
+    def __init__(self, sysroot, kdump_conf, dump_level=-1, dump_threads=0):
+        """Create a task.
+
+        :param sysroot: a path to the root of the installed system
+        :param kdump_conf: a dictionary of directives of kdump.conf
+        :param dump_level: a dump level of makedumpfile or -1
+        :param dump_threads: a number of makedumpfile threads
+        """
+        super().__init__()
+        self._sysroot = sysroot
+        self._kdump_conf = kdump_conf
+        self._dump_level = dump_level
+        self._dump_threads = dump_threads
+
+    @property
+    def name(self):
+        return "Configure kdump"
+
+    def run(self):
+        """Run the task."""
+        path = os.path.join(self._sysroot, KDUMP_CONF_FILE.lstrip("/"))
+
+        try:
+            with open(path, "r") as f:
+                text = f.read()
+        except FileNotFoundError:
+            log.warning("%s doesn't exist, it will be created.", path)
+            text = ""
+
+        directives = dict(self._kdump_conf)
+
+        if self._dump_level != -1 or self._dump_threads:
+            collector = directives.get("core_collector") \
+                or read_directives(text).get("core_collector") \
+                or DEFAULT_CORE_COLLECTOR
+
+        if self._dump_level != -1:
+            collector = set_dump_level(collector, self._dump_level)
+
+            if get_dump_level(collector) != self._dump_level:
+                log.warning("The dump level can't be set for '%s'.", collector)
+
+            directives["core_collector"] = collector
+
+        if self._dump_threads:
+            directives["core_collector"] = set_dump_threads(collector, self._dump_threads)
+            self._set_nr_cpus(self._dump_threads + 1)
+
+        write_file_atomically(path, merge_kdump_conf(text, directives))
+        log.debug("Merged directives %s into %s.", directives, path)
+
+    def _set_nr_cpus(self, cpus):
+        """Set the number of CPUs of the capture kernel."""
+        path = os.path.join(self._sysroot, KDUMP_SYSCONFIG_FILE.lstrip("/"))
+
+        try:
+            with open(path, "r") as f:
+                text = f.read()
+        except FileNotFoundError:
+            log.warning("%s doesn't exist, it will be created.", path)
+            text = ""
+
+        write_file_atomically(path, set_nr_cpus(text, cpus))
+        log.debug("The capture kernel will use %d CPUs.", cpus)
+
+
+class KdumpCodecSelectionTask(Task):
+    """The installation task for the selection of the makedumpfile codec."""
+
+    def __init__(self, sysroot):
+        """Create a task.
+
+        :param sysroot: a path to the root of the installed system
+        """
+        super().__init__()
+        self._sysroot = sysroot
+
+    @property
+    def name(self):
+        return "Select the fastest makedumpfile codec"
+
+    def get_supported_codecs(self):
+        """Return the codecs supported by makedumpfile of the installed system.
+
+        :return: a set of codec names or None if they can't be detected
+        """
+        try:
+            with tracer.span("execWithCapture", command="makedumpfile -v"):
+                output = util.execWithCapture("makedumpfile", ["-v"], root=self._sysroot)
+        except FileNotFoundError:
+            log.warning("makedumpfile is not installed, can't detect the supported codecs.")
+            return None
+
+        return parse_codecs(output)
+
+    def run(self):
+        """Run the task."""
+        path = os.path.join(self._sysroot, KDUMP_CONF_FILE.lstrip("/"))
+
+        try:
+            with open(path, "r") as f:
+                text = f.read()
+        except FileNotFoundError:
+            log.debug("%s doesn't exist, skip the selection of the codec.", path)
+            return
+
+        collector = read_directives(text).get("core_collector", "")
+        current = get_codec(collector)
+
+        # Keep a collector that doesn't compress.
+        if current is None:
+            log.debug("The core collector '%s' doesn't compress, keep it.", collector)
+            return
+
+        codecs = self.get_supported_codecs()
+
+        if codecs is None:
+            return
+
+        log.debug("The makedumpfile codecs %s are supported.", ", ".join(sorted(codecs)))
+
+        with tracer.span("benchmark_codecs"):
+            results = benchmark_codecs(sorted(codecs), generate_pages())
+
+        for codec, (throughput, ratio) in sorted(results.items()):
+            log.info("The %s codec compresses %.1f MB/s with the ratio %.2f.",
+                     codec, throughput, ratio)
+
+        best = choose_codec(codecs, results, current)
+
+        if best == current:
+            log.debug("The %s codec is the fastest one, keep '%s'.", current, collector)
+            return
+
+        collector = set_codec(collector, best)
+        write_file_atomically(path, merge_kdump_conf(text, {"core_collector": collector}))
+        log.info("The core collector is set to '%s'.", collector)
+
+
+class KdumpDriversTask(Task):
+    """The installation task for the drivers of the kdump initramfs."""
+
+    def __init__(self, sysroot, omit_drivers=False):
+        """Create a task.
+
+        The modules of the path to the local dump target are added to the
+        kdump initramfs. If requested, the other modules of the block and
+        network devices are omitted, unless the modules of some device of
+        the path are unknown.
+
+        :param sysroot: a path to the root of the installed system
+        :param omit_drivers: omit the other modules of the devices?
+        """
+        super().__init__()
+        self._sysroot = sysroot
+        self._omit_drivers = omit_drivers
+
+    @property
+    def name(self):
+        return "Select the drivers of the kdump initramfs"
+
+    @staticmethod
+    def get_dracut_args(required, omitted):
+        """Return the dracut arguments for the given modules."""
+        args = '--add-drivers "{}"'.format(" ".join(sorted(required)))
+
+        if omitted:
+            args += ' --omit-drivers "{}"'.format(" ".join(sorted(omitted)))
+
+        return args
+
+    def run(self):
+        """Run the task."""
+        path = os.path.join(self._sysroot, KDUMP_CONF_FILE.lstrip("/"))
+
+        try:
+            with open(path, "r") as f:
+                text = f.read()
+        except FileNotFoundError:
+            log.debug("%s doesn't exist, skip the selection of the drivers.", path)
+            return
+
+        directives = read_directives(text)
+        device_tree = tracer.trace_proxy(STORAGE.get_proxy(DEVICE_TREE), "DeviceTree")
+        unknown = []
+        required = getTargetModules(device_tree, directives, unknown=unknown)
+
+        if not required:
+            log.debug("The modules of the dump target are unknown, keep the drivers.")
+            return
+
+        omitted = set()
+
+        if self._omit_drivers and unknown:
+            log.warning("The modules of %s are unknown, keep the other drivers.",
+                        ", ".join(sorted(unknown)))
+        elif self._omit_drivers:
+            omitted = getDeviceModules() - required
+
+        args = self.get_dracut_args(required, omitted)
+
+        if directives.get("dracut_args"):
+            args = directives["dracut_args"] + " " + args
+
+        write_file_atomically(path, merge_kdump_conf(text, {"dracut_args": args}))
+        log.debug("The dracut arguments are set to '%s'.", args)
+
+        if not omitted:
+            return
+
+        saving = estimateModulesSaving(omitted, memoryProbe.arch)
+        log.info("The kdump initramfs omits %d modules, the estimated memory saving is %.1f MB.",
+                 len(omitted), saving)
+
+
+class KdumpKernelArgumentsTask(Task):
+    """The installation task for the crashkernel values of the boot entries."""
+
+    def __init__(self, sysroot, reserved_memory, fadump_enabled=False, fadump_capable=False,
+                 dump_threads=0, kernels=None, default_crashkernel=None):
+        """Create a task.
+
+        The bootloader sets one crashkernel value for all boot entries.
+        If the kernels of the bootloader have different default values,
+        the value of every kernel is set in its boot entry.
+
+        :param sysroot: a path to the root of the installed system
+        :param reserved_memory: a string with the reserved memory
+        :param fadump_enabled: is fadump enabled?
+        :param fadump_capable: does the system support fadump?
+        :param dump_threads: a number of makedumpfile threads
+        :param kernels: a list of kernel versions of the bootloader
+        :param default_crashkernel: an instance of DefaultCrashkernel or None
+        """
+        super().__init__()
+        self._sysroot = sysroot
+        self._reserved_memory = reserved_memory
+        self._fadump_enabled = fadump_enabled
+        self._fadump_capable = fadump_capable
+        self._dump_threads = dump_threads
+        self._kernels = kernels if kernels is not None else []
+        self._default_crashkernel = default_crashkernel or DefaultCrashkernel(sysroot)
+
+    @property
+    def name(self):
+        return "Configure the crashkernel value of every kernel"
+
+    def get_kernel_arguments(self):
+        """Return the crashkernel arguments of the kernels of the bootloader.
+
+        :return: a dictionary of kernel versions and crashkernel arguments
+        """
+        dump_mode = 'fadump' if self._fadump_enabled else 'kdump'
+        values = self._default_crashkernel.get_all(dump_mode, self._kernels)
+        arguments = {}
+
+        for kernel_version, value in values.items():
+            if not value:
+                continue
+
+            args = get_kernel_arguments(
+                kdump_enabled=True,
+                fadump_enabled=self._fadump_enabled,
+                fadump_capable=self._fadump_capable,
+                reserved_memory=self._reserved_memory,
+                arch=memoryProbe.arch,
+                get_default=lambda value=value: value,
+                dump_threads=self._dump_threads
+            )
+            arguments[kernel_version] = args[-1]
+
+        return arguments
+
+    def run(self):
+        """Run the task."""
+        arguments = self.get_kernel_arguments()
+
+        # The bootloader has already set the shared value.
+        if len(set(arguments.values())) < 2:
+            log.debug("The kernels share the crashkernel value, skip the boot entries.")
+            return
+
+        for kernel_version, argument in sorted(arguments.items()):
+            with tracer.span("execWithRedirect", command="grubby " + kernel_version) as span:
+                rc = util.execWithRedirect(
+                    "grubby",
+                    ["--update-kernel=" + KERNEL_IMAGE_FILE.format(kernel_version),
+                     "--args=" + argument],
+                    root=self._sysroot
+                )
+                span.set("rc", rc)
+
+            if rc != 0:
+                log.warning("Can't set %s for the kernel %s.", argument, kernel_version)
+                continue
+
+            log.debug("Set %s for the kernel %s.", argument, kernel_version)
+
+
+class KdumpInitramfsTask(Task):
+    """The installation task for the build of the kdump initramfs."""
+
+    def __init__(self, sysroot, max_builds=MAX_INITRAMFS_BUILDS):
+        """Create a task.
+
+        The images are built after the configuration of kdump, so they
+        are newer than the configuration files and kdumpctl doesn't
+        rebuild them on the first boot.
+
+        :param sysroot: a path to the root of the installed system
+        :param max_builds: a maximal number of images built at once
+        """
+        super().__init__()
+        self._sysroot = sysroot
+        self._max_builds = max_builds
+
+    @property
+    def name(self):
+        return "Build the kdump initramfs"
+
+    def build_initramfs(self, kernel_version):
+        """Build the kdump initramfs of the given kernel.
+
+        :param kernel_version: a kernel version
+        :return: True if the image is built, otherwise False
+        """
+        image = KDUMP_INITRAMFS_FILE.format(kernel_version)
+
+        try:
+            with tracer.span("execWithRedirect", command="mkdumprd " + kernel_version) as span:
+                rc = util.execWithRedirect(
+                    "mkdumprd",
+                    ["-f", image, kernel_version],
+                    root=self._sysroot
+                )
+                span.set("rc", rc)
+        except FileNotFoundError:
+            log.warning("mkdumprd is not installed, the kdump initramfs will be built "
+                        "on the first boot.")
+            return False
+
+        if rc != 0:
+            log.warning("Can't build %s, it will be built on the first boot.", image)
+            return False
+
+        log.debug("Built %s.", image)
+        return True
+
+    def run(self):
+        """Run the task."""
+        kernels = get_installed_kernels(self._sysroot)
+
+        if not kernels:
+            log.debug("No kernels are installed, skip the build of the kdump initramfs.")
+            return
+
+        # The images are built by independent dracut processes.
+        with ThreadPoolExecutor(max_workers=min(self._max_builds, len(kernels))) as executor:
+            results = list(executor.map(self.build_initramfs, kernels))
+
+        log.debug("Built the kdump initramfs of %d of %d kernels.", sum(results), len(kernels))
+
+
+class KdumpTracingTask(Task):
+    """The installation task for the export of the recorded spans."""
+
+    def __init__(self, path, ui_path=None):
+        """Create a task.
+
+        :param path: a path to the JSON file
+        :param ui_path: a path to the JSON file exported by the UI or None
+        """
+        super().__init__()
+        self._path = path
+        self._ui_path = ui_path
+
+    @property
+    def name(self):
+        return "Write the kdump add-on trace"
+
+    def run(self):
+        """Run the task."""
+        try:
+            ui_spans = read_spans(self._ui_path) if self._ui_path else []
+        except (OSError, ValueError, KeyError) as e:
+            log.warning("Can't read the trace of the UI from %s: %s", self._ui_path, e)
+            ui_spans = []
+
+        try:
+            tracer.write(self._path, ui_spans)
+        except OSError as e:
+            log.warning("Can't write the trace to %s: %s", self._path, e)
@@ -16,19 +16,25 @@
 # Red Hat, Inc.
 #
 import logging
+import os
+import time
+from collections import Counter
 
-from pyanaconda.core.configuration.anaconda import conf
 from pyanaconda.core.dbus import DBus
 from pyanaconda.core.signal import Signal
 from pyanaconda.modules.common.base import KickstartService
 from pyanaconda.modules.common.containers import TaskContainer
-from pyanaconda.modules.common.structures.requirement import Requirement
 
-from com_redhat_kdump.common import getMemoryBounds
-from com_redhat_kdump.constants import KDUMP
-from com_redhat_kdump.service.installation import KdumpBootloaderConfigurationTask, KdumpInstallationTask
+from com_redhat_kdump.common import getMemoryBounds, getTotalMemory, clampReservedMemory, checkReservedMemory, \
+    memoryProbe, probeCapabilities
+from com_redhat_kdump.constants import KDUMP, STARTUP_TIME_TARGET, TRACE_FILE, UI_TRACE_FILE
+from com_redhat_kdump.crashkernel import parse_reserved_memory
+from com_redhat_kdump.dump_level import check_dump_level, check_dump_threads, pick_dump_threads
+from com_redhat_kdump.kdump_conf import check_directives, check_drivers, DRIVERS_ALL, \
+    DRIVERS_MINIMAL
+from com_redhat_kdump.structures import KdumpConfiguration
+from com_redhat_kdump.tracing import tracer
 from com_redhat_kdump.service.kdump_interface import KdumpInterface
-from com_redhat_kdump.service.kickstart import KdumpKickstartSpecification
 
 log = logging.getLogger(__name__)
 
@@ -38,9 +44,17 @@ __all__ = ["KdumpService"]
 class KdumpService(KickstartService):
     """The implementation of the Kdump service."""
 
-    def __init__(self):
-        """Create a service."""
+    def __init__(self, start_time=None):
+        """Create a service.
+
+        The memory bounds are probed and the modules of the installation
+        and kickstart support are imported on the first use, so the service
+        can be published as soon as possible.
+
+        :param start_time: a monotonic time of the start of the service or None
+        """
         super().__init__()
+        self._start_time = start_time if start_time is not None else time.monotonic()
         self._kdump_enabled = False
         self.kdump_enabled_changed = Signal()
 
@@ -49,7 +63,27 @@ class KdumpService(KickstartService):
 
         self._reserved_memory = "auto"
         self.reserved_memory_changed = Signal()
-        self._lower, self._upper, self._step = getMemoryBounds()
+        self._dump_level = -1
+        self.dump_level_changed = Signal()
+        self._dump_threads = 0
+        self.dump_threads_changed = Signal()
+        self._drivers = DRIVERS_ALL
+        self.drivers_changed = Signal()
+        self._kdump_conf = {}
+        self.kdump_conf_changed = Signal()
+
+        self.tracing_enabled_changed = Signal()
+
+        self._memory_bounds = None
+        self._capabilities = None
+
+        # The kernels of the bootloader are shared with the installation
+        # tasks, which can be collected before the bootloader tasks.
+        self._kernels = []
+        self._default_crashkernel = None
+
+        # The number of emitted signals per property
+        self.emission_counts = Counter()
 
     def publish(self):
         """Publish the DBus objects."""
@@ -57,6 +91,13 @@ class KdumpService(KickstartService):
         DBus.publish_object(KDUMP.object_path, KdumpInterface(self))
         DBus.register_service(KDUMP.service_name)
 
+        startup_time = time.monotonic() - self._start_time
+        log.debug("The kdump service is published in %.3f s.", startup_time)
+
+        if startup_time > STARTUP_TIME_TARGET:
+            log.warning("The startup of the kdump service took %.3f s, the target is %.3f s.",
+                        startup_time, STARTUP_TIME_TARGET)
+
     @property
     def kdump_enabled(self):
         """Is kdump enabled?"""
@@ -64,8 +105,11 @@ class KdumpService(KickstartService):
 
     @kdump_enabled.setter
     def kdump_enabled(self, value):
+        if value == self._kdump_enabled:
+            return
+
         self._kdump_enabled = value
-        self.kdump_enabled_changed.emit()
+        self._emit_changed("kdump_enabled")
         log.debug("Kdump enabled is set to '%s'.", value)
 
     @property
@@ -75,16 +119,152 @@ class KdumpService(KickstartService):
 
     @fadump_enabled.setter
     def fadump_enabled(self, value):
+        if value == self._fadump_enabled:
+            return
+
         self._fadump_enabled = value
-        self.fadump_enabled_changed.emit()
+        self._emit_changed("fadump_enabled")
         log.debug("Fadump enabled is set to '%s'.", value)
 
+    @property
+    def dump_level(self):
+        """The dump level of makedumpfile or -1 to keep the default."""
+        return self._dump_level
+
+    @dump_level.setter
+    def dump_level(self, value):
+        if value == self._dump_level:
+            return
+
+        # Raise ValueError for invalid levels.
+        if value != -1:
+            check_dump_level(value)
+
+        self._dump_level = value
+        self._emit_changed("dump_level")
+        log.debug("Dump level is set to '%s'.", value)
+
+    @property
+    def dump_threads(self):
+        """The number of makedumpfile threads, 0 for none or -1 to pick it."""
+        return self._dump_threads
+
+    @dump_threads.setter
+    def dump_threads(self, value):
+        if value == self._dump_threads:
+            return
+
+        # Raise ValueError for invalid numbers.
+        if value != -1:
+            check_dump_threads(value)
+
+        self._dump_threads = value
+        self._emit_changed("dump_threads")
+        log.debug("Dump threads are set to '%s'.", value)
+
+    def get_dump_threads(self):
+        """Return the number of makedumpfile threads for this system."""
+        if self.fadump_enabled and self.capabilities.fadump:
+            return 0
+
+        if self.dump_threads == -1:
+            return pick_dump_threads(os.cpu_count())
+
+        return self.dump_threads
+
+    @property
+    def drivers(self):
+        """The drivers of the kdump initramfs: all, target or minimal."""
+        return self._drivers
+
+    @drivers.setter
+    def drivers(self, value):
+        if value == self._drivers:
+            return
+
+        # Raise ValueError for invalid selections.
+        check_drivers(value)
+
+        self._drivers = value
+        self._emit_changed("drivers")
+        log.debug("Drivers are set to '%s'.", value)
+
+    @property
+    def kdump_conf(self):
+        """The directives of kdump.conf."""
+        return self._kdump_conf
+
+    @kdump_conf.setter
+    def kdump_conf(self, value):
+        if value == self._kdump_conf:
+            return
+
+        # Raise ValueError for invalid directives.
+        check_directives(value)
+
+        self._kdump_conf = dict(value)
+        self._emit_changed("kdump_conf")
+        log.debug("Directives of kdump.conf are set to '%s'.", value)
+
+    @property
+    def tracing_enabled(self):
+        """Are the spans of the add-on recorded?"""
+        return tracer.enabled
+
+    @tracing_enabled.setter
+    def tracing_enabled(self, value):
+        if value == tracer.enabled:
+            return
+
+        tracer.enabled = value
+        self._emit_changed("tracing_enabled")
+        log.debug("Tracing enabled is set to '%s'.", value)
+
+    @property
+    def trace_spans(self):
+        """The list of the recorded spans."""
+        return tracer.spans
+
+    @property
+    def memory_bounds(self):
+        """The tuple of (lower, upper, step) of the reservation, probed once."""
+        if self._memory_bounds is None:
+            self._memory_bounds = getMemoryBounds()
+        return self._memory_bounds
+
+    @property
+    def capabilities(self):
+        """The kdump capabilities of the platform, probed once.
+
+        :return: an instance of KdumpCapabilities
+        """
+        if self._capabilities is None:
+            self._capabilities = probeCapabilities()
+        return self._capabilities
+
+    @property
+    def default_crashkernel(self):
+        """The default crashkernel values of the installed system.
+
+        :return: an instance of DefaultCrashkernel
+        """
+        if self._default_crashkernel is None:
+            from pyanaconda.core.configuration.anaconda import conf
+            from com_redhat_kdump.service.installation import DefaultCrashkernel
+            self._default_crashkernel = DefaultCrashkernel(conf.target.system_root)
+        return self._default_crashkernel
+
     def check_reserved_memory(self, value):
-        if value != "auto":
-            if int(value) > self._upper:
-                value = str(int(self._upper))
-            if int(value) < self._lower:
-                value = str(int(self._lower))
+        if value.isdigit():
+            lower, upper, _step = self.memory_bounds
+            value = clampReservedMemory(value, lower, upper)
+        elif value != "auto":
+            # Raise ValueError for invalid values. A range table can't be
+            # clamped, it applies to other systems too.
+            parse_reserved_memory(value)
+            message = checkReservedMemory(value, getTotalMemory(), memoryProbe.arch)
+            if message:
+                log.warning("%s.", message)
         return value
 
     @property
@@ -94,13 +274,83 @@ class KdumpService(KickstartService):
 
     @reserved_memory.setter
     def reserved_memory(self, value):
-        self._reserved_memory = self.check_reserved_memory(value)
-        self.reserved_memory_changed.emit()
+        if value == self._reserved_memory:
+            return
+
+        checked_value = self.check_reserved_memory(value)
+
+        if checked_value == self._reserved_memory:
+            return
+
+        self._reserved_memory = checked_value
+        self._emit_changed("reserved_memory")
         log.debug("Reserved memory is set to '%s'.", value)
 
+    def _emit_changed(self, name):
+        """Emit the changed signal of the given property."""
+        self.emission_counts[name] += 1
+        getattr(self, name + "_changed").emit()
+
+    @property
+    def configuration(self):
+        """The kdump configuration.
+
+        :return: an instance of KdumpConfiguration
+        """
+        configuration = KdumpConfiguration()
+        configuration.kdump_enabled = self.kdump_enabled
+        configuration.fadump_enabled = self.fadump_enabled
+        configuration.reserved_memory = self.reserved_memory
+        configuration.dump_level = self.dump_level
+        configuration.dump_threads = self.dump_threads
+        configuration.drivers = self.drivers
+        configuration.kdump_conf = dict(self.kdump_conf)
+        return configuration
+
+    def set_configuration(self, configuration):
+        """Validate and apply the kdump configuration at once.
+
+        :param configuration: an instance of KdumpConfiguration
+        :raise: ValueError for an invalid reserved memory, dump level,
+                 number of dump threads, drivers or directive of kdump.conf
+        """
+        reserved_memory = configuration.reserved_memory
+
+        if reserved_memory != self._reserved_memory:
+            reserved_memory = self.check_reserved_memory(reserved_memory)
+
+        if configuration.dump_level != -1:
+            check_dump_level(configuration.dump_level)
+
+        if configuration.dump_threads != -1:
+            check_dump_threads(configuration.dump_threads)
+
+        check_drivers(configuration.drivers)
+        check_directives(configuration.kdump_conf)
+
+        values = {
+            "kdump_enabled": configuration.kdump_enabled,
+            "fadump_enabled": configuration.fadump_enabled,
+            "reserved_memory": reserved_memory,
+            "dump_level": configuration.dump_level,
+            "dump_threads": configuration.dump_threads,
+            "drivers": configuration.drivers,
+            "kdump_conf": dict(configuration.kdump_conf),
+        }
+
+        for name, value in values.items():
+            if value == getattr(self, "_" + name):
+                continue
+
+            setattr(self, "_" + name, value)
+            self._emit_changed(name)
+
+        log.debug("Kdump configuration is set to %s.", configuration)
+
     @property
     def kickstart_specification(self):
         """Return the kickstart specification."""
+        from com_redhat_kdump.service.kickstart import KdumpKickstartSpecification
         return KdumpKickstartSpecification
 
     def process_kickstart(self, data):
@@ -108,18 +358,27 @@ class KdumpService(KickstartService):
         self.kdump_enabled = data.addons.com_redhat_kdump.enabled
         self.fadump_enabled = data.addons.com_redhat_kdump.enablefadump
         self.reserved_memory = data.addons.com_redhat_kdump.reserve_mb
+        self.dump_level = data.addons.com_redhat_kdump.dump_level
+        self.dump_threads = data.addons.com_redhat_kdump.dump_threads
+        self.drivers = data.addons.com_redhat_kdump.drivers
+        self.kdump_conf = data.addons.com_redhat_kdump.kdump_conf
 
     def setup_kickstart(self, data):
         """Set the given kickstart data."""
         data.addons.com_redhat_kdump.enabled = self.kdump_enabled
         data.addons.com_redhat_kdump.enablefadump = self.fadump_enabled
         data.addons.com_redhat_kdump.reserve_mb = self.reserved_memory
+        data.addons.com_redhat_kdump.dump_level = self.dump_level
+        data.addons.com_redhat_kdump.dump_threads = self.dump_threads
+        data.addons.com_redhat_kdump.drivers = self.drivers
+        data.addons.com_redhat_kdump.kdump_conf = dict(self.kdump_conf)
 
     def collect_requirements(self):
         """Return installation requirements.
 
         :return: a list of requirements
         """
+        from pyanaconda.modules.common.structures.requirement import Requirement
         requirements = []
 
         if self.kdump_enabled:
@@ -137,19 +396,98 @@ class KdumpService(KickstartService):
 
         :return: a list of tasks
         """
-        return [
+        from pyanaconda.core.configuration.anaconda import conf
+        from com_redhat_kdump.service.installation import KdumpInstallationTask, \
+            KdumpConfigurationTask, KdumpCodecSelectionTask, KdumpDriversTask, \
+            KdumpKernelArgumentsTask, KdumpInitramfsTask, KdumpTracingTask
+
+        tasks = [
             KdumpInstallationTask(
                 sysroot=conf.target.system_root,
                 kdump_enabled=self.kdump_enabled,
             )
         ]
 
+        dump_threads = self.get_dump_threads() if self.kdump_enabled else 0
+
+        if self.kdump_enabled and (self.kdump_conf or self.dump_level != -1 or dump_threads):
+            tasks.append(
+                KdumpConfigurationTask(
+                    sysroot=conf.target.system_root,
+                    kdump_conf=self.kdump_conf,
+                    dump_level=self.dump_level,
+                    dump_threads=dump_threads
+                )
+            )
+
+        # Keep the core collector requested by the kickstart.
+        if self.kdump_enabled and "core_collector" not in self.kdump_conf:
+            tasks.append(
+                KdumpCodecSelectionTask(
+                    sysroot=conf.target.system_root
+                )
+            )
+
+        # Select the drivers only on request and keep the dracut arguments
+        # requested by the kickstart.
+        if self.kdump_enabled and self.drivers != DRIVERS_ALL \
+                and "dracut_args" not in self.kdump_conf:
+            tasks.append(
+                KdumpDriversTask(
+                    sysroot=conf.target.system_root,
+                    omit_drivers=self.drivers == DRIVERS_MINIMAL
+                )
+            )
+
+        # Set the default crashkernel value of every kernel of the bootloader.
+        if self.kdump_enabled:
+            tasks.append(
+                KdumpKernelArgumentsTask(
+                    sysroot=conf.target.system_root,
+                    reserved_memory=self.reserved_memory,
+                    fadump_enabled=self.fadump_enabled,
+                    fadump_capable=self.capabilities.fadump,
+                    dump_threads=dump_threads,
+                    kernels=self._kernels,
+                    default_crashkernel=self.default_crashkernel
+                )
+            )
+
+        # Build the kdump initramfs after its configuration. The fadump
+        # support is built into the default initramfs instead.
+        if self.kdump_enabled and not (self.fadump_enabled and self.capabilities.fadump):
+            tasks.append(
+                KdumpInitramfsTask(
+                    sysroot=conf.target.system_root
+                )
+            )
+
+        # Export the spans of the installation at its end.
+        if self.tracing_enabled:
+            tasks.append(
+                KdumpTracingTask(
+                    path=TRACE_FILE,
+                    ui_path=UI_TRACE_FILE
+                )
+            )
+
+        return tasks
+
     def configure_bootloader_with_tasks(self, kernels):
+        from pyanaconda.core.configuration.anaconda import conf
+        from com_redhat_kdump.service.installation import KdumpBootloaderConfigurationTask
+
+        self._kernels[:] = kernels or []
+
         return [
             KdumpBootloaderConfigurationTask(
                 sysroot=conf.target.system_root,
                 kdump_enabled=self.kdump_enabled,
                 fadump_enabled=self.fadump_enabled,
-                reserved_memory=self.reserved_memory
+                fadump_capable=self.capabilities.fadump,
+                reserved_memory=self.reserved_memory,
+                dump_threads=self.get_dump_threads(),
+                kernels=self._kernels,
+                default_crashkernel=self.default_crashkernel
             )
         ]
@@ -21,6 +21,7 @@ from dasbus.typing import *  # pylint: disable=wildcard-import
 
 from pyanaconda.modules.common.base import KickstartModuleInterface
 from com_redhat_kdump.constants import KDUMP
+from com_redhat_kdump.structures import KdumpConfiguration, KdumpCapabilities, KdumpSpan
 
 __all__ = ["KdumpInterface"]
 
@@ -34,6 +35,11 @@ class KdumpInterface(KickstartModuleInterface):
         self.watch_property("KdumpEnabled", self.implementation.kdump_enabled_changed)
         self.watch_property("FadumpEnabled", self.implementation.fadump_enabled_changed)
         self.watch_property("ReservedMemory", self.implementation.reserved_memory_changed)
+        self.watch_property("KdumpConf", self.implementation.kdump_conf_changed)
+        self.watch_property("DumpLevel", self.implementation.dump_level_changed)
+        self.watch_property("DumpThreads", self.implementation.dump_threads_changed)
+        self.watch_property("Drivers", self.implementation.drivers_changed)
+        self.watch_property("TracingEnabled", self.implementation.tracing_enabled_changed)
 
     @property
     def KdumpEnabled(self) -> Bool:
@@ -73,3 +79,134 @@ class KdumpInterface(KickstartModuleInterface):
     @emits_properties_changed
     def ReservedMemory(self, value: Str):
         self.implementation.reserved_memory = value
+
+    @property
+    def DumpLevel(self) -> Int:
+        """The dump level of makedumpfile.
+
+        The level is set in the core collector of kdump.conf of the
+        installed system.
+
+        :return: a number from 0 to 31 or -1 to keep the default
+        """
+        return self.implementation.dump_level
+
+    @DumpLevel.setter
+    @emits_properties_changed
+    def DumpLevel(self, value: Int):
+        self.implementation.dump_level = value
+
+    @property
+    def DumpThreads(self) -> Int:
+        """The number of makedumpfile threads.
+
+        The capture kernel gets a CPU per thread and the reservation
+        is increased for the threads.
+
+        :return: a number of threads, 0 for none or -1 to pick it
+        """
+        return self.implementation.dump_threads
+
+    @DumpThreads.setter
+    @emits_properties_changed
+    def DumpThreads(self, value: Int):
+        self.implementation.dump_threads = value
+
+    @property
+    def Drivers(self) -> Str:
+        """The drivers of the kdump initramfs.
+
+        With target, the drivers of the path to a local dump target are
+        added to the initramfs. With minimal, the other drivers of the
+        block and network devices are also omitted. With all, the drivers
+        selected by dracut are kept.
+
+        :return: all, target or minimal
+        """
+        return self.implementation.drivers
+
+    @Drivers.setter
+    @emits_properties_changed
+    def Drivers(self, value: Str):
+        self.implementation.drivers = value
+
+    @property
+    def KdumpConf(self) -> Dict[Str, Str]:
+        """The directives of kdump.conf.
+
+        The directives are merged into /etc/kdump.conf of the
+        installed system.
+
+        :return: a dictionary of directives and their values
+        """
+        return self.implementation.kdump_conf
+
+    @KdumpConf.setter
+    @emits_properties_changed
+    def KdumpConf(self, value: Dict[Str, Str]):
+        self.implementation.kdump_conf = value
+
+    @property
+    def Capabilities(self) -> Structure:
+        """The kdump capabilities of the platform.
+
+        :return: a structure of the type KdumpCapabilities
+        """
+        return KdumpCapabilities.to_structure(self.implementation.capabilities)
+
+    @property
+    def TracingEnabled(self) -> Bool:
+        """Are the spans of the add-on recorded?
+
+        This is a debugging property. The tracing is enabled at the start
+        by the KDUMP_ADDON_TRACE=1 environment variable.
+
+        :return: True or False
+        """
+        return self.implementation.tracing_enabled
+
+    @TracingEnabled.setter
+    @emits_properties_changed
+    def TracingEnabled(self, value: Bool):
+        self.implementation.tracing_enabled = value
+
+    @property
+    def TraceSpans(self) -> List[Structure]:
+        """The recorded spans of the add-on.
+
+        This is a debugging property. Only the latest spans are kept.
+
+        :return: a list of structures of the type KdumpSpan
+        """
+        return KdumpSpan.to_structure_list(
+            [KdumpSpan.from_span(span) for span in self.implementation.trace_spans]
+        )
+
+    @emits_properties_changed
+    def ReadKickstart(self, kickstart: Str) -> Structure:
+        """Read the kickstart string.
+
+        The properties changed by the kickstart are reported by one
+        PropertiesChanged signal.
+
+        :param kickstart: a kickstart string
+        :return: a structure of the type KickstartReport
+        """
+        return super().ReadKickstart(kickstart)
+
+    def GetConfiguration(self) -> Structure:
+        """Get the kdump configuration.
+
+        :return: a structure of the type KdumpConfiguration
+        """
+        return KdumpConfiguration.to_structure(self.implementation.configuration)
+
+    @emits_properties_changed
+    def SetConfiguration(self, configuration: Structure):
+        """Validate and set the kdump configuration at once.
+
+        All changed properties are reported by one PropertiesChanged signal.
+
+        :param configuration: a structure of the type KdumpConfiguration
+        """
+        self.implementation.set_configuration(KdumpConfiguration.from_structure(configuration))
@@ -15,112 +15,22 @@
 # License and may only be used or replicated with the express permission of
 # Red Hat, Inc.
 #
-import logging
-
-from pykickstart.errors import KickstartParseError
-from pykickstart.options import KSOptionParser
-from pykickstart.version import F27
-
 from pyanaconda.core.kickstart import KickstartSpecification
 from pyanaconda.core.kickstart.addon import AddonData
 
-from com_redhat_kdump.i18n import _
-
-log = logging.getLogger(__name__)
+from com_redhat_kdump.addon_section import ADDON_NAME, KdumpAddonSection, get_option_parser, \
+    read_addon_data
 
-__all__ = ["KdumpKickstartSpecification"]
+__all__ = ["KdumpKickstartSpecification", "get_option_parser", "read_addon_data"]
 
 
-class KdumpKickstartData(AddonData):
+class KdumpKickstartData(KdumpAddonSection, AddonData):
     """The kickstart data for the com_redhat_kdump add-on."""
 
-    def __init__(self):
-        super().__init__()
-        self.enabled = False
-        self.reserve_mb = "auto"
-        self.enablefadump = False
-
-    def __str__(self):
-        """Generate the kickstart representation."""
-        addon_str = "%addon com_redhat_kdump"
-
-        if self.enabled:
-            addon_str += " --enable"
-        else:
-            addon_str += " --disable"
-
-        if self.enabled and self.reserve_mb:
-            addon_str += " --reserve-mb='%s'" % self.reserve_mb
-
-        if self.enablefadump:
-            addon_str += " --enablefadump"
-
-        addon_str += "\n\n%end\n"
-        return addon_str
-
-    def handle_header(self, args, line_number=None):
-        """Handle the arguments of the %addon line.
-
-        :param args: a list of additional arguments
-        :param line_number: a line number
-        :raise: KickstartParseError for invalid arguments
-        """
-        op = KSOptionParser(
-            prog="addon com_redhat_kdump", version=F27,
-            description="Configure the Kdump Addon."
-        )
-        op.add_argument(
-            "--enable", action="store_true", default=True,
-            version=F27, dest="enabled", help="Enable kdump"
-        )
-        op.add_argument(
-            "--enablefadump", action="store_true", default=False,
-            version=F27, dest="enablefadump", help="Enable dump mode fadump"
-        )
-        op.add_argument(
-            "--disable", action="store_false",
-            version=F27, dest="enabled", help="Disable kdump"
-        )
-        op.add_argument(
-            "--reserve-mb", type=str, dest="reserve_mb",
-            version=F27, default="auto", help="Amount of memory in MB to reserve for kdump."
-        )
-
-        opts = op.parse_args(args=args, lineno=line_number)
-
-        # Validate the reserve-mb argument
-        # Allow a final 'M' for consistency with the crashkernel kernel
-        # parameter. Strip it if found. And strip quotes.
-        opts.reserve_mb = opts.reserve_mb.strip("'\"")
-
-        if opts.reserve_mb and opts.reserve_mb[-1] == 'M':
-            opts.reserve_mb = opts.reserve_mb[:-1]
-
-        if opts.reserve_mb != "auto":
-            try:
-                _test = int(opts.reserve_mb)
-            except ValueError:
-                msg = _("Invalid value '%s' for --reserve-mb") % opts.reserve_mb
-                raise KickstartParseError(msg, lineno=line_number)
-
-        # Store the parsed arguments
-        self.enabled = opts.enabled
-        self.reserve_mb = opts.reserve_mb
-        self.enablefadump = opts.enablefadump
-
-    def handle_line(self, line, line_number=None):
-        """Handle one line of the section.
-
-        :param line: a line to parse
-        :param line_number: a line number
-        :raise: KickstartParseError for invalid lines
-        """
-        pass
-
 
 class KdumpKickstartSpecification(KickstartSpecification):
     """The kickstart specification of the Kdump service."""
 
     addons = {
-        "com_redhat_kdump": KdumpKickstartData
+        ADDON_NAME: KdumpKickstartData
     }
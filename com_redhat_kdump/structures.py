@@ -0,0 +1,271 @@
+#
+# Copyright (C) 2026 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+from dasbus.structure import DBusData
+from dasbus.typing import *  # pylint: disable=wildcard-import
+
+__all__ = ["KdumpConfiguration", "KdumpCapabilities", "KdumpSpan"]
+
+
+class KdumpConfiguration(DBusData):
+    """The configuration of kdump."""
+
+    def __init__(self):
+        self._kdump_enabled = False
+        self._fadump_enabled = False
+        self._reserved_memory = "auto"
+        self._dump_level = -1
+        self._dump_threads = 0
+        self._drivers = "all"
+        self._kdump_conf = {}
+
+    @property
+    def kdump_enabled(self) -> Bool:
+        """Is kdump enabled?
+
+        :return: True or False
+        """
+        return self._kdump_enabled
+
+    @kdump_enabled.setter
+    def kdump_enabled(self, value: Bool):
+        self._kdump_enabled = value
+
+    @property
+    def fadump_enabled(self) -> Bool:
+        """Is fadump enabled?
+
+        :return: True or False
+        """
+        return self._fadump_enabled
+
+    @fadump_enabled.setter
+    def fadump_enabled(self, value: Bool):
+        self._fadump_enabled = value
+
+    @property
+    def reserved_memory(self) -> Str:
+        """Amount of memory in MB to reserve for kdump.
+
+        :return: auto, a number of MB or a crashkernel range table
+        """
+        return self._reserved_memory
+
+    @reserved_memory.setter
+    def reserved_memory(self, value: Str):
+        self._reserved_memory = value
+
+    @property
+    def dump_level(self) -> Int:
+        """The dump level of makedumpfile.
+
+        :return: a number from 0 to 31 or -1 to keep the default
+        """
+        return self._dump_level
+
+    @dump_level.setter
+    def dump_level(self, value: Int):
+        self._dump_level = value
+
+    @property
+    def dump_threads(self) -> Int:
+        """The number of makedumpfile threads.
+
+        :return: a number of threads, 0 for none or -1 to pick it
+        """
+        return self._dump_threads
+
+    @dump_threads.setter
+    def dump_threads(self, value: Int):
+        self._dump_threads = value
+
+    @property
+    def drivers(self) -> Str:
+        """The drivers of the kdump initramfs.
+
+        :return: all, target or minimal
+        """
+        return self._drivers
+
+    @drivers.setter
+    def drivers(self, value: Str):
+        self._drivers = value
+
+    @property
+    def kdump_conf(self) -> Dict[Str, Str]:
+        """The directives of kdump.conf.
+
+        :return: a dictionary of directives and their values
+        """
+        return self._kdump_conf
+
+    @kdump_conf.setter
+    def kdump_conf(self, value: Dict[Str, Str]):
+        self._kdump_conf = value
+
+
+class KdumpCapabilities(DBusData):
+    """The kdump capabilities of the platform."""
+
+    def __init__(self):
+        self._fadump = False
+        self._crashkernel_high_low = False
+        self._crashkernel_cma = False
+        self._kexec_file_load = False
+        self._current_reservation = 0
+
+    @property
+    def fadump(self) -> Bool:
+        """Is fadump supported?
+
+        :return: True or False
+        """
+        return self._fadump
+
+    @fadump.setter
+    def fadump(self, value: Bool):
+        self._fadump = value
+
+    @property
+    def crashkernel_high_low(self) -> Bool:
+        """Is the crashkernel=X,high and crashkernel=Y,low syntax supported?
+
+        :return: True or False
+        """
+        return self._crashkernel_high_low
+
+    @crashkernel_high_low.setter
+    def crashkernel_high_low(self, value: Bool):
+        self._crashkernel_high_low = value
+
+    @property
+    def crashkernel_cma(self) -> Bool:
+        """Can the reservation be backed by CMA?
+
+        :return: True or False
+        """
+        return self._crashkernel_cma
+
+    @crashkernel_cma.setter
+    def crashkernel_cma(self, value: Bool):
+        self._crashkernel_cma = value
+
+    @property
+    def kexec_file_load(self) -> Bool:
+        """Is the kexec_file_load system call supported?
+
+        :return: True or False
+        """
+        return self._kexec_file_load
+
+    @kexec_file_load.setter
+    def kexec_file_load(self, value: Bool):
+        self._kexec_file_load = value
+
+    @property
+    def current_reservation(self) -> UInt32:
+        """Amount of memory in MB reserved for kdump on the running system.
+
+        :return: a number of MB
+        """
+        return self._current_reservation
+
+    @current_reservation.setter
+    def current_reservation(self, value: UInt32):
+        self._current_reservation = value
+
+
+class KdumpSpan(DBusData):
+    """A recorded span of the add-on."""
+
+    def __init__(self):
+        self._name = ""
+        self._start = 0.0
+        self._duration = 0.0
+        self._outcome = ""
+        self._attributes = {}
+
+    @property
+    def name(self) -> Str:
+        """The name of the traced operation.
+
+        :return: a name, for example DeviceTree.GetDevices
+        """
+        return self._name
+
+    @name.setter
+    def name(self, value: Str):
+        self._name = value
+
+    @property
+    def start(self) -> Double:
+        """The start of the span.
+
+        :return: a number of seconds since the epoch
+        """
+        return self._start
+
+    @start.setter
+    def start(self, value: Double):
+        self._start = value
+
+    @property
+    def duration(self) -> Double:
+        """The duration of the span.
+
+        :return: a number of seconds
+        """
+        return self._duration
+
+    @duration.setter
+    def duration(self, value: Double):
+        self._duration = value
+
+    @property
+    def outcome(self) -> Str:
+        """The outcome of the span.
+
+        :return: ok or the name of the raised exception
+        """
+        return self._outcome
+
+    @outcome.setter
+    def outcome(self, value: Str):
+        self._outcome = value
+
+    @property
+    def attributes(self) -> Dict[Str, Str]:
+        """The attributes of the span.
+
+        :return: a dictionary of names and values, for example the command
+        """
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, value: Dict[Str, Str]):
+        self._attributes = value
+
+    @classmethod
+    def from_span(cls, span):
+        """Create a structure from a span of the tracer."""
+        data = cls()
+        data.name = span.name
+        data.start = span.start
+        data.duration = span.duration
+        data.outcome = span.outcome
+        data.attributes = dict(span.attributes)
+        return data
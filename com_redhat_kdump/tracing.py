@@ -0,0 +1,250 @@
+#
+# Copyright (C) 2026 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+"""Lightweight tracing of the hot paths of the add-on.
+
+The spans are recorded only if the tracing is enabled, otherwise the
+context managers, decorators and proxies of the tracer do nothing.
+"""
+import collections
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+from dasbus.signal import Signal
+
+log = logging.getLogger(__name__)
+
+__all__ = ["TRACE_ENV", "Span", "Tracer", "tracer", "read_spans"]
+
+# The environment variable that enables the tracing at the start
+TRACE_ENV = "KDUMP_ADDON_TRACE"
+
+# The maximal number of kept spans, the oldest spans are dropped
+TRACE_CAPACITY = 1024
+
+
+class Span(object):
+    """A finished span."""
+
+    __slots__ = ("name", "start", "duration", "outcome", "attributes")
+
+    def __init__(self, name, start, duration, outcome, attributes):
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.outcome = outcome
+        self.attributes = attributes
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a span from a dictionary."""
+        return cls(data["name"], data["start"], data["duration"], data["outcome"],
+                   data["attributes"])
+
+    def to_dict(self):
+        """Return a dictionary of the span."""
+        return {
+            "name": self.name,
+            "start": self.start,
+            "duration": self.duration,
+            "outcome": self.outcome,
+            "attributes": self.attributes,
+        }
+
+
+class _NoSpan(object):
+    """The span of a disabled tracer."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set(self, name, value):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _ActiveSpan(object):
+    """The span of an enabled tracer."""
+
+    def __init__(self, tracer, name, attributes):
+        self._tracer = tracer
+        self._name = name
+        self._attributes = attributes
+        self._start = None
+        self._counter = None
+
+    def __enter__(self):
+        self._start = time.time()
+        self._counter = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self._counter
+        outcome = "ok" if exc_type is None else exc_type.__name__
+        self._tracer.record(Span(self._name, self._start, duration, outcome, self._attributes))
+        return False
+
+    def set(self, name, value):
+        """Set an attribute of the span."""
+        self._attributes[name] = str(value)
+
+
+class _TracingProxy(object):
+    """A DBus proxy that traces the method calls."""
+
+    def __init__(self, tracer, proxy, prefix):
+        self.__dict__.update(_tracer=tracer, _proxy=proxy, _prefix=prefix)
+
+    def __getattr__(self, name):
+        member = getattr(self._proxy, name)
+
+        if not callable(member) or isinstance(member, Signal):
+            return member
+
+        return self._tracer.traced("{}.{}".format(self._prefix, name))(member)
+
+    def __setattr__(self, name, value):
+        setattr(self._proxy, name, value)
+
+
+class Tracer(object):
+    """A ring buffer of spans."""
+
+    def __init__(self, capacity=TRACE_CAPACITY, enabled=False):
+        """Create a tracer.
+
+        :param capacity: a maximal number of kept spans
+        :param enabled: should the spans be recorded?
+        """
+        self.enabled = enabled
+        self._spans = collections.deque(maxlen=capacity)
+
+    def span(self, name, **attributes):
+        """Return a context manager that records a span.
+
+        :param name: a name of the span
+        :param attributes: attributes of the span
+        :return: a context manager with the set method
+        """
+        if not self.enabled:
+            return _NO_SPAN
+
+        return _ActiveSpan(self, name, {key: str(value) for key, value in attributes.items()})
+
+    def traced(self, name):
+        """Return a decorator that records a span of every call.
+
+        :param name: a name of the span
+        :return: a decorator
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                with _ActiveSpan(self, name, {}):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def trace_proxy(self, proxy, prefix):
+        """Return a DBus proxy that records a span of every method call.
+
+        :param proxy: a DBus proxy
+        :param prefix: a prefix of the names of the spans
+        :return: a proxy, the given one if the tracing is disabled
+        """
+        if not self.enabled:
+            return proxy
+
+        return _TracingProxy(self, proxy, prefix)
+
+    def record(self, span):
+        """Record a finished span."""
+        self._spans.append(span)
+
+    @property
+    def spans(self):
+        """The list of the recorded spans."""
+        return list(self._spans)
+
+    def clear(self):
+        """Drop the recorded spans."""
+        self._spans.clear()
+
+    def write(self, path, spans=()):
+        """Write the recorded spans to a JSON file.
+
+        The file is replaced at once, so it can be written by several
+        threads and read by another process.
+
+        :param path: a path to the file
+        :param spans: a list of other spans to write with the recorded ones
+        """
+        spans = sorted([*spans, *self.spans], key=lambda span: span.start)
+        temporary = "{}.{}.tmp".format(path, threading.get_ident())
+
+        with open(temporary, "w") as f:
+            json.dump([span.to_dict() for span in spans], f, indent=2)
+
+        os.replace(temporary, path)
+        log.debug("Wrote %d spans to %s.", len(spans), path)
+
+    def export(self, path):
+        """Write the recorded spans to a JSON file if the tracing is enabled.
+
+        The spans of the UI are exported this way for the kdump service,
+        which adds them to its trace.
+
+        :param path: a path to the file
+        """
+        if not self.enabled:
+            return
+
+        try:
+            self.write(path)
+        except OSError as e:
+            log.warning("Can't export the trace to %s: %s", path, e)
+
+
+def read_spans(path):
+    """Read the spans from a JSON file.
+
+    :param path: a path to the file
+    :return: a list of spans, empty if the file doesn't exist
+    """
+    try:
+        with open(path, "r") as f:
+            return [Span.from_dict(data) for data in json.load(f)]
+    except FileNotFoundError:
+        return []
+
+
+# The tracer of the process
+tracer = Tracer(enabled=os.environ.get(TRACE_ENV) == "1")
@@ -21,21 +21,32 @@
 
 """Kdump anaconda TUI configuration"""
 
-import os.path
+import logging
 import re
+import threading
 
 from pyanaconda.modules.common.constants.services import STORAGE
 from pyanaconda.modules.common.util import is_module_available
+from pyanaconda.threading import threadMgr, AnacondaThread
 from pyanaconda.ui.categories.system import SystemCategory
+from pyanaconda.ui.communication import hubQ
 from pyanaconda.ui.tui.spokes import NormalTUISpoke
 from pyanaconda.ui.tui.tuiobject import Dialog
 
 from simpleline.render.widgets import CheckboxWidget, EntryWidget, TextWidget
 from simpleline.render.containers import ListColumnContainer
 from simpleline.render.screen import InputState
-from com_redhat_kdump.common import getMemoryBounds, getLuksDevices
+from com_redhat_kdump.common import getMemoryBounds, getTotalMemory, getTargetLuksDevices, \
+    checkReservedMemory, memoryProbe, probeMemUsage, getDumpEstimate
+from com_redhat_kdump.dump_level import DEFAULT_DUMP_LEVEL, format_dump_size, format_duration
 from com_redhat_kdump.i18n import N_, _
-from com_redhat_kdump.constants import FADUMP_CAPABLE_FILE, KDUMP, ENCRYPTION_WARNING
+from com_redhat_kdump.proxy import get_kdump_proxy
+from com_redhat_kdump.structures import KdumpCapabilities
+from com_redhat_kdump.tracing import tracer
+from com_redhat_kdump.constants import KDUMP, ENCRYPTION_WARNING, DUMP_ESTIMATE, \
+    THREAD_KDUMP_STORAGE_SCAN, THREAD_KDUMP_MEM_USAGE, STORAGE_SCAN_DELAY, UI_TRACE_FILE
+
+log = logging.getLogger(__name__)
 
 __all__ = ["KdumpSpoke"]
 
@@ -47,13 +58,22 @@ class KdumpSpoke(NormalTUISpoke):
         super().__init__(*args)
         self.title = N_("Kdump")
         self._container = None
+        self._container_state = None
+        self._window_inputs = None
+        self._widgets = {}
 
         self._lower, self._upper, self._step = getMemoryBounds()
         # Allow a string of digits optionally followed by 'M'
         self._reserve_check_re = re.compile(r'^(auto)|(\d+M?)$')
-        self._proxy = KDUMP.get_proxy()
-        self._luks_devs = []
-        self._ready = True
+        self._proxy = get_kdump_proxy()
+        self._fadump_capable = False
+        self._scan_generation = 0
+        self._scan_cancel = None
+        # The generation and the encrypted devices of the last finished
+        # scan, published at once by the scan thread
+        self._scan_result = (0, [])
+        self._scan_lock = threading.Lock()
+        self._mem_usage_started = False
 
     @staticmethod
     def get_screen_id():
@@ -61,17 +81,75 @@ class KdumpSpoke(NormalTUISpoke):
         return "kdump-configuration"
 
     def _check_storage_change(self, interface, changed, invalid):
-        self._ready = False
         partition = changed.get("AppliedPartitioning")
-        if partition:
-            self._luks_devs = getLuksDevices(partition.unpack())
-        self._ready = True
+        if not partition:
+            return
+
+        # A newer partitioning makes the scan in progress obsolete.
+        if self._scan_cancel:
+            self._scan_cancel.set()
+
+        with self._scan_lock:
+            self._scan_generation += 1
+
+        self._scan_cancel = threading.Event()
+
+        # pylint: disable=no-member
+        hubQ.send_not_ready(self.__class__.__name__)
+
+        threadMgr.add(AnacondaThread(
+            name="%s-%d" % (THREAD_KDUMP_STORAGE_SCAN, self._scan_generation),
+            target=self._scan_storage,
+            args=(partition.unpack(), self._proxy.KdumpConf, self._scan_generation,
+                  self._scan_cancel)
+        ))
+
+    def _scan_storage(self, object_path, kdump_conf, generation, cancel):
+        # A newer change during the delay cancels this scan.
+        if cancel.wait(STORAGE_SCAN_DELAY):
+            return
+
+        luks_devs = None
+
+        try:
+            # Check only the devices the dump target depends on.
+            luks_devs = getTargetLuksDevices(object_path, kdump_conf, cancel=cancel)
+        except Exception:  # pylint: disable=broad-except
+            # The check is only advisory, don't block the hub.
+            log.exception("Failed to check the encrypted devices of the dump target.")
+        finally:
+            self._finish_storage_scan(generation, luks_devs)
+
+    def _finish_storage_scan(self, generation, luks_devs):
+        with self._scan_lock:
+            # Drop the result of an outdated scan.
+            if generation != self._scan_generation:
+                return
+
+            # Keep the previous devices if the scan has failed.
+            if luks_devs is None:
+                luks_devs = self._scan_result[1]
+
+            self._scan_result = (generation, luks_devs)
+
+        # pylint: disable=no-member
+        hubQ.send_ready(self.__class__.__name__)
+
+        # Export the spans of the scan for the trace of the service.
+        tracer.export(UI_TRACE_FILE)
+
+    @property
+    def _luks_devs(self):
+        return self._scan_result[1]
 
     @property
     def ready(self):
-        return self._ready
+        return self._scan_result[0] == self._scan_generation
 
     def initialize(self):
+        capabilities = KdumpCapabilities.from_structure(self._proxy.Capabilities)
+        self._fadump_capable = capabilities.fadump
+
         # Connect a callback to the PropertiesChanged signal.
         storage = STORAGE.get_proxy()
         storage.PropertiesChanged.connect(self._check_storage_change)
@@ -81,7 +159,8 @@ class KdumpSpoke(NormalTUISpoke):
         return is_module_available(KDUMP)
 
     def apply(self):
-        pass
+        # Export the spans of the spoke for the trace of the service.
+        tracer.export(UI_TRACE_FILE)
 
     @property
     def completed(self):
@@ -91,61 +170,150 @@ class KdumpSpoke(NormalTUISpoke):
     def status(self):
         if not self._proxy.KdumpEnabled:
             return _("Kdump is disabled")
-        if not self._ready:
+        if not self.ready:
             return _("Checking storage...")
         if self._luks_devs:
             return _("Kdump may require extra setup for encrypted devices.")
         return _("Kdump is enabled")
 
+    def _start_mem_usage_probe(self):
+        # Probe the page usage for the estimates of the dump only once
+        # the dump level is shown.
+        if self._mem_usage_started:
+            return
+
+        self._mem_usage_started = True
+        threadMgr.add(AnacondaThread(name=THREAD_KDUMP_MEM_USAGE, target=self._probe_mem_usage))
+
+    def _probe_mem_usage(self):
+        # Redraw the screen with the new estimate of the dump.
+        if probeMemUsage():
+            # pylint: disable=no-member
+            hubQ.send_ready(self.__class__.__name__)
+
+    def _get_widget(self, name, inputs, factory):
+        """Return a cached widget, create a new one only if its inputs changed."""
+        cached = self._widgets.get(name)
+
+        if cached is None or cached[0] != inputs:
+            cached = self._widgets[name] = (inputs, factory(*inputs))
+
+        return cached[1]
+
     def refresh(self, args=None):
+        state = {
+            "kdump_enabled": self._proxy.KdumpEnabled,
+            "fadump_enabled": self._proxy.FadumpEnabled,
+            "reserved_memory": self._proxy.ReservedMemory,
+            "dump_level": self._proxy.DumpLevel,
+        }
+        estimate = self._get_dump_estimate(state) if state["kdump_enabled"] else None
+        inputs = (state, estimate, bool(self._luks_devs))
+
+        # Keep the window if nothing it shows has changed. The screen is
+        # still redrawn after every input, simpleline asks for the next
+        # input only after a redraw.
+        if self._window_inputs == inputs:
+            return
+
         super().refresh(args)
+        self._window_inputs = inputs
 
-        self._container = ListColumnContainer(1)
-        self.window.add(self._container)
+        # Rebuild the container only if the state has changed.
+        if self._container is None or self._container_state != state:
+            self._container = ListColumnContainer(1)
+            self._container_state = state
+            self._create_enable_checkbox(state)
+
+            if state["kdump_enabled"]:
+                self._create_fadump_checkbox(state)
+                self._create_reserve_amount_text_widget(state)
+                self._create_dump_level_text_widget(state)
+                self._start_mem_usage_probe()
 
-        self._create_enable_checkbox()
+        self.window.add(self._container)
 
-        if self._proxy.KdumpEnabled:
-            self._create_fadump_checkbox()
-            self._create_reserve_amount_text_widget()
+        if state["kdump_enabled"]:
+            self.window.add_separator()
+            self.window.add(self._get_widget(
+                "dump_estimate", estimate, self._create_dump_estimate
+            ))
 
-            if self._proxy.ReservedMemory == 'auto':
+            if state["reserved_memory"] == 'auto':
                 self.window.add_separator()
-                message = TextWidget(_(
-                    "Automatic kdump memory reservation is in use. "
-                    "Kdump will use the default crashkernel value "
-                    "provided by the kdump-utils package. This is a "
-                    "best-effort support and might not fit "
-                    "your use case. It is recommended to verify "
-                    "if the crashkernel value is suitable after "
-                    "installation."))
-                self.window.add(message)
+                self.window.add(self._get_widget("auto_warning", (), self._create_auto_warning))
 
             if self._luks_devs:
                 self.window.add_separator()
-                message = TextWidget(_(ENCRYPTION_WARNING))
-                self.window.add(message)
+                self.window.add(self._get_widget("luks_warning", (), self._create_luks_warning))
 
         self.window.add_separator()
 
-    def _create_enable_checkbox(self):
-        enable_kdump_checkbox = CheckboxWidget(title=_("Enable kdump"),
-                                               completed=self._proxy.KdumpEnabled)
+    @staticmethod
+    def _create_auto_warning():
+        return TextWidget(_(
+            "Automatic kdump memory reservation is in use. "
+            "Kdump will use the default crashkernel value "
+            "provided by the kdump-utils package. This is a "
+            "best-effort support and might not fit "
+            "your use case. It is recommended to verify "
+            "if the crashkernel value is suitable after "
+            "installation."))
+
+    @staticmethod
+    def _get_dump_estimate(state):
+        level = state["dump_level"]
+
+        if level == -1:
+            level = DEFAULT_DUMP_LEVEL
+
+        return getDumpEstimate(level)
+
+    @staticmethod
+    def _create_dump_estimate(size, duration):
+        return TextWidget(_(DUMP_ESTIMATE) % {
+            "size": format_dump_size(size),
+            "duration": format_duration(duration),
+        })
+
+    @staticmethod
+    def _create_luks_warning():
+        return TextWidget(_(ENCRYPTION_WARNING))
+
+    def _create_enable_checkbox(self, state):
+        enable_kdump_checkbox = self._get_widget(
+            "enable_kdump", (state["kdump_enabled"],),
+            lambda enabled: CheckboxWidget(title=_("Enable kdump"), completed=enabled)
+        )
         self._container.add(enable_kdump_checkbox, self._set_enabled)
 
-    def _create_fadump_checkbox(self):
-        if not os.path.exists(FADUMP_CAPABLE_FILE):
+    def _create_fadump_checkbox(self, state):
+        if not self._fadump_capable:
             return
 
-        enable_fadump_checkbox = CheckboxWidget(title=_("Enable dump mode fadump"),
-                                                completed=self._proxy.FadumpEnabled)
+        enable_fadump_checkbox = self._get_widget(
+            "enable_fadump", (state["fadump_enabled"],),
+            lambda enabled: CheckboxWidget(title=_("Enable dump mode fadump"), completed=enabled)
+        )
         self._container.add(enable_fadump_checkbox, self._set_fadump_enable)
 
-    def _create_reserve_amount_text_widget(self):
+    def _create_reserve_amount_text_widget(self, state):
         title = _("Reserve amount (%d - %d MB)" % (self._lower, self._upper))
-        reserve_amount_entry = EntryWidget(title=title, value=self._proxy.ReservedMemory)
+        reserve_amount_entry = self._get_widget(
+            "reserve_amount", (state["reserved_memory"],),
+            lambda value: EntryWidget(title=title, value=value)
+        )
         self._container.add(reserve_amount_entry, self._get_reserve_amount)
 
+    def _create_dump_level_text_widget(self, state):
+        level = state["dump_level"]
+        value = str(level if level != -1 else DEFAULT_DUMP_LEVEL)
+        dump_level_entry = self._get_widget(
+            "dump_level", (value,),
+            lambda value: EntryWidget(title=_("Dump level (0 - 31)"), value=value)
+        )
+        self._container.add(dump_level_entry, self._get_dump_level)
+
     def _set_enabled(self, data):
         self._proxy.KdumpEnabled = not self._proxy.KdumpEnabled
 
@@ -157,6 +325,14 @@ class KdumpSpoke(NormalTUISpoke):
         dialog = Dialog(title=text, conditions=[self._check_reserve_valid])
         self._proxy.ReservedMemory = dialog.run()
 
+    def _get_dump_level(self, data):
+        dialog = Dialog(title=_("Dump level (0 - 31)"), conditions=[self._check_dump_level_valid])
+        self._proxy.DumpLevel = int(dialog.run())
+
+    @staticmethod
+    def _check_dump_level_valid(key, report_func):
+        return key.isdigit() and 0 <= int(key) <= 31
+
     def _check_reserve_valid(self, key, report_func):
         if self._reserve_check_re.match(key):
             if key == 'auto':
@@ -166,7 +342,9 @@ class KdumpSpoke(NormalTUISpoke):
             key = int(key)
             if self._upper >= key >= self._lower:
                 return True
-        return False
+            return False
+        # Accept a range table or a map of arch patterns that fits this system.
+        return checkReservedMemory(key, getTotalMemory(), memoryProbe.arch) is None
 
     def input(self, args, key):
         if self._container.process_user_input(key):
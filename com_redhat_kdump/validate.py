@@ -0,0 +1,192 @@
+#
+# Copyright (C) 2026 Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+"""Bulk validation of the com_redhat_kdump section of kickstart files.
+
+Usage: python -m com_redhat_kdump.validate [-j N] [--arch ARCH] path...
+
+The paths are kickstart files or directories searched for kickstart
+files. Parse errors and reservations out of the bounds of the add-on are
+written to the standard output as path:line: message.
+"""
+import argparse
+import fnmatch
+import multiprocessing
+import os
+import sys
+import time
+
+from pykickstart.errors import KickstartParseError
+
+from com_redhat_kdump.addon_section import ADDON_NAME, read_addon_data
+from com_redhat_kdump.crashkernel import get_reserved_memory
+from com_redhat_kdump.reservation import computeMemoryBounds
+
+__all__ = ["check_reservation", "validate_file", "find_kickstarts", "main"]
+
+# The architectures checked by default
+DEFAULT_ARCHES = ["x86_64", "aarch64", "ppc64le", "s390x"]
+
+# The options of the worker processes
+_options = None
+
+
+def check_reservation(value, arches, memory=None):
+    """Check the reserved memory against the bounds of the add-on.
+
+    Every range of a range table is checked with the smallest amount
+    of memory it applies to. A number of MB is checked with the given
+    amount of memory, or only against the lower bound.
+
+    :param value: a string with the reserved memory
+    :param arches: a list of architectures
+    :param memory: the total memory of the target systems in MB or None
+    :return: a list of messages
+    """
+    messages = []
+
+    for arch in arches:
+        entry = get_reserved_memory(value, arch)
+
+        if entry is None or entry == "auto":
+            continue
+
+        if isinstance(entry, int):
+            checks = [(memory, entry)]
+        else:
+            checks = [(start // 1024 ** 2, size // 1024 ** 2) for start, _end, size in entry.ranges]
+
+        for total, size in checks:
+            if total is None:
+                lower, _upper, _step = computeMemoryBounds(sys.maxsize, arch)
+                if size < lower:
+                    messages.append("The reservation of {} MB for {} is below the lower "
+                                    "bound ({} MB)".format(size, arch, lower))
+                continue
+
+            lower, upper, _step = computeMemoryBounds(total, arch)
+            if not lower <= size <= upper:
+                messages.append("The reservation of {} MB for {} with {} MB of memory is out of "
+                                "bounds ({} - {} MB)".format(size, arch, total, lower, upper))
+
+    return messages
+
+
+def validate_file(path, arches=None, memory=None):
+    """Validate the com_redhat_kdump section of a kickstart file.
+
+    :param path: a path to the kickstart file
+    :param arches: a list of architectures or None for the default ones
+    :param memory: the total memory of the target systems in MB or None
+    :return: a list of (line number, message)
+    """
+    try:
+        with open(path, "r") as f:
+            lines = f.readlines()
+    except (IOError, UnicodeDecodeError) as e:
+        return [(0, str(e))]
+
+    try:
+        data = read_addon_data(lines)
+    except KickstartParseError as e:
+        return [(e.lineno or 0, e.message)]
+
+    header = 0
+    for line_number, line in enumerate(lines, 1):
+        if line.lstrip().startswith("%addon") and ADDON_NAME in line:
+            header = line_number
+            break
+
+    if not data.enabled:
+        return []
+
+    return [
+        (header, message)
+        for message in check_reservation(data.reserve_mb, arches or DEFAULT_ARCHES, memory)
+    ]
+
+
+def find_kickstarts(paths, pattern="*"):
+    """Find kickstart files in the given paths.
+
+    :param paths: a list of files and directories
+    :param pattern: a pattern of the names of the files in the directories
+    :return: a generator of paths
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+
+            for name in sorted(files):
+                if fnmatch.fnmatch(name, pattern):
+                    yield os.path.join(root, name)
+
+
+def _init_worker(options):
+    global _options
+    _options = options
+
+
+def _validate_path(path):
+    return path, validate_file(path, **_options)
+
+
+def main(argv=None):
+    """Run the validator."""
+    parser = argparse.ArgumentParser(
+        prog="python -m com_redhat_kdump.validate",
+        description="Validate the com_redhat_kdump section of kickstart files."
+    )
+    parser.add_argument("paths", nargs="+", help="kickstart files or directories")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="the number of worker processes")
+    parser.add_argument("--pattern", default="*",
+                        help="a pattern of the kickstart files in the directories")
+    parser.add_argument("--arch", action="append", dest="arches",
+                        help="an architecture to check, can be repeated")
+    parser.add_argument("--memory", type=int, default=None,
+                        help="the total memory of the target systems in MB")
+    opts = parser.parse_args(argv)
+
+    options = {"arches": opts.arches, "memory": opts.memory}
+    start = time.monotonic()
+    count = problems = 0
+
+    with multiprocessing.Pool(opts.jobs, _init_worker, (options,)) as pool:
+        results = pool.imap_unordered(_validate_path, find_kickstarts(opts.paths, opts.pattern), 64)
+
+        for path, messages in results:
+            count += 1
+
+            for line_number, message in messages:
+                problems += 1
+                print("{}:{}: {}".format(path, line_number, message))
+
+    elapsed = time.monotonic() - start
+    print("Validated {} kickstarts with {} problems ({:.0f} kickstarts/s).".format(
+        count, problems, count / elapsed if elapsed else count
+    ), file=sys.stderr)
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
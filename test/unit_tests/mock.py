@@ -1,7 +1,14 @@
 import os
 import re
+import threading
+import time
+from unittest import skipUnless
 from unittest.mock import MagicMock
 
+# The benchmarks depend on the speed of the machine, run them on demand
+# with KDUMP_ADDON_BENCHMARK=1 or make benchmark.
+benchmark = skipUnless(os.environ.get("KDUMP_ADDON_BENCHMARK") == "1", "benchmarks are not enabled")
+
 
 def remove_duplicated_slash(filename):
     return re.sub(r'//*', '/', filename)
@@ -17,7 +24,10 @@ class MockBuiltinRead(MagicMock):
         handle.read.return_value = None
 
         def reset_choose_file(filename, *args, **kwargs):
-            handle.read.return_value = self.file_map[remove_duplicated_slash(filename)]
+            filename = remove_duplicated_slash(filename)
+            if filename not in self.file_map:
+                raise FileNotFoundError(filename)
+            handle.read.return_value = self.file_map[filename]
             return handle
 
         self.side_effect = reset_choose_file
@@ -32,3 +42,100 @@ class MockOsPathExists(MagicMock):
             return remove_duplicated_slash(filename) in self.file_map.keys()
 
         self.side_effect = reset_choose_file
+
+
+class MockDeviceTree(object):
+    """A synthetic storage device tree with a fixed DBus call latency."""
+
+    def __init__(self, devices, latency=0, parents=None, mount_points=None, attrs=None):
+        self.devices = devices
+        self.parents = parents or {}
+        self.attrs = attrs or {}
+        self.mount_points = mount_points or {}
+        self.latency = latency
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def GetDevices(self):
+        return list(self.devices.keys())
+
+    def GetDeviceData(self, device_name):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        time.sleep(self.latency)
+
+        with self._lock:
+            self.in_flight -= 1
+
+        return {
+            "name": device_name,
+            "type": self.devices[device_name],
+            "path": "/dev/" + device_name,
+            "parents": self.parents.get(device_name, []),
+            "attrs": self.attrs.get(device_name, {}),
+        }
+
+    def GetMountPoints(self):
+        return dict(self.mount_points)
+
+    def ResolveDevice(self, dev_spec):
+        if dev_spec.startswith("/dev/"):
+            dev_spec = dev_spec[len("/dev/"):]
+        return dev_spec if dev_spec in self.devices else ""
+
+
+def synthetic_device_tree(count, luks_every=10):
+    """Return a dictionary of device names and types of a large device tree."""
+    devices = {}
+
+    for i in range(count):
+        if i % luks_every == 0:
+            devices["luks-%d" % i] = "luks/dm-crypt"
+        else:
+            devices["mpath%dp1" % i] = "partition"
+
+    return devices
+
+
+class MockSpoke(object):
+    """A base class of the GUI and TUI spokes without the UI toolkits."""
+
+    def __init__(self, *args):
+        self.builder = MagicMock()
+        self.window = MagicMock()
+
+    def initialize(self):
+        pass
+
+    def refresh(self, args=None):
+        pass
+
+
+def mock_ui_modules():
+    """Return a dictionary of stubs of the UI modules for sys.modules.
+
+    The stubs replace Gtk, simpleline and the UI modules of Anaconda that
+    depend on them, so the spokes can be imported in the unit tests.
+    """
+    modules = {}
+
+    for name in ("gi.repository.Gtk",
+                 "pyanaconda.ui.categories.system",
+                 "pyanaconda.ui.communication",
+                 "pyanaconda.ui.gui.spokes",
+                 "pyanaconda.ui.gui.utils",
+                 "pyanaconda.ui.tui.spokes",
+                 "pyanaconda.ui.tui.tuiobject",
+                 "simpleline.render.containers",
+                 "simpleline.render.screen",
+                 "simpleline.render.widgets"):
+        modules[name] = MagicMock(name=name)
+
+    modules["pyanaconda.ui.gui.spokes"].NormalSpoke = MockSpoke
+    modules["pyanaconda.ui.tui.spokes"].NormalTUISpoke = MockSpoke
+    return modules
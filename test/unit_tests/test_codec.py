@@ -0,0 +1,69 @@
+import zlib
+from unittest.case import TestCase
+from com_redhat_kdump.codec import parse_codecs, get_codec, set_codec, generate_pages, \
+    benchmark_codecs, choose_codec
+
+MAKEDUMPFILE_VERSION = """\
+makedumpfile: version 1.7.5 (released on 22 Apr 2024)
+lzo	enabled
+snappy	disabled
+zstd	enabled
+"""
+
+
+class KdumpCodecTestCase(TestCase):
+
+    def test_parse_codecs(self):
+        self.assertEqual(parse_codecs(MAKEDUMPFILE_VERSION), {"zlib", "lzo", "zstd"})
+        self.assertEqual(parse_codecs(""), {"zlib"})
+        self.assertEqual(parse_codecs(None), {"zlib"})
+
+    def test_get_codec(self):
+        self.assertEqual(get_codec("makedumpfile -l --message-level 7 -d 31"), "lzo")
+        self.assertEqual(get_codec("makedumpfile -F -c -d 31"), "zlib")
+        self.assertEqual(get_codec("makedumpfile -d 31"), None)
+        self.assertEqual(get_codec("cp --sparse=always"), None)
+        self.assertEqual(get_codec(""), None)
+
+    def test_set_codec(self):
+        self.assertEqual(set_codec("makedumpfile -l --message-level 7 -d 31", "zstd"),
+                         "makedumpfile -z --message-level 7 -d 31")
+        self.assertEqual(set_codec("makedumpfile -F -c -d 31", "lzo"), "makedumpfile -F -l -d 31")
+
+    def test_generate_pages(self):
+        pages = generate_pages(count=16, page_size=4096)
+        self.assertEqual(len(pages), 16)
+        self.assertTrue(all(len(page) == 4096 for page in pages))
+        self.assertEqual(pages, generate_pages(count=16, page_size=4096))
+        self.assertFalse(any(page == bytes(4096) for page in pages))
+
+    def test_benchmark_codecs(self):
+        compressors = {
+            "zlib": lambda data: zlib.compress(data, 1),
+            "lzo": lambda data: data[:len(data) // 2],
+        }
+
+        results = benchmark_codecs(["zlib", "lzo", "zstd"], generate_pages(count=64), compressors)
+        self.assertEqual(set(results), {"zlib", "lzo"})
+        self.assertAlmostEqual(results["lzo"][1], 2.0)
+        self.assertGreater(results["zlib"][0], 0)
+        self.assertGreater(results["zlib"][1], 1.0)
+
+    def test_choose_codec(self):
+        self.assertEqual(choose_codec({"zlib", "lzo", "zstd"}), "lzo")
+        self.assertEqual(choose_codec({"zlib", "snappy", "zstd"}), "snappy")
+        self.assertEqual(choose_codec({"zlib"}), "zlib")
+        self.assertEqual(choose_codec(set()), None)
+
+    def test_choose_codec_measured(self):
+        codecs = {"zlib", "lzo", "zstd"}
+        results = {"zlib": (50.0, 3.1), "lzo": (400.0, 2.2), "zstd": (600.0, 2.9)}
+        self.assertEqual(choose_codec(codecs, results, "lzo"), "zstd")
+
+        # Only supported codecs are chosen.
+        self.assertEqual(choose_codec({"zlib", "lzo"}, results, "lzo"), "lzo")
+
+        # The current codec or a second codec isn't measured.
+        self.assertEqual(choose_codec(codecs, {"zlib": (50.0, 3.1), "zstd": (600.0, 2.9)}, "lzo"),
+                         "lzo")
+        self.assertEqual(choose_codec(codecs, {"zlib": (50.0, 3.1)}, "zlib"), "lzo")
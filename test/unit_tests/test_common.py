@@ -1,11 +1,16 @@
+import os
+import threading
+from types import SimpleNamespace
 from unittest.case import TestCase
 from unittest.mock import patch
-from com_redhat_kdump import common
-from .mock import MockBuiltinRead
+from com_redhat_kdump import common, reservation
+from com_redhat_kdump.constants import FADUMP_CAPABLE_FILE
+from .mock import MockBuiltinRead, MockDeviceTree, synthetic_device_tree
 
 SYS_CRASH_SIZE = '/sys/kernel/kexec_crash_size'
 PROC_MEMINFO = '/proc/meminfo'
 CRASHKERNEL_DEFAULT = '/usr/lib/modules/{}/crashkernel.default'
+KERNEL_CONFIG = '/lib/modules/{}/config'.format(os.uname().release)
 
 X86_INFO_FIXTURE = {
     SYS_CRASH_SIZE: "167772160",  # 160MB
@@ -29,8 +34,8 @@ PPC64_INFO_FIXTURE = {
 class KdumpCommonTestCase(TestCase):
 
     def setUp(self):
-        # Clean up global variable that may cache test result of previous test case
-        common._reservedMemory = None
+        # Drop the memory snapshot that may cache test result of previous test case
+        common.memoryProbe.invalidate()
 
     @patch("builtins.open", MockBuiltinRead(X86_INFO_FIXTURE))
     @patch("blivet.arch.get_arch", return_value="x86_64")
@@ -46,3 +51,434 @@ class KdumpCommonTestCase(TestCase):
     @patch("blivet.arch.get_arch", return_value="ppc64")
     def test_memory_bound_ppc64(self, _mock_read):
         self.assertEqual((384, 64 * 1024 - 1024, 1), common.getMemoryBounds())
+
+
+class KdumpMemoryProbeTestCase(TestCase):
+
+    @patch("blivet.arch.get_arch", return_value="x86_64")
+    def test_memory_probe_snapshot(self, _mock_arch):
+        mock_read = MockBuiltinRead(X86_INFO_FIXTURE)
+        probe = common.MemoryProbe()
+
+        with patch("builtins.open", mock_read):
+            self.assertEqual(4 * 1024, probe.totalMemory)
+            self.assertEqual(160, probe.reservedMemory)
+            self.assertEqual("x86_64", probe.arch)
+            self.assertEqual(2, mock_read.call_count)
+
+            probe.invalidate()
+            self.assertEqual(4 * 1024, probe.totalMemory)
+            self.assertEqual(4, mock_read.call_count)
+
+    @patch("blivet.arch.get_arch", return_value="x86_64")
+    def test_memory_probe_ttl(self, mock_arch):
+        mock_read = MockBuiltinRead(X86_INFO_FIXTURE)
+        probe = common.MemoryProbe(ttl=10)
+
+        with patch("builtins.open", mock_read), \
+                patch("com_redhat_kdump.common.time.monotonic") as mock_time:
+            mock_time.return_value = 100
+            self.assertEqual(4 * 1024, probe.totalMemory)
+            mock_time.return_value = 109
+            self.assertEqual(160, probe.reservedMemory)
+            self.assertEqual(2, mock_read.call_count)
+
+            # Only the reservation can change.
+            mock_time.return_value = 111
+            self.assertEqual(4 * 1024, probe.totalMemory)
+            self.assertEqual("x86_64", probe.arch)
+            self.assertEqual(2, mock_read.call_count)
+            self.assertEqual(160, probe.reservedMemory)
+            self.assertEqual(3, mock_read.call_count)
+
+            self.assertEqual("x86_64", probe.arch)
+            self.assertEqual(1, mock_arch.call_count)
+
+    @patch("blivet.arch.get_arch", return_value="x86_64")
+    def test_memory_probe_no_crash_size(self, _mock_arch):
+        mock_read = MockBuiltinRead({PROC_MEMINFO: X86_INFO_FIXTURE[PROC_MEMINFO]})
+        probe = common.MemoryProbe()
+
+        with patch("builtins.open", mock_read):
+            self.assertEqual(0, probe.reservedMemory)
+            self.assertEqual(0, probe.reservedMemory)
+            self.assertEqual(1, mock_read.call_count)
+
+class KdumpLuksDevicesTestCase(TestCase):
+
+    def _get_luks_devices(self, device_tree, max_calls=16, cancel=None):
+        with patch("com_redhat_kdump.common.STORAGE") as mock_storage, \
+                patch("com_redhat_kdump.common.DeviceData") as mock_data:
+            mock_storage.get_proxy.return_value = device_tree
+            mock_data.from_structure = lambda structure: SimpleNamespace(**structure)
+            device_tree.GetDeviceTree = lambda: "/tree"
+            return common.getLuksDevices("/partitioning", max_calls=max_calls, cancel=cancel)
+
+    def test_luks_devices(self):
+        devices = {"sda": "disk", "sda1": "partition", "luks-sda2": "luks/dm-crypt"}
+
+        for max_calls in (1, 4):
+            device_tree = MockDeviceTree(devices)
+            self.assertEqual(["luks-sda2"], self._get_luks_devices(device_tree, max_calls))
+            self.assertEqual(3, device_tree.calls)
+
+    def test_luks_devices_empty(self):
+        device_tree = MockDeviceTree({})
+        self.assertEqual([], self._get_luks_devices(device_tree, 4))
+        self.assertEqual(0, device_tree.calls)
+
+    def test_luks_devices_max_calls(self):
+        device_tree = MockDeviceTree(synthetic_device_tree(200), latency=0.001)
+        self._get_luks_devices(device_tree, 8)
+        self.assertEqual(200, device_tree.calls)
+        self.assertLessEqual(device_tree.max_in_flight, 8)
+        self.assertGreater(device_tree.max_in_flight, 1)
+
+    def test_luks_devices_cancel(self):
+        cancel = threading.Event()
+        device_tree = MockDeviceTree(synthetic_device_tree(200), latency=0.001)
+
+        timer = threading.Timer(0.01, cancel.set)
+        timer.start()
+        result = self._get_luks_devices(device_tree, 2, cancel)
+        timer.join()
+
+        self.assertIsNone(result)
+        self.assertLess(device_tree.calls, 200)
+
+    def test_luks_devices_not_cancelled(self):
+        device_tree = MockDeviceTree({"luks-sda2": "luks/dm-crypt"})
+        result = self._get_luks_devices(device_tree, cancel=threading.Event())
+        self.assertEqual(["luks-sda2"], result)
+
+    def test_luks_devices_concurrent(self):
+        devices = synthetic_device_tree(400)
+
+        serial_tree = MockDeviceTree(devices, latency=0.001)
+        serial = self._get_luks_devices(serial_tree, 1)
+
+        concurrent_tree = MockDeviceTree(devices, latency=0.001)
+        concurrent = self._get_luks_devices(concurrent_tree, 16)
+
+        self.assertEqual(serial, concurrent)
+        self.assertEqual(40, len(concurrent))
+        self.assertEqual(1, serial_tree.max_in_flight)
+        self.assertGreater(concurrent_tree.max_in_flight, 1)
+        self.assertLessEqual(concurrent_tree.max_in_flight, 16)
+
+
+class KdumpTargetLuksDevicesTestCase(TestCase):
+
+    DEVICES = {
+        "sda": "disk", "sda1": "partition", "sda2": "partition", "luks-sda2": "luks/dm-crypt",
+        "sdb": "disk", "sdb1": "partition",
+    }
+    PARENTS = {"sda1": ["sda"], "sda2": ["sda"], "luks-sda2": ["sda2"], "sdb1": ["sdb"]}
+
+    def setUp(self):
+        common.storageProbe.invalidate()
+
+    def _get_luks_devices(self, device_tree, kdump_conf=None, cancel=None):
+        with patch("com_redhat_kdump.common.STORAGE") as mock_storage, \
+                patch("com_redhat_kdump.common.DeviceData") as mock_data:
+            mock_storage.get_proxy.return_value = device_tree
+            mock_data.from_structure = lambda structure: SimpleNamespace(**structure)
+            device_tree.GetDeviceTree = lambda: "/tree"
+            return common.getTargetLuksDevices("/partitioning", kdump_conf, cancel=cancel)
+
+    def _get_device_tree(self, mount_points):
+        return MockDeviceTree(self.DEVICES, parents=self.PARENTS, mount_points=mount_points)
+
+    def test_default_path(self):
+        device_tree = self._get_device_tree({"/": "luks-sda2", "/boot": "sda1"})
+        self.assertEqual(["luks-sda2"], self._get_luks_devices(device_tree))
+        self.assertEqual(3, device_tree.calls)
+
+        device_tree = self._get_device_tree({"/": "luks-sda2", "/var/crash": "sdb1"})
+        self.assertEqual([], self._get_luks_devices(device_tree))
+        self.assertEqual(2, device_tree.calls)
+
+    def test_configured_path(self):
+        device_tree = self._get_device_tree({"/": "luks-sda2", "/srv": "sdb1"})
+        self.assertEqual([], self._get_luks_devices(device_tree, {"path": "/srv/crash"}))
+
+        # The mount point has to match whole path components.
+        device_tree = self._get_device_tree({"/": "luks-sda2", "/sr": "sdb1"})
+        self.assertEqual(["luks-sda2"], self._get_luks_devices(device_tree, {"path": "/srv/crash"}))
+
+    def test_configured_target(self):
+        device_tree = self._get_device_tree({"/": "luks-sda2"})
+        self.assertEqual([], self._get_luks_devices(device_tree, {"xfs": "/dev/sdb1"}))
+
+        device_tree = self._get_device_tree({"/": "sdb1"})
+        self.assertEqual(["luks-sda2"], self._get_luks_devices(device_tree, {"ext4": "luks-sda2"}))
+
+        device_tree = self._get_device_tree({"/": "luks-sda2"})
+        self.assertEqual([], self._get_luks_devices(device_tree, {"nfs": "server:/export"}))
+        self.assertEqual(0, device_tree.calls)
+
+    def test_shared_ancestors(self):
+        devices = {"sda": "disk", "sdb": "disk", "md0": "mdarray", "luks-md0": "luks/dm-crypt",
+                   "vg-root": "lvmlv", "vg": "lvmvg"}
+        parents = {"md0": ["sda", "sdb"], "luks-md0": ["md0"], "vg": ["luks-md0", "sda"],
+                   "vg-root": ["vg"]}
+        device_tree = MockDeviceTree(devices, parents=parents, mount_points={"/": "vg-root"})
+
+        self.assertEqual(["luks-md0"], self._get_luks_devices(device_tree))
+        self.assertEqual(6, device_tree.calls)
+
+    def test_target_not_found(self):
+        device_tree = self._get_device_tree({})
+        self.assertEqual(["luks-sda2"], self._get_luks_devices(device_tree))
+        self.assertEqual(len(self.DEVICES), device_tree.calls)
+
+    def test_cancel(self):
+        cancel = threading.Event()
+        cancel.set()
+
+        device_tree = self._get_device_tree({"/": "luks-sda2"})
+        self.assertIsNone(self._get_luks_devices(device_tree, cancel=cancel))
+        self.assertEqual(0, device_tree.calls)
+
+    def test_large_tree(self):
+        devices = synthetic_device_tree(400)
+        devices.update({"sdz": "disk", "sdz1": "partition"})
+        device_tree = MockDeviceTree(devices, parents={"sdz1": ["sdz"]}, mount_points={"/": "sdz1"})
+
+        self.assertEqual([], self._get_luks_devices(device_tree))
+        self.assertEqual(2, device_tree.calls)
+
+
+class KdumpStorageProbeTestCase(TestCase):
+
+    def setUp(self):
+        self._probe = common.StorageProbe()
+        self._devices = {"sda": "disk", "sda1": "partition", "sda2": "partition"}
+        self._parents = {"sda1": ["sda"], "sda2": ["sda"]}
+        self._mount_points = {"/": "sda2", "/boot": "sda1"}
+
+    def _scan(self, kdump_conf=None):
+        device_tree = MockDeviceTree(dict(self._devices), parents=dict(self._parents),
+                                     mount_points=dict(self._mount_points))
+
+        with patch("com_redhat_kdump.common.STORAGE") as mock_storage, \
+                patch("com_redhat_kdump.common.DeviceData") as mock_data:
+            mock_storage.get_proxy.return_value = device_tree
+            mock_data.from_structure = lambda structure: SimpleNamespace(**structure)
+            device_tree.GetDeviceTree = lambda: "/tree"
+            result = self._probe.getTargetLuksDevices("/partitioning", kdump_conf)
+
+        return result, device_tree.calls
+
+    def test_unchanged_tree(self):
+        self.assertEqual(self._scan(), ([], 2))
+
+        # The same device tree of a new partitioning is not scanned again.
+        for _i in range(5):
+            self.assertEqual(self._scan(), ([], 0))
+
+        # Other directives of kdump.conf change the fingerprint.
+        self.assertEqual(self._scan({"path": "/boot/crash"}), ([], 1))
+        self.assertEqual(self._scan({"path": "/boot/crash"}), ([], 0))
+
+    def test_added_devices(self):
+        self.assertEqual(self._scan(), ([], 2))
+
+        self._devices["luks-sda2"] = "luks/dm-crypt"
+        self._parents["luks-sda2"] = ["sda2"]
+        self._mount_points["/"] = "luks-sda2"
+
+        # Only the new device is fetched.
+        self.assertEqual(self._scan(), (["luks-sda2"], 1))
+
+    def test_changed_devices(self):
+        self.assertEqual(self._scan(), ([], 2))
+
+        # The device sda2 is moved from sda to sdb.
+        del self._devices["sda1"], self._devices["sda"], self._parents["sda1"]
+        self._devices["sdb"] = "disk"
+        self._parents["sda2"] = ["sdb"]
+        self._mount_points = {"/": "sda2"}
+
+        self.assertEqual(self._scan(), ([], 2))
+
+    def test_target_not_found(self):
+        self._mount_points = {}
+        self.assertEqual(self._scan(), ([], 3))
+
+        self._devices["luks-sdb"] = "luks/dm-crypt"
+        self.assertEqual(self._scan(), (["luks-sdb"], 1))
+
+    def test_invalidate(self):
+        self.assertEqual(self._scan(), ([], 2))
+        self._probe.invalidate()
+        self.assertEqual(self._scan(), ([], 2))
+
+    def test_luks_devices_cache(self):
+        device_tree = MockDeviceTree({"sda": "disk", "luks-sda1": "luks/dm-crypt"})
+        cache = {"sda": SimpleNamespace(name="sda", type="disk", parents=[])}
+
+        with patch("com_redhat_kdump.common.STORAGE") as mock_storage, \
+                patch("com_redhat_kdump.common.DeviceData") as mock_data:
+            mock_storage.get_proxy.return_value = device_tree
+            mock_data.from_structure = lambda structure: SimpleNamespace(**structure)
+            device_tree.GetDeviceTree = lambda: "/tree"
+            self.assertEqual(common.getLuksDevices("/partitioning", cache=cache), ["luks-sda1"])
+
+        self.assertEqual(device_tree.calls, 1)
+        self.assertEqual(set(cache), {"sda", "luks-sda1"})
+
+
+class KdumpTargetModulesTestCase(TestCase):
+
+    DEVICES = {
+        "sda": "disk", "sda1": "partition", "sda2": "partition",
+        "nvme0n1": "disk", "nvme0n1p1": "partition", "nvme1n1": "disk", "nvme1n1p1": "partition",
+        "md127": "mdarray", "luks-md127": "luks/dm-crypt", "rhel-crash": "lvmlv",
+    }
+    PARENTS = {
+        "sda1": ["sda"], "sda2": ["sda"], "nvme0n1p1": ["nvme0n1"], "nvme1n1p1": ["nvme1n1"],
+        "md127": ["nvme0n1p1", "nvme1n1p1"], "luks-md127": ["md127"], "rhel-crash": ["luks-md127"],
+    }
+    SYSFS_MODULES = {
+        "/sys/block/sda/device": {"sd_mod", "ahci"},
+        "/sys/block/nvme0n1/device": {"nvme"},
+        "/sys/block/nvme1n1/device": {"nvme"},
+    }
+
+    def _get_target_modules(self, mount_points, kdump_conf=None, unknown=None, devices=None):
+        device_tree = MockDeviceTree(devices or self.DEVICES, parents=self.PARENTS,
+                                     mount_points=mount_points,
+                                     attrs={"md127": {"level": "raid1"}})
+
+        with patch("com_redhat_kdump.common.DeviceData") as mock_data, \
+                patch("com_redhat_kdump.common._getSysfsDrivers") as mock_sysfs:
+            mock_data.from_structure = lambda structure: SimpleNamespace(**structure)
+            mock_sysfs.side_effect = lambda path, link: self.SYSFS_MODULES.get(path, set())
+            return common.getTargetModules(device_tree, kdump_conf, unknown=unknown)
+
+    def test_target_modules(self):
+        self.assertEqual(self._get_target_modules({"/": "sda2", "/var/crash": "rhel-crash"}), {
+            "dm_mod", "dm_crypt", "md_mod", "raid1", "nvme"
+        })
+        self.assertEqual(self._get_target_modules({"/": "sda2", "/var": "rhel-crash"}, {
+            "xfs": "/dev/sda1"
+        }), {"sd_mod", "ahci"})
+
+    def test_target_modules_unknown(self):
+        self.assertIsNone(self._get_target_modules({"/": "sda2"}, {"nfs": "server:/dumps"}))
+        self.assertIsNone(self._get_target_modules({"/boot": "sda1"}))
+
+    def test_target_modules_partial(self):
+        unknown = []
+        self.assertEqual(self._get_target_modules({"/var/crash": "rhel-crash"}, unknown=unknown), {
+            "dm_mod", "dm_crypt", "md_mod", "raid1", "nvme"
+        })
+        self.assertEqual(unknown, [])
+
+        # A layer without known modules.
+        self._get_target_modules({"/var/crash": "rhel-crash"}, unknown=unknown,
+                                 devices=dict(self.DEVICES, md127="bcache"))
+        self.assertEqual(unknown, ["md127"])
+
+        # A disk without modules in sysfs.
+        unknown = []
+        self._get_target_modules({"/var/crash": "vda"}, unknown=unknown,
+                                 devices=dict(self.DEVICES, vda="disk"))
+        self.assertEqual(unknown, ["vda"])
+
+    def test_modules_saving(self):
+        reservation.loadReservationRules(path=None)
+        self.addCleanup(setattr, reservation, "_reservationRules", None)
+
+        sizes = {"/sys/module/mlx5_core/coresize": "2097152", "/sys/module/ahci/coresize": "1048576"}
+
+        with patch("builtins.open", MockBuiltinRead(sizes)):
+            self.assertEqual(common.estimateModulesSaving(["mlx5_core", "ahci", "qla2xxx"], "aarch64"), 153)
+            self.assertEqual(common.estimateModulesSaving(["mlx5_core", "ahci"], "x86_64"), 3)
+
+
+class KdumpCapabilitiesTestCase(TestCase):
+
+    def setUp(self):
+        common.memoryProbe.invalidate()
+
+    def _probe(self, file_map, arch="x86_64", fadump=False):
+        with patch("builtins.open", MockBuiltinRead(file_map)), \
+                patch("blivet.arch.get_arch", return_value=arch), \
+                patch("os.path.exists", return_value=fadump) as mock_exists:
+            capabilities = common.probeCapabilities()
+
+        mock_exists.assert_called_once_with(FADUMP_CAPABLE_FILE)
+        return capabilities
+
+    def test_capabilities_x86(self):
+        file_map = dict(X86_INFO_FIXTURE)
+        file_map[PROC_MEMINFO] += "CmaTotal:              0 kB\n"
+        file_map[KERNEL_CONFIG] = "CONFIG_KEXEC=y\nCONFIG_KEXEC_FILE=y\n"
+
+        capabilities = self._probe(file_map)
+        self.assertEqual(capabilities.fadump, False)
+        self.assertEqual(capabilities.crashkernel_high_low, True)
+        self.assertEqual(capabilities.crashkernel_cma, True)
+        self.assertEqual(capabilities.kexec_file_load, True)
+        self.assertEqual(capabilities.current_reservation, 160)
+
+    def test_capabilities_ppc64le(self):
+        file_map = dict(PPC64_INFO_FIXTURE)
+        file_map[KERNEL_CONFIG] = "CONFIG_KEXEC=y\n# CONFIG_KEXEC_FILE is not set\n"
+
+        capabilities = self._probe(file_map, arch="ppc64le", fadump=True)
+        self.assertEqual(capabilities.fadump, True)
+        self.assertEqual(capabilities.crashkernel_high_low, False)
+        self.assertEqual(capabilities.crashkernel_cma, False)
+        self.assertEqual(capabilities.kexec_file_load, False)
+        self.assertEqual(capabilities.current_reservation, 1024)
+
+    def test_capabilities_kallsyms(self):
+        file_map = dict(X86_INFO_FIXTURE)
+        file_map["/proc/kallsyms"] = ("0000000000000000 T __x64_sys_kexec_load\n"
+                                      "0000000000000000 T sys_kexec_file_load\n")
+
+        self.assertEqual(self._probe(file_map).kexec_file_load, True)
+
+        del file_map["/proc/kallsyms"]
+        self.assertEqual(self._probe(file_map).kexec_file_load, False)
+
+
+class KdumpDumpEstimateTestCase(TestCase):
+
+    def setUp(self):
+        common.memoryProbe.invalidate()
+        self.addCleanup(setattr, common, "_memUsage", None)
+        self.addCleanup(setattr, common, "_memUsageProbed", False)
+
+    def _estimate(self, level):
+        with patch("builtins.open", MockBuiltinRead(X86_INFO_FIXTURE)), \
+                patch("blivet.arch.get_arch", return_value="x86_64"):
+            return common.getDumpEstimate(level)
+
+    @patch("pyanaconda.core.util.execWithCapture")
+    def test_mem_usage(self, mock_exec):
+        mock_exec.return_value = ("TYPE\t\tPAGES\t\tEXCLUDABLE\tDESCRIPTION\n"
+                                  "ZERO\t\t0\t\tyes\t\tPages filled with zero\n"
+                                  "FREE\t\t800\t\tyes\t\tFree pages\n"
+                                  "KERN_DATA\t200\t\tno\t\tDumpable kernel data\n"
+                                  "Total pages on system:\t1000\n")
+
+        model = self._estimate(31)
+        self.assertEqual(common.probeMemUsage(), {"ZERO": 0.0, "FREE": 0.8, "KERN_DATA": 0.2})
+        self.assertGreater(self._estimate(31), model)
+
+        # The system is probed only once.
+        self.assertEqual(common.probeMemUsage(), {"ZERO": 0.0, "FREE": 0.8, "KERN_DATA": 0.2})
+        mock_exec.assert_called_once()
+
+    @patch("pyanaconda.core.util.execWithCapture", side_effect=FileNotFoundError)
+    def test_mem_usage_unavailable(self, mock_exec):
+        model = self._estimate(31)
+        self.assertEqual(common.probeMemUsage(), None)
+        self.assertEqual(self._estimate(31), model)
+
+        self.assertEqual(common.probeMemUsage(), None)
+        mock_exec.assert_called_once()
@@ -0,0 +1,95 @@
+from unittest.case import TestCase
+from com_redhat_kdump.crashkernel import CrashkernelTable, parse_size, format_size, parse_reserved_memory, \
+    get_crashkernel_value, get_reservation, add_crashkernel, get_kernel_arguments
+
+
+class KdumpCrashkernelTestCase(TestCase):
+
+    def test_size(self):
+        self.assertEqual(parse_size("512"), 512)
+        self.assertEqual(parse_size("192M"), 192 * 1024 ** 2)
+        self.assertEqual(parse_size("4g"), 4 * 1024 ** 3)
+        self.assertRaises(ValueError, parse_size, "")
+        self.assertRaises(ValueError, parse_size, "4X")
+
+        self.assertEqual(format_size(192 * 1024 ** 2), "192M")
+        self.assertEqual(format_size(1024 ** 4), "1T")
+        self.assertEqual(format_size(1536 * 1024 ** 2), "1536M")
+        self.assertEqual(format_size(0), "0")
+
+    def test_table(self):
+        table = CrashkernelTable.parse("4G-64G:256M,1G-4G:192M,64G-:512M")
+        self.assertEqual(str(table), "1G-4G:192M,4G-64G:256M,64G-:512M")
+
+        self.assertEqual(table.lookup(512), 0)
+        self.assertEqual(table.lookup(1024), 192)
+        self.assertEqual(table.lookup(4 * 1024 - 1), 192)
+        self.assertEqual(table.lookup(4 * 1024), 256)
+        self.assertEqual(table.lookup(64 * 1024), 512)
+        self.assertEqual(table.lookup(64 * 1024 * 1024), 512)
+
+    def test_table_gap_and_offset(self):
+        table = CrashkernelTable.parse("1G-2G:128M,4G-8G:256M@16M")
+        self.assertEqual(str(table), "1G-2G:128M,4G-8G:256M@16M")
+        self.assertEqual(table.lookup(3 * 1024), 0)
+        self.assertEqual(table.lookup(8 * 1024), 0)
+
+    def test_table_invalid(self):
+        for value in ["", "1G-4G", "192M", "4G-1G:192M", "1G-4G:192M,2G-:256M",
+                      "1G-:192M,4G-:256M", "1G-4G:abc"]:
+            self.assertRaises(ValueError, CrashkernelTable.parse, value)
+
+    def test_reserved_memory(self):
+        self.assertEqual(parse_reserved_memory("auto"), (("*", "auto"),))
+        self.assertEqual(parse_reserved_memory("256"), (("*", 256),))
+        self.assertEqual(parse_reserved_memory("256M"), (("*", 256),))
+        self.assertEqual(
+            parse_reserved_memory("1G-:256M"),
+            (("*", CrashkernelTable.parse("1G-:256M")),)
+        )
+        self.assertRaises(ValueError, parse_reserved_memory, "")
+        self.assertRaises(ValueError, parse_reserved_memory, "invalid")
+        self.assertRaises(ValueError, parse_reserved_memory, "x86_64=1G-:256M;ppc64le")
+
+    def test_reserved_memory_map(self):
+        value = "x86_64=1G-4G:192M,4G-:256M;ppc64*=2G-:1G;*=auto"
+
+        self.assertEqual(get_crashkernel_value(value, "x86_64"), "1G-4G:192M,4G-:256M")
+        self.assertEqual(get_crashkernel_value(value, "ppc64le"), "2G-:1G")
+        self.assertEqual(get_crashkernel_value(value, "aarch64"), "auto")
+        self.assertEqual(get_crashkernel_value("x86_64=512", "s390x"), None)
+        self.assertEqual(get_crashkernel_value("x86_64=512", "x86_64"), "512M")
+
+        self.assertEqual(get_reservation(value, "x86_64", 16 * 1024), 256)
+        self.assertEqual(get_reservation(value, "ppc64le", 16 * 1024), 1024)
+        self.assertEqual(get_reservation(value, "aarch64", 16 * 1024), None)
+
+    def test_add_crashkernel(self):
+        self.assertEqual(add_crashkernel("256M", 32), "288M")
+        self.assertEqual(add_crashkernel("1G", 64), "1088M")
+        self.assertEqual(add_crashkernel("1G-4G:192M,4G-:256M", 32), "1G-4G:224M,4G-:288M")
+        self.assertEqual(add_crashkernel("1G-:256M@16M", 16), "1G-:272M@16M")
+        self.assertEqual(add_crashkernel("512M,high", 64), "576M,high")
+        self.assertRaises(ValueError, add_crashkernel, "invalid", 16)
+
+    def test_kernel_arguments_dump_threads(self):
+        def get_args(reserved_memory, fadump_enabled=False):
+            return get_kernel_arguments(
+                kdump_enabled=True,
+                fadump_enabled=fadump_enabled,
+                fadump_capable=True,
+                reserved_memory=reserved_memory,
+                arch="x86_64",
+                get_default=lambda: "1G-4G:192M,4G-:256M",
+                dump_threads=4
+            )
+
+        self.assertEqual(get_args("auto"), ["crashkernel=1G-4G:256M,4G-:320M"])
+        self.assertEqual(get_args("1G-:512M"), ["crashkernel=1G-:576M"])
+
+        # An amount in MB is used as it is.
+        self.assertEqual(get_args("512"), ["crashkernel=512M"])
+
+        # The threads don't apply to fadump.
+        self.assertEqual(get_args("auto", fadump_enabled=True),
+                         ["fadump=on", "crashkernel=1G-4G:192M,4G-:256M"])
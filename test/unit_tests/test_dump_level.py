@@ -0,0 +1,122 @@
+from unittest.case import TestCase
+from com_redhat_kdump.dump_level import check_dump_level, get_dump_level, set_dump_level, \
+    check_dump_threads, pick_dump_threads, set_dump_threads, parse_mem_usage, estimate_dump, format_dump_size, format_duration
+
+MAKEDUMPFILE_MEM_USAGE = """\
+The kernel version is not supported.
+The makedumpfile operation may be incomplete.
+
+TYPE		PAGES			EXCLUDABLE	DESCRIPTION
+----------------------------------------------------------------------
+ZERO		100      		yes		Pages filled with zero
+NON_PRI_CACHE	200      		yes		Cache pages without private flag
+PRI_CACHE	50       		yes		Cache pages with private flag
+USER		150      		yes		User process pages
+FREE		400      		yes		Free pages
+KERN_DATA	100      		no		Dumpable kernel data
+
+page size:		4096
+Total pages on system:	1000
+Total size on system:	4096000          Byte
+"""
+
+
+class KdumpDumpLevelTestCase(TestCase):
+
+    def test_check_dump_level(self):
+        check_dump_level(0)
+        check_dump_level(31)
+
+        with self.assertRaises(ValueError):
+            check_dump_level(32)
+
+        with self.assertRaises(ValueError):
+            check_dump_level(-1)
+
+    def test_get_dump_level(self):
+        self.assertEqual(get_dump_level("makedumpfile -l --message-level 7 -d 31"), 31)
+        self.assertEqual(get_dump_level("makedumpfile -l -d1"), 1)
+        self.assertEqual(get_dump_level("makedumpfile -l --dump-level=17"), 17)
+        self.assertEqual(get_dump_level("makedumpfile -l"), None)
+        self.assertEqual(get_dump_level("cp --sparse=always"), None)
+        self.assertEqual(get_dump_level(""), None)
+
+    def test_set_dump_level(self):
+        self.assertEqual(set_dump_level("makedumpfile -l --message-level 7 -d 31", 1),
+                         "makedumpfile -l --message-level 7 -d 1")
+        self.assertEqual(set_dump_level("makedumpfile -l -d1 -F", 17), "makedumpfile -l -d 17 -F")
+        self.assertEqual(set_dump_level("makedumpfile --dump-level 3 -c", 0), "makedumpfile -d 0 -c")
+        self.assertEqual(set_dump_level("makedumpfile -l", 31), "makedumpfile -l -d 31")
+        self.assertEqual(set_dump_level("cp --sparse=always", 31), "cp --sparse=always")
+
+    def test_check_dump_threads(self):
+        check_dump_threads(0)
+        check_dump_threads(64)
+
+        with self.assertRaises(ValueError):
+            check_dump_threads(65)
+
+        with self.assertRaises(ValueError):
+            check_dump_threads(-1)
+
+    def test_pick_dump_threads(self):
+        self.assertEqual(pick_dump_threads(None), 0)
+        self.assertEqual(pick_dump_threads(1), 0)
+        self.assertEqual(pick_dump_threads(2), 0)
+        self.assertEqual(pick_dump_threads(4), 3)
+        self.assertEqual(pick_dump_threads(256), 8)
+
+    def test_set_dump_threads(self):
+        self.assertEqual(set_dump_threads("makedumpfile -l --message-level 7 -d 31", 4),
+                         "makedumpfile -l --message-level 7 -d 31 --num-threads 4")
+        self.assertEqual(set_dump_threads("makedumpfile -l --num-threads 2 -d 31", 8),
+                         "makedumpfile -l -d 31 --num-threads 8")
+        self.assertEqual(set_dump_threads("makedumpfile -l --num-threads=2 -d 31", 0),
+                         "makedumpfile -l -d 31")
+        self.assertEqual(set_dump_threads("cp --sparse=always", 4), "cp --sparse=always")
+
+    def test_parse_mem_usage(self):
+        self.assertEqual(parse_mem_usage(MAKEDUMPFILE_MEM_USAGE), {
+            "ZERO": 0.1,
+            "NON_PRI_CACHE": 0.2,
+            "PRI_CACHE": 0.05,
+            "USER": 0.15,
+            "FREE": 0.4,
+            "KERN_DATA": 0.1,
+        })
+        self.assertEqual(parse_mem_usage(""), None)
+        self.assertEqual(parse_mem_usage(None), None)
+
+    def test_estimate_dump(self):
+        mem_usage = parse_mem_usage(MAKEDUMPFILE_MEM_USAGE)
+
+        size, _duration = estimate_dump(1000, 0, mem_usage)
+        self.assertAlmostEqual(size, 1000 / 3)
+
+        size, _duration = estimate_dump(1000, 31, mem_usage)
+        self.assertAlmostEqual(size, 100 / 3)
+
+        # The level 4 excludes all cache pages.
+        size, _duration = estimate_dump(1000, 4, mem_usage)
+        self.assertAlmostEqual(size, 750 / 3)
+
+        size, _duration = estimate_dump(1000, 2, mem_usage)
+        self.assertAlmostEqual(size, 800 / 3)
+
+    def test_estimate_dump_model(self):
+        total = 4 * 1024 ** 2
+        estimates = [estimate_dump(total, level) for level in (0, 1, 17, 31)]
+
+        # The higher levels dump fewer pages faster.
+        self.assertEqual(estimates, sorted(estimates, reverse=True))
+
+        # A dump of a multi-TB host with the level 1 takes hours.
+        self.assertGreater(estimate_dump(total, 1)[1], 3600)
+
+    def test_format(self):
+        self.assertEqual(format_dump_size(512), "512 MB")
+        self.assertEqual(format_dump_size(1536), "1.5 GB")
+        self.assertEqual(format_dump_size(3 * 1024 ** 2), "3.0 TB")
+        self.assertEqual(format_duration(10), "< 1 min")
+        self.assertEqual(format_duration(600), "10 min")
+        self.assertEqual(format_duration(3 * 3600 + 300), "3 h 05 min")
@@ -0,0 +1,64 @@
+import importlib
+import sys
+import threading
+from unittest.case import TestCase
+from unittest.mock import patch, MagicMock
+
+from com_redhat_kdump import common
+from com_redhat_kdump.structures import KdumpCapabilities
+from .mock import mock_ui_modules
+
+
+@patch("blivet.arch.get_arch", return_value="x86_64")
+class KdumpGuiSpokeTestCase(TestCase):
+
+    def setUp(self):
+        common.memoryProbe.invalidate()
+
+        patcher = patch.dict(sys.modules, mock_ui_modules())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        sys.modules.pop("com_redhat_kdump.gui.spokes.kdump", None)
+        self._module = importlib.import_module("com_redhat_kdump.gui.spokes.kdump")
+
+    def _create_spoke(self):
+        proxy = MagicMock()
+        proxy.KdumpEnabled = True
+        proxy.Capabilities = KdumpCapabilities.to_structure(KdumpCapabilities())
+
+        with patch.object(self._module, "get_kdump_proxy", return_value=proxy):
+            return self._module.KdumpSpoke()
+
+    def _scan_storage(self, spoke, **kwargs):
+        spoke._scanGeneration += 1
+        spoke._ready = False
+
+        with patch.object(self._module, "STORAGE_SCAN_DELAY", 0), \
+                patch.object(self._module, "gtk_call_once", lambda func, *args: func(*args)), \
+                patch.object(self._module, "getTargetLuksDevices", **kwargs), \
+                patch.object(self._module, "hubQ") as hub_q, \
+                patch.object(self._module, "tracer"):
+            spoke._scan_storage("/partitioning", {}, spoke._scanGeneration, threading.Event())
+
+        return hub_q
+
+    def test_scan_storage(self, _mock_arch):
+        spoke = self._create_spoke()
+        hub_q = self._scan_storage(spoke, return_value=["luks-sda2"])
+
+        self.assertTrue(spoke.ready)
+        self.assertEqual(spoke._luks_devs, ["luks-sda2"])
+        hub_q.send_ready.assert_called_once_with("KdumpSpoke")
+
+    def test_scan_storage_failed(self, _mock_arch):
+        spoke = self._create_spoke()
+        spoke._luks_devs = ["luks-sda2"]
+
+        # The spoke is ready with the previous devices.
+        with self.assertLogs(self._module.log, "ERROR"):
+            hub_q = self._scan_storage(spoke, side_effect=RuntimeError("DBus error"))
+
+        self.assertTrue(spoke.ready)
+        self.assertEqual(spoke._luks_devs, ["luks-sda2"])
+        hub_q.send_ready.assert_called_once_with("KdumpSpoke")
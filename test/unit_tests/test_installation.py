@@ -1,10 +1,32 @@
+import os
+import sys
+import tempfile
+import time
 from unittest.case import TestCase
-from unittest.mock import patch
-from com_redhat_kdump.constants import FADUMP_CAPABLE_FILE
-from com_redhat_kdump.service.installation import KdumpBootloaderConfigurationTask, KdumpInstallationTask
+from unittest.mock import patch, ANY
+from com_redhat_kdump.codec import generate_pages, benchmark_codecs
+from com_redhat_kdump.service.installation import KdumpBootloaderConfigurationTask, KdumpInstallationTask, \
+    KdumpConfigurationTask, KdumpCodecSelectionTask, KdumpDriversTask, KdumpKernelArgumentsTask, \
+    KdumpInitramfsTask, DefaultCrashkernel, get_installed_kernels
 
 SYSROOT = "/sysroot"
 
+
+def mock_kdumpctl(values):
+    """Return a fake execWithCapture of kdumpctl with the values per kernel version."""
+    def execWithCapture(command, argv, **kwargs):
+        kernel_version = argv[2] if len(argv) > 2 else None
+        return values.get(kernel_version)
+
+    return execWithCapture
+
+def write_kernel(root, kernel_version):
+    path = os.path.join(root, "usr/lib/modules", kernel_version)
+    os.makedirs(path, exist_ok=True)
+
+    with open(os.path.join(path, "vmlinuz"), "w") as f:
+        f.write("")
+
 class KdumpInstallationTestCase(TestCase):
 
     @patch("pyanaconda.core.util.execWithCapture")
@@ -49,6 +71,46 @@ class KdumpInstallationTestCase(TestCase):
         ]
         mock_exec.assert_not_called()
 
+    @patch("pyanaconda.core.util.execWithCapture")
+    @patch("com_redhat_kdump.service.installation.memoryProbe")
+    @patch("com_redhat_kdump.service.installation.STORAGE")
+    def test_configuration_kdump_range_table(self, mock_storage, mock_probe, mock_exec):
+        mock_probe.arch = "ppc64le"
+        bootloader_proxy = mock_storage.get_proxy.return_value
+        bootloader_proxy.ExtraArguments = ["a=1", "crashkernel=128M"]
+
+        task = KdumpBootloaderConfigurationTask(
+            sysroot="/",
+            kdump_enabled=True,
+            fadump_enabled=False,
+            reserved_memory="x86_64=1G-4G:192M,4G-:256M;ppc64*=4G-16G:512M,16G-:1G"
+        )
+        task.run()
+
+        assert bootloader_proxy.ExtraArguments == [
+            "a=1", "crashkernel=4G-16G:512M,16G-:1G"
+        ]
+        mock_exec.assert_not_called()
+
+    @patch("pyanaconda.core.util.execWithCapture")
+    @patch("com_redhat_kdump.service.installation.memoryProbe")
+    @patch("com_redhat_kdump.service.installation.STORAGE")
+    def test_configuration_kdump_range_table_no_arch(self, mock_storage, mock_probe, mock_exec):
+        mock_probe.arch = "s390x"
+        mock_exec.return_value = '1G-:256M'
+        bootloader_proxy = mock_storage.get_proxy.return_value
+        bootloader_proxy.ExtraArguments = ["a=1"]
+
+        task = KdumpBootloaderConfigurationTask(
+            sysroot=SYSROOT,
+            kdump_enabled=True,
+            fadump_enabled=False,
+            reserved_memory="x86_64=1G-4G:192M,4G-:256M"
+        )
+        task.run()
+
+        assert bootloader_proxy.ExtraArguments == ["a=1", "crashkernel=1G-:256M"]
+
     @patch("pyanaconda.core.util.execWithCapture")
     def test_configuration_get_default_crashkernel_file_not_found(self, mock_exec):
         mock_exec.side_effect = [None, FileNotFoundError]
@@ -89,9 +151,83 @@ class KdumpInstallationTestCase(TestCase):
         assert res is '256M'
 
     @patch("pyanaconda.core.util.execWithCapture")
-    @patch("com_redhat_kdump.service.installation.os")
+    def test_default_crashkernel_cache(self, mock_exec):
+        mock_exec.return_value = "1G-4G:192M,4G-:256M\n"
+        default_crashkernel = DefaultCrashkernel(SYSROOT)
+
+        for _i in range(2):
+            self.assertEqual(default_crashkernel.get("kdump"), "1G-4G:192M,4G-:256M")
+            self.assertEqual(default_crashkernel.get("kdump", "6.1.0-1.aarch64+64k"), "1G-4G:192M,4G-:256M")
+            self.assertEqual(default_crashkernel.get("fadump"), "1G-4G:192M,4G-:256M")
+
+        self.assertEqual([c[1]["argv"] for c in mock_exec.call_args_list], [
+            ["get-default-crashkernel", "kdump"],
+            ["get-default-crashkernel", "kdump", "6.1.0-1.aarch64+64k"],
+            ["get-default-crashkernel", "fadump"],
+        ])
+
+        # The values are kept by the instance only.
+        DefaultCrashkernel(SYSROOT).get("kdump")
+        self.assertEqual(mock_exec.call_count, 4)
+
+    @patch("pyanaconda.core.util.execWithCapture")
+    def test_default_crashkernel_installer(self, mock_exec):
+        def execWithCapture(command, argv, **kwargs):
+            # The installed kdumpctl fails.
+            return "1G-:192M\n" if command == "/usr/bin/kdumpctl" else None
+
+        mock_exec.side_effect = execWithCapture
+        default_crashkernel = DefaultCrashkernel(SYSROOT)
+
+        self.assertEqual(default_crashkernel.get_all("kdump", ["6.1.0-1.aarch64", "6.1.0-2.aarch64"]), {
+            "6.1.0-1.aarch64": "1G-:192M",
+            "6.1.0-2.aarch64": "1G-:192M",
+        })
+        self.assertEqual(default_crashkernel.get("kdump", "6.1.0-1.aarch64"), "1G-:192M")
+
+        # The installer kdumpctl is asked once without the kernel version.
+        installer_calls = [c[1] for c in mock_exec.call_args_list
+                           if c[1]["command"] == "/usr/bin/kdumpctl"]
+        self.assertEqual(installer_calls, [
+            {"command": "/usr/bin/kdumpctl", "argv": ["get-default-crashkernel", "kdump"],
+             "filter_stderr": True}
+        ])
+
+        # Its value isn't kept as the value of the kernel.
+        mock_exec.side_effect = lambda command, argv, **kwargs: "1G-:256M\n"
+        self.assertEqual(DefaultCrashkernel(SYSROOT).get("kdump", "6.1.0-1.aarch64"), "1G-:256M")
+        self.assertEqual(default_crashkernel._values[("kdump", "6.1.0-1.aarch64")], None)
+
+    @patch("pyanaconda.core.util.execWithCapture")
+    def test_configuration_get_default_crashkernel_kernels(self, mock_exec):
+        mock_exec.side_effect = mock_kdumpctl({
+            None: "1G-:320M\n",
+            "6.1.0-1.aarch64": "1G-4G:256M,4G-:512M\n",
+            "6.1.0-1.aarch64+64k": "1G-4G:384M,4G-:512M\n",
+        })
+
+        task = KdumpBootloaderConfigurationTask(
+            sysroot=SYSROOT,
+            kdump_enabled=True,
+            fadump_enabled=False,
+            reserved_memory="auto",
+            kernels=["6.1.0-1.aarch64"]
+        )
+        self.assertEqual(task.get_default_crashkernel(False), "1G-4G:256M,4G-:512M")
+
+        # The kernels don't share a value.
+        task = KdumpBootloaderConfigurationTask(
+            sysroot=SYSROOT,
+            kdump_enabled=True,
+            fadump_enabled=False,
+            reserved_memory="auto",
+            kernels=["6.1.0-1.aarch64", "6.1.0-1.aarch64+64k"]
+        )
+        self.assertEqual(task.get_default_crashkernel(False), "1G-:320M")
+
+    @patch("pyanaconda.core.util.execWithCapture")
     @patch("com_redhat_kdump.service.installation.STORAGE")
-    def test_configuration_fadump_enabled(self, mock_storage, mock_os, mock_exec):
+    def test_configuration_fadump_enabled(self, mock_storage, mock_exec):
         bootloader_proxy = mock_storage.get_proxy.return_value
         bootloader_proxy.ExtraArguments = [
             "a=1", "b=2", "c=3", "crashkernel=256M"
@@ -101,16 +237,34 @@ class KdumpInstallationTestCase(TestCase):
             sysroot="/",
             kdump_enabled=False,
             fadump_enabled=True,
+            fadump_capable=True,
             reserved_memory="256"
         )
         task.run()
 
-        mock_os.path.exists.assert_called_once_with(FADUMP_CAPABLE_FILE)
         assert bootloader_proxy.ExtraArguments == [
             "a=1", "b=2", "c=3", "fadump=on"
         ]
         mock_exec.assert_not_called()
 
+    @patch("pyanaconda.core.util.execWithCapture")
+    @patch("com_redhat_kdump.service.installation.STORAGE")
+    def test_configuration_fadump_not_capable(self, mock_storage, mock_exec):
+        bootloader_proxy = mock_storage.get_proxy.return_value
+        bootloader_proxy.ExtraArguments = ["a=1", "crashkernel=256M"]
+
+        task = KdumpBootloaderConfigurationTask(
+            sysroot="/",
+            kdump_enabled=False,
+            fadump_enabled=True,
+            fadump_capable=False,
+            reserved_memory="256"
+        )
+        task.run()
+
+        assert bootloader_proxy.ExtraArguments == ["a=1"]
+        mock_exec.assert_not_called()
+
     @patch("pyanaconda.core.util.execWithCapture")
     @patch("com_redhat_kdump.service.installation.STORAGE")
     def test_configuration_kdump_crashkernel_auto(self, mock_storage, mock_exec):
@@ -220,3 +374,384 @@ class KdumpInstallationTestCase(TestCase):
         )
         task.run()
         mock_util.execWithRedirect.assert_not_called()
+
+
+class KdumpConfigurationTaskTestCase(TestCase):
+
+    def test_configuration(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "etc"))
+            path = os.path.join(root, "etc/kdump.conf")
+
+            with open(path, "w") as f:
+                f.write("# The dump target\n#nfs my.server.com:/export/tmp\n"
+                        "path /var/crash\ncore_collector makedumpfile -l -d 31\n")
+
+            os.chmod(path, 0o600)
+
+            task = KdumpConfigurationTask(
+                sysroot=root,
+                kdump_conf={"core_collector": "makedumpfile -c -d 31", "final_action": "poweroff"}
+            )
+            task.run()
+
+            with open(path, "r") as f:
+                self.assertEqual(f.read(), "# The dump target\n#nfs my.server.com:/export/tmp\n"
+                                           "path /var/crash\ncore_collector makedumpfile -c -d 31\n"
+                                           "final_action poweroff\n")
+
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+            self.assertEqual(os.listdir(os.path.join(root, "etc")), ["kdump.conf"])
+
+    def test_configuration_no_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "etc"))
+
+            task = KdumpConfigurationTask(sysroot=root, kdump_conf={"path": "/var/dump"})
+            task.run()
+
+            with open(os.path.join(root, "etc/kdump.conf"), "r") as f:
+                self.assertEqual(f.read(), "path /var/dump\n")
+
+
+    def test_configuration_dump_level(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "etc"))
+            path = os.path.join(root, "etc/kdump.conf")
+
+            with open(path, "w") as f:
+                f.write("path /var/crash\ncore_collector makedumpfile -l --message-level 7 -d 31\n")
+
+            task = KdumpConfigurationTask(sysroot=root, kdump_conf={}, dump_level=1)
+            task.run()
+
+            with open(path, "r") as f:
+                self.assertEqual(f.read(), "path /var/crash\n"
+                                           "core_collector makedumpfile -l --message-level 7 -d 1\n")
+
+            # The level overrides the level of the kickstart core collector.
+            task = KdumpConfigurationTask(
+                sysroot=root,
+                kdump_conf={"core_collector": "makedumpfile -c -d 31"},
+                dump_level=17
+            )
+            task.run()
+
+            with open(path, "r") as f:
+                self.assertEqual(f.read(), "path /var/crash\n"
+                                           "core_collector makedumpfile -c -d 17\n")
+
+    def test_configuration_dump_level_no_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "etc"))
+
+            task = KdumpConfigurationTask(sysroot=root, kdump_conf={}, dump_level=1)
+            task.run()
+
+            with open(os.path.join(root, "etc/kdump.conf"), "r") as f:
+                self.assertEqual(f.read(), "core_collector makedumpfile -l --message-level 7 -d 1\n")
+
+
+    def test_configuration_dump_threads(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "etc/sysconfig"))
+
+            with open(os.path.join(root, "etc/kdump.conf"), "w") as f:
+                f.write("core_collector makedumpfile -l --message-level 7 -d 31\n")
+
+            with open(os.path.join(root, "etc/sysconfig/kdump"), "w") as f:
+                f.write('KDUMP_COMMANDLINE_APPEND="irqpoll nr_cpus=1 reset_devices"\n')
+
+            task = KdumpConfigurationTask(sysroot=root, kdump_conf={}, dump_level=1, dump_threads=4)
+            task.run()
+
+            with open(os.path.join(root, "etc/kdump.conf"), "r") as f:
+                self.assertEqual(
+                    f.read(),
+                    "core_collector makedumpfile -l --message-level 7 -d 1 --num-threads 4\n"
+                )
+
+            with open(os.path.join(root, "etc/sysconfig/kdump"), "r") as f:
+                self.assertEqual(f.read(), 'KDUMP_COMMANDLINE_APPEND="irqpoll nr_cpus=5 reset_devices"\n')
+
+
+class KdumpCodecSelectionTaskTestCase(TestCase):
+
+    def _run_task(self, content, output="lzo\tenabled\nsnappy\tdisabled\nzstd\tenabled\n",
+                  compressors=None):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "etc"))
+            path = os.path.join(root, "etc/kdump.conf")
+
+            with open(path, "w") as f:
+                f.write(content)
+
+            # The installer has no Python bindings of the codecs.
+            bindings = {"lzo": None, "snappy": None, "zstandard": None}
+
+            with patch.dict(sys.modules, bindings), \
+                    patch("com_redhat_kdump.service.installation.generate_pages",
+                          return_value=generate_pages(count=16)), \
+                    patch("com_redhat_kdump.service.installation.benchmark_codecs",
+                          side_effect=lambda codecs, pages: benchmark_codecs(
+                              codecs, pages, compressors)), \
+                    patch("com_redhat_kdump.service.installation.util") as mock_util:
+                if isinstance(output, Exception):
+                    mock_util.execWithCapture.side_effect = output
+                else:
+                    mock_util.execWithCapture.return_value = output
+
+                KdumpCodecSelectionTask(sysroot=root).run()
+
+            with open(path, "r") as f:
+                return f.read(), mock_util
+
+    def test_codec_selection(self):
+        # Only zlib can be measured, the default lzo codec is kept.
+        content, mock_util = self._run_task(
+            "path /var/crash\ncore_collector makedumpfile -l --message-level 7 -d 31\n"
+        )
+
+        self.assertEqual(content, "path /var/crash\ncore_collector makedumpfile -l --message-level 7 -d 31\n")
+        mock_util.execWithCapture.assert_called_once_with("makedumpfile", ["-v"], root=ANY)
+
+    def test_codec_selection_measured(self):
+        def compress(delay):
+            def _compress(data):
+                time.sleep(delay)
+                return data[:len(data) // 2]
+            return _compress
+
+        # The measured throughput decides.
+        content, _mock_util = self._run_task(
+            "core_collector makedumpfile -l -d 31\n",
+            compressors={"zlib": compress(0.002), "lzo": compress(0.001), "zstd": compress(0)}
+        )
+        self.assertEqual(content, "core_collector makedumpfile -z -d 31\n")
+
+        # The current codec isn't measured.
+        content, _mock_util = self._run_task(
+            "core_collector makedumpfile -l -d 31\n",
+            compressors={"zlib": compress(0.001), "zstd": compress(0)}
+        )
+        self.assertEqual(content, "core_collector makedumpfile -l -d 31\n")
+
+    def test_codec_selection_unsupported(self):
+        # The current codec isn't built in makedumpfile.
+        content, _mock_util = self._run_task("core_collector makedumpfile -z -d 31\n", "")
+        self.assertEqual(content, "core_collector makedumpfile -c -d 31\n")
+
+    def test_codec_selection_keep(self):
+        content, _mock_util = self._run_task(
+            "core_collector makedumpfile -l -d 31\n", "lzo\tenabled\nzstd\tdisabled\n"
+        )
+        self.assertEqual(content, "core_collector makedumpfile -l -d 31\n")
+
+        content, _mock_util = self._run_task(
+            "core_collector makedumpfile -l -d 31\n", FileNotFoundError()
+        )
+        self.assertEqual(content, "core_collector makedumpfile -l -d 31\n")
+
+    def test_codec_selection_no_compression(self):
+        for collector in ("makedumpfile -d 31", "cp --sparse=always"):
+            content, mock_util = self._run_task("core_collector %s\n" % collector)
+
+            self.assertEqual(content, "core_collector %s\n" % collector)
+            mock_util.execWithCapture.assert_not_called()
+
+
+class KdumpDriversTaskTestCase(TestCase):
+
+    def _run_task(self, content, required, omit_drivers=True, unknown_devices=()):
+        def get_target_modules(device_tree, kdump_conf=None, unknown=None):
+            unknown.extend(unknown_devices)
+            return required
+
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "etc"))
+            path = os.path.join(root, "etc/kdump.conf")
+
+            with open(path, "w") as f:
+                f.write(content)
+
+            with patch("com_redhat_kdump.service.installation.STORAGE"), \
+                    patch("com_redhat_kdump.service.installation.getTargetModules",
+                          side_effect=get_target_modules) as mock_target, \
+                    patch("com_redhat_kdump.service.installation.getDeviceModules",
+                          return_value={"nvme", "ahci", "sd_mod", "mlx5_core"}), \
+                    patch("com_redhat_kdump.service.installation.estimateModulesSaving",
+                          return_value=150.0) as mock_saving:
+                KdumpDriversTask(sysroot=root, omit_drivers=omit_drivers).run()
+
+            with open(path, "r") as f:
+                return f.read(), mock_target, mock_saving
+
+    def test_drivers(self):
+        content, mock_target, mock_saving = self._run_task(
+            "path /var/crash\n", {"nvme", "dm_mod", "dm_crypt"}
+        )
+
+        self.assertEqual(content, 'path /var/crash\n'
+                                  'dracut_args --add-drivers "dm_crypt dm_mod nvme" '
+                                  '--omit-drivers "ahci mlx5_core sd_mod"\n')
+        self.assertEqual(mock_target.call_args[0][1], {"path": "/var/crash"})
+        self.assertEqual(mock_saving.call_args[0][0], {"ahci", "mlx5_core", "sd_mod"})
+
+    def test_drivers_added(self):
+        content, _mock_target, mock_saving = self._run_task(
+            "path /var/crash\n", {"nvme", "dm_mod", "dm_crypt"}, omit_drivers=False
+        )
+
+        # No drivers are omitted unless it is requested.
+        self.assertEqual(content, 'path /var/crash\n'
+                                  'dracut_args --add-drivers "dm_crypt dm_mod nvme"\n')
+        mock_saving.assert_not_called()
+
+    def test_drivers_partial(self):
+        content, _mock_target, mock_saving = self._run_task(
+            "path /var/crash\n", {"dm_mod", "dm_crypt"}, unknown_devices=["vda"]
+        )
+
+        # The other drivers are kept if the modules of a device are unknown.
+        self.assertEqual(content, 'path /var/crash\n'
+                                  'dracut_args --add-drivers "dm_crypt dm_mod"\n')
+        mock_saving.assert_not_called()
+
+    def test_drivers_dracut_args(self):
+        content, _mock_target, _mock_saving = self._run_task(
+            "dracut_args --mount \"/dev/sda1 /crash xfs defaults\"\n", {"ahci", "sd_mod"}
+        )
+
+        self.assertEqual(content, 'dracut_args --mount "/dev/sda1 /crash xfs defaults" '
+                                  '--add-drivers "ahci sd_mod" --omit-drivers "mlx5_core nvme"\n')
+
+    def test_drivers_unknown_target(self):
+        content, _mock_target, mock_saving = self._run_task("nfs server:/dumps\n", None)
+
+        self.assertEqual(content, "nfs server:/dumps\n")
+        mock_saving.assert_not_called()
+
+
+class KdumpKernelArgumentsTaskTestCase(TestCase):
+
+    KDUMPCTL_VALUES = {
+        None: "2G-4G:256M,4G-:512M\n",
+        "6.12.0-55.el10.aarch64": "2G-4G:256M,4G-:512M\n",
+        "6.12.0-55.el10.aarch64+64k": "2G-4G:512M,4G-:1G\n",
+    }
+
+    KERNELS = [
+        "6.12.0-55.el10.aarch64",
+        "6.12.0-55.el10.aarch64+64k",
+        "6.12.0-56.el10.aarch64",
+    ]
+
+    @patch("com_redhat_kdump.service.installation.util")
+    def test_kernel_arguments(self, mock_util):
+        mock_util.execWithCapture.side_effect = mock_kdumpctl(self.KDUMPCTL_VALUES)
+        mock_util.execWithRedirect.return_value = 0
+
+        KdumpKernelArgumentsTask(
+            sysroot=SYSROOT, reserved_memory="auto", dump_threads=2, kernels=self.KERNELS
+        ).run()
+
+        self.assertEqual([c[0] for c in mock_util.execWithRedirect.call_args_list], [
+            ("grubby", ["--update-kernel=/boot/vmlinuz-6.12.0-55.el10.aarch64",
+                        "--args=crashkernel=2G-4G:288M,4G-:544M"]),
+            ("grubby", ["--update-kernel=/boot/vmlinuz-6.12.0-55.el10.aarch64+64k",
+                        "--args=crashkernel=2G-4G:544M,4G-:1056M"]),
+            # The value of the installer applies to a kernel unknown to kdumpctl.
+            ("grubby", ["--update-kernel=/boot/vmlinuz-6.12.0-56.el10.aarch64",
+                        "--args=crashkernel=2G-4G:288M,4G-:544M"]),
+        ])
+
+    @patch("com_redhat_kdump.service.installation.util")
+    def test_kernel_arguments_shared(self, mock_util):
+        mock_util.execWithCapture.side_effect = mock_kdumpctl(self.KDUMPCTL_VALUES)
+
+        # A fixed amount applies to all kernels.
+        KdumpKernelArgumentsTask(
+            sysroot=SYSROOT, reserved_memory="256", kernels=self.KERNELS
+        ).run()
+
+        mock_util.execWithRedirect.assert_not_called()
+
+    @patch("com_redhat_kdump.service.installation.util")
+    def test_kernel_arguments_bootloader(self, mock_util):
+        mock_util.execWithCapture.side_effect = mock_kdumpctl(self.KDUMPCTL_VALUES)
+        default_crashkernel = DefaultCrashkernel(SYSROOT)
+
+        with tempfile.TemporaryDirectory() as root:
+            for kernel_version in self.KERNELS:
+                write_kernel(root, kernel_version)
+
+            # Only the kernels of the bootloader are configured.
+            task = KdumpKernelArgumentsTask(sysroot=root, reserved_memory="auto")
+            task.run()
+
+        mock_util.execWithCapture.assert_not_called()
+        mock_util.execWithRedirect.assert_not_called()
+
+        # The values resolved by the bootloader task are reused.
+        default_crashkernel.get_all("kdump", self.KERNELS)
+        mock_util.execWithCapture.reset_mock()
+
+        KdumpKernelArgumentsTask(
+            sysroot=SYSROOT, reserved_memory="auto", kernels=self.KERNELS,
+            default_crashkernel=default_crashkernel
+        ).run()
+
+        mock_util.execWithCapture.assert_not_called()
+        self.assertEqual(mock_util.execWithRedirect.call_count, 3)
+
+
+class KdumpInitramfsTaskTestCase(TestCase):
+
+    def test_installed_kernels(self):
+        with tempfile.TemporaryDirectory() as root:
+            self.assertEqual(get_installed_kernels(root), [])
+
+            write_kernel(root, "6.12.0-55.el10.x86_64")
+            write_kernel(root, "6.12.0-55.el10.x86_64+rt")
+            # Modules without a kernel are left by removed kernels.
+            os.makedirs(os.path.join(root, "usr/lib/modules/6.11.0-1.el10.x86_64"))
+
+            self.assertEqual(get_installed_kernels(root), [
+                "6.12.0-55.el10.x86_64", "6.12.0-55.el10.x86_64+rt"
+            ])
+
+    @patch("com_redhat_kdump.service.installation.util")
+    def test_initramfs(self, mock_util):
+        mock_util.execWithRedirect.return_value = 0
+
+        with tempfile.TemporaryDirectory() as root:
+            write_kernel(root, "6.12.0-55.el10.x86_64")
+            write_kernel(root, "6.12.0-55.el10.x86_64+rt")
+            KdumpInitramfsTask(sysroot=root).run()
+
+        self.assertEqual(sorted(c[0] for c in mock_util.execWithRedirect.call_args_list), [
+            ("mkdumprd", ["-f", "/boot/initramfs-6.12.0-55.el10.x86_64+rtkdump.img",
+                          "6.12.0-55.el10.x86_64+rt"]),
+            ("mkdumprd", ["-f", "/boot/initramfs-6.12.0-55.el10.x86_64kdump.img",
+                          "6.12.0-55.el10.x86_64"]),
+        ])
+
+        for c in mock_util.execWithRedirect.call_args_list:
+            self.assertEqual(c[1], {"root": root})
+
+    @patch("com_redhat_kdump.service.installation.util")
+    def test_initramfs_no_kernels(self, mock_util):
+        with tempfile.TemporaryDirectory() as root:
+            KdumpInitramfsTask(sysroot=root).run()
+
+        mock_util.execWithRedirect.assert_not_called()
+
+    @patch("com_redhat_kdump.service.installation.util")
+    def test_initramfs_failure(self, mock_util):
+        task = KdumpInitramfsTask(sysroot=SYSROOT)
+
+        mock_util.execWithRedirect.return_value = 1
+        self.assertEqual(task.build_initramfs("6.12.0-55.el10.x86_64"), False)
+
+        mock_util.execWithRedirect.side_effect = FileNotFoundError()
+        self.assertEqual(task.build_initramfs("6.12.0-55.el10.x86_64"), False)
@@ -1,11 +1,16 @@
+import os
+import tempfile
+import time
+from textwrap import dedent
 from unittest.case import TestCase
 from unittest.mock import patch
 from unittest.mock import Mock
 
-from com_redhat_kdump import common
+from com_redhat_kdump import common, tracing
 from com_redhat_kdump.constants import KDUMP
 from com_redhat_kdump.service.kdump import KdumpService
 from com_redhat_kdump.service.kdump_interface import KdumpInterface
+from com_redhat_kdump.structures import KdumpConfiguration, KdumpCapabilities, KdumpSpan
 
 
 class PropertiesChangedCallback(Mock):
@@ -21,8 +26,8 @@ class KdumpInterfaceTestCase(TestCase):
         # Show unlimited diff.
         self.maxDiff = None
 
-        # Clean up global variable that may cache test result of previous test case
-        common._reservedMemory = None
+        # Drop the memory snapshot that may cache test result of previous test case
+        common.memoryProbe.invalidate()
 
         # Create the Kdump service.
         self._service = KdumpService()
@@ -54,8 +59,375 @@ class KdumpInterfaceTestCase(TestCase):
         self._check_properties_changed("ReservedMemory", "256")
         self.assertEqual(self._interface.ReservedMemory, "256")
 
+    def test_dump_level(self):
+        self.assertEqual(self._interface.DumpLevel, -1)
+
+        self._interface.DumpLevel = 1
+        self._check_properties_changed("DumpLevel", 1)
+        self.assertEqual(self._interface.DumpLevel, 1)
+
+        self._callback.reset_mock()
+        with self.assertRaises(ValueError):
+            self._interface.DumpLevel = 32
+
+        self._callback.assert_not_called()
+        self.assertEqual(self._interface.DumpLevel, 1)
+
+    @patch("com_redhat_kdump.service.kdump.os.cpu_count", return_value=16)
+    def test_dump_threads(self, mocker):
+        self.assertEqual(self._interface.DumpThreads, 0)
+        self.assertEqual(self._service.get_dump_threads(), 0)
+
+        self._interface.DumpThreads = -1
+        self._check_properties_changed("DumpThreads", -1)
+        self.assertEqual(self._service.get_dump_threads(), 8)
+
+        self._interface.DumpThreads = 4
+        self.assertEqual(self._service.get_dump_threads(), 4)
+
+        with self.assertRaises(ValueError):
+            self._interface.DumpThreads = 65
+
+        self.assertEqual(self._interface.DumpThreads, 4)
+
+    def test_drivers(self):
+        self.assertEqual(self._interface.Drivers, "all")
+
+        self._interface.Drivers = "minimal"
+        self._check_properties_changed("Drivers", "minimal")
+        self.assertEqual(self._interface.Drivers, "minimal")
+
+        with self.assertRaises(ValueError):
+            self._interface.Drivers = "none"
+
+        self.assertEqual(self._interface.Drivers, "minimal")
+
     @patch("com_redhat_kdump.service.kdump.getMemoryBounds", return_value = (500, 800, 1))
     def test_check_reserved_memory(self, mocker):
         service1 = KdumpService()
         for memory, reserved in [("900", "800"), ("400", "500"), ("600", "600")]:
             self.assertEqual(service1.check_reserved_memory(memory), reserved)
+
+    @patch("com_redhat_kdump.service.kdump.getMemoryBounds", return_value=(500, 800, 1))
+    def test_memory_bounds_on_first_use(self, mocker):
+        service = KdumpService()
+        mocker.assert_not_called()
+
+        service.reserved_memory = "900"
+        service.reserved_memory = "600"
+        self.assertEqual(service.reserved_memory, "600")
+        mocker.assert_called_once_with()
+
+    @patch("com_redhat_kdump.service.kdump.getMemoryBounds", return_value = (500, 800, 1))
+    def test_check_reserved_memory_range_table(self, mocker):
+        service1 = KdumpService()
+        table = "1G-4G:192M,4G-64G:256M,64G-:512M"
+        self.assertEqual(service1.check_reserved_memory(table), table)
+        self.assertEqual(service1.check_reserved_memory("256M"), "256M")
+        self.assertRaises(ValueError, service1.check_reserved_memory, "invalid")
+
+    def test_configuration(self):
+        configuration = KdumpConfiguration.from_structure(self._interface.GetConfiguration())
+        self.assertEqual(configuration.kdump_enabled, False)
+        self.assertEqual(configuration.fadump_enabled, False)
+        self.assertEqual(configuration.reserved_memory, "auto")
+        self.assertEqual(configuration.dump_threads, 0)
+        self.assertEqual(configuration.drivers, "all")
+        self.assertEqual(configuration.kdump_conf, {})
+
+        configuration.kdump_enabled = True
+        configuration.fadump_enabled = True
+        configuration.reserved_memory = "1G-4G:192M,4G-:256M"
+        configuration.dump_level = 17
+        configuration.dump_threads = -1
+        configuration.drivers = "target"
+        configuration.kdump_conf = {"path": "/var/crash"}
+        self._interface.SetConfiguration(KdumpConfiguration.to_structure(configuration))
+
+        self._callback.assert_called_once_with(
+            KDUMP.interface_name,
+            {"KdumpEnabled": True, "FadumpEnabled": True, "ReservedMemory": "1G-4G:192M,4G-:256M",
+             "DumpLevel": 17, "DumpThreads": -1, "Drivers": "target",
+             "KdumpConf": {"path": "/var/crash"}},
+            []
+        )
+
+        configuration = KdumpConfiguration.from_structure(self._interface.GetConfiguration())
+        self.assertEqual(configuration.kdump_enabled, True)
+        self.assertEqual(configuration.fadump_enabled, True)
+        self.assertEqual(configuration.reserved_memory, "1G-4G:192M,4G-:256M")
+        self.assertEqual(configuration.dump_level, 17)
+        self.assertEqual(configuration.dump_threads, -1)
+        self.assertEqual(configuration.drivers, "target")
+        self.assertEqual(configuration.kdump_conf, {"path": "/var/crash"})
+
+    def test_configuration_invalid(self):
+        configuration = KdumpConfiguration()
+        configuration.kdump_enabled = True
+        configuration.reserved_memory = "invalid"
+
+        with self.assertRaises(ValueError):
+            self._interface.SetConfiguration(KdumpConfiguration.to_structure(configuration))
+
+        self._callback.assert_not_called()
+        self.assertEqual(self._interface.KdumpEnabled, False)
+        self.assertEqual(self._interface.ReservedMemory, "auto")
+
+        configuration.reserved_memory = "auto"
+        configuration.dump_threads = 1000
+
+        with self.assertRaises(ValueError):
+            self._interface.SetConfiguration(KdumpConfiguration.to_structure(configuration))
+
+        configuration.dump_threads = 0
+        configuration.drivers = "none"
+
+        with self.assertRaises(ValueError):
+            self._interface.SetConfiguration(KdumpConfiguration.to_structure(configuration))
+
+        configuration.drivers = "all"
+        configuration.kdump_conf = {"failure_action": "invalid"}
+
+        with self.assertRaises(ValueError):
+            self._interface.SetConfiguration(KdumpConfiguration.to_structure(configuration))
+
+        self._callback.assert_not_called()
+        self.assertEqual(self._interface.DumpThreads, 0)
+        self.assertEqual(self._interface.KdumpConf, {})
+
+    def test_unchanged_properties(self):
+        self._interface.KdumpEnabled = False
+        self._interface.FadumpEnabled = False
+        self._interface.ReservedMemory = "auto"
+
+        self._callback.assert_not_called()
+        self.assertEqual(sum(self._service.emission_counts.values()), 0)
+
+        self._interface.KdumpEnabled = True
+        self._interface.KdumpEnabled = True
+        self._check_properties_changed("KdumpEnabled", True)
+        self.assertEqual(self._service.emission_counts["kdump_enabled"], 1)
+
+    def test_unchanged_reserved_memory(self):
+        self._interface.ReservedMemory = "1G-4G:192M,4G-:256M"
+
+        with patch.object(self._service, "check_reserved_memory") as check:
+            self._interface.ReservedMemory = "1G-4G:192M,4G-:256M"
+            check.assert_not_called()
+
+        self.assertEqual(self._service.emission_counts["reserved_memory"], 1)
+
+    @patch("com_redhat_kdump.service.kdump.getMemoryBounds", return_value=(500, 800, 1))
+    def test_clamped_reserved_memory(self, mocker):
+        service = KdumpService()
+        service.reserved_memory = "900"
+        service.reserved_memory = "1000"
+        self.assertEqual(service.reserved_memory, "800")
+        self.assertEqual(service.emission_counts["reserved_memory"], 1)
+
+    def test_configuration_changes(self):
+        configuration = KdumpConfiguration.from_structure(self._interface.GetConfiguration())
+        configuration.kdump_enabled = True
+        self._interface.SetConfiguration(KdumpConfiguration.to_structure(configuration))
+        self._check_properties_changed("KdumpEnabled", True)
+
+        self._callback.reset_mock()
+        self._interface.SetConfiguration(KdumpConfiguration.to_structure(configuration))
+        self._callback.assert_not_called()
+        self.assertEqual(self._service.emission_counts, {"kdump_enabled": 1})
+
+    def test_read_kickstart_changes(self):
+        self._interface.ReadKickstart(dedent("""
+        %addon com_redhat_kdump --enable --reserve-mb=256 --dump-level=17
+        path /var/crash
+        %end
+        """))
+
+        # The changes of the kickstart are reported at once.
+        self._callback.assert_called_once_with(
+            KDUMP.interface_name,
+            {"KdumpEnabled": True, "ReservedMemory": "256", "DumpLevel": 17,
+             "KdumpConf": {"path": "/var/crash"}},
+            []
+        )
+
+    @patch("com_redhat_kdump.service.kdump.probeCapabilities")
+    def test_capabilities(self, mocker):
+        capabilities = KdumpCapabilities()
+        capabilities.fadump = True
+        capabilities.current_reservation = 256
+        mocker.return_value = capabilities
+
+        for _i in range(2):
+            structure = KdumpCapabilities.from_structure(self._interface.Capabilities)
+            self.assertEqual(structure.fadump, True)
+            self.assertEqual(structure.kexec_file_load, False)
+            self.assertEqual(structure.current_reservation, 256)
+
+        mocker.assert_called_once_with()
+
+    @patch("com_redhat_kdump.service.kdump.probeCapabilities")
+    def test_install_with_tasks_initramfs(self, mocker):
+        capabilities = KdumpCapabilities()
+        capabilities.fadump = True
+        mocker.return_value = capabilities
+
+        def get_task_names():
+            return [task.__class__.__name__ for task in self._service.install_with_tasks()]
+
+        self.assertNotIn("KdumpInitramfsTask", get_task_names())
+
+        self._service.kdump_enabled = True
+        self.assertIn("KdumpInitramfsTask", get_task_names())
+
+        # The fadump initramfs is the default one.
+        self._service.fadump_enabled = True
+        self.assertNotIn("KdumpInitramfsTask", get_task_names())
+
+    @patch("com_redhat_kdump.service.kdump.probeCapabilities", return_value=KdumpCapabilities())
+    def test_install_with_tasks_drivers(self, _mock_capabilities):
+        def get_drivers_tasks():
+            return [
+                task for task in self._service.install_with_tasks()
+                if task.__class__.__name__ == "KdumpDriversTask"
+            ]
+
+        # The drivers are selected only on request.
+        self._service.kdump_enabled = True
+        self.assertEqual(get_drivers_tasks(), [])
+
+        self._service.drivers = "target"
+        task, = get_drivers_tasks()
+        self.assertFalse(task._omit_drivers)
+
+        self._service.drivers = "minimal"
+        task, = get_drivers_tasks()
+        self.assertTrue(task._omit_drivers)
+
+        self._service.kdump_conf = {"dracut_args": "--omit-drivers nouveau"}
+        self.assertEqual(get_drivers_tasks(), [])
+
+    @patch("com_redhat_kdump.service.installation.util")
+    @patch("com_redhat_kdump.service.kdump.probeCapabilities", return_value=KdumpCapabilities())
+    def test_install_with_tasks_kernels(self, _mock_capabilities, mock_util):
+        mock_util.execWithCapture.return_value = "1G-4G:192M,4G-:256M\n"
+        self._service.kdump_enabled = True
+
+        # The installation tasks can be collected first.
+        task, = [
+            task for task in self._service.install_with_tasks()
+            if task.__class__.__name__ == "KdumpKernelArgumentsTask"
+        ]
+        self.assertEqual(task.get_kernel_arguments(), {})
+
+        bootloader_task = self._service.configure_bootloader_with_tasks(
+            ["6.12.0-55.el10.x86_64", "6.12.0-55.el10.x86_64+rt"]
+        )[0]
+        self.assertEqual(bootloader_task.get_default_crashkernel(False), "1G-4G:192M,4G-:256M")
+        self.assertEqual(task.get_kernel_arguments(), {
+            "6.12.0-55.el10.x86_64": "crashkernel=1G-4G:192M,4G-:256M",
+            "6.12.0-55.el10.x86_64+rt": "crashkernel=1G-4G:192M,4G-:256M",
+        })
+
+        # The default values are resolved once for both tasks.
+        self.assertEqual(mock_util.execWithCapture.call_count, 2)
+
+    @patch("blivet.arch.get_arch", return_value="x86_64")
+    @patch("com_redhat_kdump.service.installation.getTargetModules", return_value=None)
+    @patch("com_redhat_kdump.service.installation.STORAGE")
+    @patch("com_redhat_kdump.service.installation.util")
+    @patch("com_redhat_kdump.service.kdump.probeCapabilities", return_value=KdumpCapabilities())
+    def test_install_with_tasks_initramfs_newer(self, _mock_capabilities, mock_util, *_mocks):
+        def execWithRedirect(command, argv, root):
+            if command == "mkdumprd":
+                image = os.path.join(root, argv[1].lstrip("/"))
+
+                with open(image, "w") as f:
+                    f.write("")
+
+                # A real build outlasts a tick of the file system clock.
+                now = time.time_ns()
+                os.utime(image, ns=(now, now))
+
+            return 0
+
+        def execWithCapture(command, argv, **kwargs):
+            return "lzo\tenabled\n" if command == "makedumpfile" else "1G-4G:192M,4G-:256M\n"
+
+        mock_util.execWithRedirect.side_effect = execWithRedirect
+        mock_util.execWithCapture.side_effect = execWithCapture
+
+        self._service.kdump_enabled = True
+        self._service.dump_level = 1
+        self._service.dump_threads = 4
+
+        with tempfile.TemporaryDirectory() as root:
+            for name in ("etc/sysconfig", "boot", "usr/lib/modules/6.12.0-55.el10.x86_64"):
+                os.makedirs(os.path.join(root, name))
+
+            files = {
+                "usr/lib/modules/6.12.0-55.el10.x86_64/vmlinuz": "",
+                "etc/kdump.conf": "core_collector makedumpfile -l --message-level 7 -d 31\n",
+                "etc/sysconfig/kdump": 'KDUMP_COMMANDLINE_APPEND="irqpoll nr_cpus=1 reset_devices"\n',
+            }
+
+            for name, content in files.items():
+                with open(os.path.join(root, name), "w") as f:
+                    f.write(content)
+
+            with patch("pyanaconda.core.configuration.anaconda.conf") as mock_conf:
+                mock_conf.target.system_root = root
+
+                for task in self._service.install_with_tasks():
+                    task.run()
+
+            def mtime(name):
+                return os.stat(os.path.join(root, name)).st_mtime_ns
+
+            # kdumpctl doesn't rebuild the image on the first boot.
+            image = "boot/initramfs-6.12.0-55.el10.x86_64kdump.img"
+            self.assertGreater(mtime(image), mtime("etc/kdump.conf"))
+            self.assertGreater(mtime(image), mtime("etc/sysconfig/kdump"))
+
+            # Both files are written by the tasks.
+            with open(os.path.join(root, "etc/kdump.conf")) as f:
+                self.assertIn("-d 1", f.read())
+
+            with open(os.path.join(root, "etc/sysconfig/kdump")) as f:
+                self.assertIn("nr_cpus=5", f.read())
+
+    def test_tracing(self):
+        self.addCleanup(setattr, tracing.tracer, "enabled", tracing.tracer.enabled)
+        self.addCleanup(tracing.tracer.clear)
+        tracing.tracer.enabled = False
+        tracing.tracer.clear()
+
+        self.assertEqual(self._interface.TracingEnabled, False)
+        self.assertEqual(self._interface.TraceSpans, [])
+
+        self._interface.TracingEnabled = True
+        self._check_properties_changed("TracingEnabled", True)
+
+        with tracing.tracer.span("test", command="kdumpctl"):
+            pass
+
+        span, = KdumpSpan.from_structure_list(self._interface.TraceSpans)
+        self.assertEqual(span.name, "test")
+        self.assertEqual(span.outcome, "ok")
+        self.assertEqual(span.attributes, {"command": "kdumpctl"})
+
+    def test_kdump_conf(self):
+        self._interface.KdumpConf = {"path": "/var/crash", "core_collector": "makedumpfile -c"}
+        self._check_properties_changed(
+            "KdumpConf", {"path": "/var/crash", "core_collector": "makedumpfile -c"}
+        )
+        self.assertEqual(
+            self._interface.KdumpConf, {"path": "/var/crash", "core_collector": "makedumpfile -c"}
+        )
+
+        self._callback.reset_mock()
+        with self.assertRaises(ValueError):
+            self._interface.KdumpConf = {"path": "var/crash"}
+
+        self._callback.assert_not_called()
+        self.assertEqual(self._interface.KdumpConf["path"], "/var/crash")
@@ -0,0 +1,89 @@
+from unittest.case import TestCase
+from com_redhat_kdump.kdump_conf import parse_directive, check_directives, merge_kdump_conf, set_nr_cpus
+
+KDUMP_CONF = """\
+# This file contains a series of commands to perform (in order) in the kdump
+# kernel after a kernel crash in the crash kernel(1st kernel) has happened.
+
+#raw /dev/vg/lv_kdump
+#ext4 /dev/vg/lv_kdump
+ext4 LABEL=/boot
+path /var/crash
+core_collector makedumpfile -l --message-level 7 -d 31
+default shell
+"""
+
+
+class KdumpConfTestCase(TestCase):
+
+    def test_parse_directive(self):
+        self.assertEqual(parse_directive("path /var/crash"), ("path", "/var/crash"))
+        self.assertEqual(parse_directive("  core_collector makedumpfile -l -d 31 \n"),
+                         ("core_collector", "makedumpfile -l -d 31"))
+        self.assertRaises(ValueError, parse_directive, "path")
+        self.assertRaises(ValueError, parse_directive, "unknown value")
+
+    def test_check_directives(self):
+        check_directives({})
+        check_directives({"ssh": "kdump@example.com", "core_collector": "makedumpfile -F -l"})
+        check_directives({"failure_action": "dump_to_rootfs", "auto_reset_crashkernel": "no"})
+
+        for directives in (
+            {"ssh": "kdump@example.com", "core_collector": "makedumpfile -l"},
+            {"ssh": "kdump@example.com", "nfs": "server:/export"},
+            {"default": "shell", "failure_action": "reboot"},
+            {"path": "var/crash"},
+            {"final_action": "shell"},
+            {"force_rebuild": "yes"},
+        ):
+            with self.subTest(directives=directives):
+                self.assertRaises(ValueError, check_directives, directives)
+
+    def test_merge_kdump_conf(self):
+        merged = merge_kdump_conf(KDUMP_CONF, {
+            "xfs": "UUID=0e4d4f4c",
+            "core_collector": "makedumpfile -c -d 31",
+            "failure_action": "reboot",
+            "dracut_args": "--omit-drivers nouveau",
+        })
+
+        self.assertEqual(merged, KDUMP_CONF.replace(
+            "ext4 LABEL=/boot", "xfs UUID=0e4d4f4c"
+        ).replace(
+            "makedumpfile -l --message-level 7 -d 31", "makedumpfile -c -d 31"
+        ).replace(
+            "default shell", "failure_action reboot"
+        ) + "dracut_args --omit-drivers nouveau\n")
+
+    def test_merge_kdump_conf_duplicates(self):
+        merged = merge_kdump_conf("path /var/crash\npath /var/dump\n", {"path": "/srv/crash"})
+        self.assertEqual(merged, "path /srv/crash\n")
+
+    def test_merge_kdump_conf_empty(self):
+        self.assertEqual(merge_kdump_conf(KDUMP_CONF, {}), KDUMP_CONF)
+        self.assertEqual(merge_kdump_conf("", {"path": "/var/crash"}), "path /var/crash\n")
+
+    def test_set_nr_cpus(self):
+        sysconfig = ('# Kernel Version string for the -kdump kernel\n'
+                     'KDUMP_KERNELVER=""\n'
+                     'KDUMP_COMMANDLINE_APPEND="irqpoll nr_cpus=1 reset_devices cgroup_disable=memory"\n'
+                     'KEXEC_ARGS="-s"\n')
+
+        self.assertEqual(set_nr_cpus(sysconfig, 5), sysconfig.replace("nr_cpus=1", "nr_cpus=5"))
+        self.assertEqual(
+            set_nr_cpus('KDUMP_COMMANDLINE_APPEND="irqpoll"\n', 3),
+            'KDUMP_COMMANDLINE_APPEND="irqpoll nr_cpus=3"\n'
+        )
+        self.assertEqual(set_nr_cpus("", 3), 'KDUMP_COMMANDLINE_APPEND="nr_cpus=3"\n')
+
+    def test_set_nr_cpus_maxcpus(self):
+        # The default line of ppc64le
+        sysconfig = ('KDUMP_COMMANDLINE_APPEND="irqpoll maxcpus=1 noirqdistrib reset_devices '
+                     'cgroup_disable=memory numa=off udev.children-max=2 ehea.use_mcs=0 '
+                     'panic=10 kvm_cma_resv_ratio=0 transparent_hugepage=never"\n')
+
+        self.assertEqual(set_nr_cpus(sysconfig, 5), sysconfig.replace("maxcpus=1", "maxcpus=5"))
+        self.assertEqual(
+            set_nr_cpus('KDUMP_COMMANDLINE_APPEND="maxcpus=1 nr_cpus=1"\n', 3),
+            'KDUMP_COMMANDLINE_APPEND="maxcpus=3 nr_cpus=3"\n'
+        )
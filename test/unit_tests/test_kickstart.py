@@ -1,19 +1,27 @@
+import time
 from textwrap import dedent
 from unittest.case import TestCase
 from unittest.mock import patch
+from pykickstart.version import F27
 from com_redhat_kdump import common
 from com_redhat_kdump.service.kdump import KdumpService
+from com_redhat_kdump.service.kickstart import get_option_parser, read_addon_data
+from .mock import benchmark
 
 
 class KdumpKickstartTestCase(TestCase):
 
-    @patch("com_redhat_kdump.service.kdump.getMemoryBounds", return_value=(160, 800, 1))
-    def setUp(self, mocker):
+    def setUp(self):
         # Show unlimited diff.
         self.maxDiff = None
 
-        # Clean up global variable that may cache test result of previous test case
-        common._reservedMemory = None
+        # The memory bounds are probed on the first use.
+        patcher = patch("com_redhat_kdump.service.kdump.getMemoryBounds", return_value=(160, 800, 1))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Drop the memory snapshot that may cache test result of previous test case
+        common.memoryProbe.invalidate()
 
         # Create the Kdump service.
         self._service = KdumpService()
@@ -31,6 +39,7 @@ class KdumpKickstartTestCase(TestCase):
         self.assertEqual(self._service.kdump_enabled, False)
         self.assertEqual(self._service.fadump_enabled, False)
         self.assertEqual(self._service.reserved_memory, "auto")
+        self.assertEqual(self._service.dump_level, -1)
 
         self._check_ks_output("""
         %addon com_redhat_kdump --disable
@@ -102,6 +111,43 @@ class KdumpKickstartTestCase(TestCase):
         %end
         """)
 
+    def test_ks_reserve_mb_suffix(self):
+        self._check_ks_input("""
+        %addon com_redhat_kdump --enable --reserve-mb=256M
+        %end
+        """)
+
+        self.assertEqual(self._service.reserved_memory, "256")
+
+    def test_ks_reserve_range_table(self):
+        self._check_ks_input("""
+        %addon com_redhat_kdump --enable --reserve-mb=1G-4G:192M,4G-64G:256M,64G-:512M
+        %end
+        """)
+
+        self.assertEqual(self._service.kdump_enabled, True)
+        self.assertEqual(self._service.reserved_memory, "1G-4G:192M,4G-64G:256M,64G-:512M")
+
+        self._check_ks_output("""
+        %addon com_redhat_kdump --enable --reserve-mb='1G-4G:192M,4G-64G:256M,64G-:512M'
+
+        %end
+        """)
+
+    def test_ks_reserve_arch_map(self):
+        self._check_ks_input("""
+        %addon com_redhat_kdump --enable --reserve-mb='x86_64=1G-:256M;ppc64*=2G-:1G;*=auto'
+        %end
+        """)
+
+        self.assertEqual(self._service.reserved_memory, "x86_64=1G-:256M;ppc64*=2G-:1G;*=auto")
+
+        self._check_ks_output("""
+        %addon com_redhat_kdump --enable --reserve-mb='x86_64=1G-:256M;ppc64*=2G-:1G;*=auto'
+
+        %end
+        """)
+
     def test_ks_reserve_mb_invalid(self):
         ks_in = """
         %addon com_redhat_kdump --reserve-mb=
@@ -117,6 +163,13 @@ class KdumpKickstartTestCase(TestCase):
         ks_err = "Invalid value 'invalid' for --reserve-mb"
         self._check_ks_input(ks_in, [ks_err])
 
+        ks_in = """
+        %addon com_redhat_kdump --reserve-mb=1G-4G:192M,2G-:256M
+        %end
+        """
+        ks_err = "Invalid value '1G-4G:192M,2G-:256M' for --reserve-mb"
+        self._check_ks_input(ks_in, [ks_err])
+
     def test_ks_enablefadump(self):
         self._check_ks_input("""
         %addon com_redhat_kdump --disable --enablefadump
@@ -132,3 +185,180 @@ class KdumpKickstartTestCase(TestCase):
 
         %end
         """)
+
+    def test_ks_dump_level(self):
+        self._check_ks_input("""
+        %addon com_redhat_kdump --enable --reserve-mb=256 --dump-level=1
+        %end
+        """)
+
+        self.assertEqual(self._service.dump_level, 1)
+
+        self._check_ks_output("""
+        %addon com_redhat_kdump --enable --reserve-mb='256' --dump-level=1
+
+        %end
+        """)
+
+    def test_ks_dump_level_invalid(self):
+        ks_in = """
+        %addon com_redhat_kdump --enable --dump-level=32
+        %end
+        """
+        self._check_ks_input(ks_in, ["Invalid value '32' for --dump-level"])
+
+    def test_ks_dump_threads(self):
+        self._check_ks_input("""
+        %addon com_redhat_kdump --enable --reserve-mb=auto --dump-threads=auto
+        %end
+        """)
+
+        self.assertEqual(self._service.dump_threads, -1)
+
+        self._check_ks_output("""
+        %addon com_redhat_kdump --enable --reserve-mb='auto' --dump-threads=auto
+
+        %end
+        """)
+
+        self._check_ks_input("""
+        %addon com_redhat_kdump --enable --dump-threads=4
+        %end
+        """)
+
+        self.assertEqual(self._service.dump_threads, 4)
+
+    def test_ks_dump_threads_invalid(self):
+        for value in ("many", "-2", "65"):
+            ks_in = """
+            %addon com_redhat_kdump --enable --dump-threads={}
+            %end
+            """.format(value)
+            self._check_ks_input(ks_in, ["Invalid value '{}' for --dump-threads".format(value)])
+
+    def test_ks_drivers(self):
+        self._check_ks_input("""
+        %addon com_redhat_kdump --enable --drivers=minimal
+        %end
+        """)
+
+        self.assertEqual(self._service.drivers, "minimal")
+
+        self._check_ks_output("""
+        %addon com_redhat_kdump --enable --reserve-mb='auto' --drivers=minimal
+
+        %end
+        """)
+
+        self._check_ks_input("""
+        %addon com_redhat_kdump --enable
+        %end
+        """)
+
+        self.assertEqual(self._service.drivers, "all")
+
+    def test_ks_drivers_invalid(self):
+        ks_in = """
+        %addon com_redhat_kdump --enable --drivers=none
+        %end
+        """
+        self._check_ks_input(ks_in, ["Invalid value 'none' for --drivers"])
+
+    def test_ks_kdump_conf(self):
+        self._check_ks_input("""
+        %addon com_redhat_kdump --enable --reserve-mb=256
+        # Dump to a dedicated disk
+        xfs UUID=0e4d4f4c-5a1f-4c1e-9f3a-9d2b3c4d5e6f
+        path /var/crash
+        core_collector makedumpfile -l --message-level 7 -d 31
+
+        final_action poweroff
+        %end
+        """)
+
+        self.assertEqual(self._service.kdump_conf, {
+            "xfs": "UUID=0e4d4f4c-5a1f-4c1e-9f3a-9d2b3c4d5e6f",
+            "path": "/var/crash",
+            "core_collector": "makedumpfile -l --message-level 7 -d 31",
+            "final_action": "poweroff",
+        })
+
+        self._check_ks_output("""
+        %addon com_redhat_kdump --enable --reserve-mb='256'
+        xfs UUID=0e4d4f4c-5a1f-4c1e-9f3a-9d2b3c4d5e6f
+        path /var/crash
+        core_collector makedumpfile -l --message-level 7 -d 31
+        final_action poweroff
+
+        %end
+        """)
+
+    def test_ks_kdump_conf_invalid(self):
+        ks_in = """
+        %addon com_redhat_kdump --enable
+        core_collecter makedumpfile -l
+        %end
+        """
+        self._check_ks_input(ks_in, ["Unknown directive 'core_collecter'"])
+
+        ks_in = """
+        %addon com_redhat_kdump --enable
+        path
+        %end
+        """
+        self._check_ks_input(ks_in, ["Invalid directive 'path'"])
+
+        ks_in = """
+        %addon com_redhat_kdump --enable
+        path /var/crash
+        path /var/dump
+        %end
+        """
+        self._check_ks_input(ks_in, ["The directive path is specified more than once"])
+
+        ks_in = """
+        %addon com_redhat_kdump --enable
+        nfs server:/export/dumps
+        ssh kdump@dumps.example.com
+        %end
+        """
+        self._check_ks_input(ks_in, ["Only one dump target can be specified: nfs, ssh"])
+
+        ks_in = """
+        %addon com_redhat_kdump --enable
+        final_action shell
+        %end
+        """
+        self._check_ks_input(ks_in, [
+            "Invalid value 'shell' of final_action, use one of: reboot, halt, poweroff"
+        ])
+
+    def test_ks_option_parser_cached(self):
+        self.assertIs(get_option_parser(F27), get_option_parser(F27))
+
+    def test_ks_read_addon_data(self):
+        data = read_addon_data(dedent("""
+        lang en_US.UTF-8
+        %addon org_fedora_oscap
+        content-type = scap-security-guide
+        %end
+        %addon com_redhat_kdump --enable --reserve-mb=256M --enablefadump
+        %end
+        """).splitlines())
+
+        self.assertEqual(data.enabled, True)
+        self.assertEqual(data.reserve_mb, "256")
+        self.assertEqual(data.enablefadump, True)
+
+    @benchmark
+    def test_ks_header_benchmark(self):
+        count = 5000
+        lines = ["%addon com_redhat_kdump --enable --reserve-mb='1G-4G:192M,4G-:256M'", "%end"]
+
+        start = time.monotonic()
+        for _i in range(count):
+            read_addon_data(lines)
+        throughput = count / (time.monotonic() - start)
+
+        # sections per second
+        self.assertGreater(throughput, 2000)
@@ -0,0 +1,208 @@
+import importlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from unittest import skipUnless
+from unittest.case import TestCase
+from unittest.mock import patch, MagicMock
+
+from com_redhat_kdump import common
+from com_redhat_kdump.constants import KDUMP, STARTUP_TIME_TARGET
+from com_redhat_kdump.structures import KdumpCapabilities
+from .mock import benchmark, mock_ui_modules
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The maximal cumulative import time of a module in seconds
+IMPORT_TIME_LIMITS = {
+    "com_redhat_kdump.constants": 1.0,
+    "com_redhat_kdump.crashkernel": 0.1,
+    "com_redhat_kdump.common": 1.0,
+    "com_redhat_kdump.structures": 1.0,
+    "com_redhat_kdump.proxy": 1.0,
+    "com_redhat_kdump.service.kickstart": 1.0,
+    "com_redhat_kdump.service.kdump_interface": 1.0,
+    "com_redhat_kdump.service.kdump": 1.5,
+    "com_redhat_kdump.service.installation": 2.0,
+    "com_redhat_kdump.plan": 1.5,
+    "com_redhat_kdump.validate": 1.5,
+}
+
+# The modules the kdump service imports on the first use
+LAZY_SERVICE_IMPORTS = ["blivet", "com_redhat_kdump.service.installation",
+                        "com_redhat_kdump.service.kickstart"]
+
+# The modules the spokes don't import
+SPOKE_LAZY_IMPORTS = ["pykickstart", "com_redhat_kdump.service.kdump",
+                      "com_redhat_kdump.service.installation", "com_redhat_kdump.service.kickstart"]
+
+# The maximal time of should_run, the constructor and initialize of a spoke
+SPOKE_TIME_LIMIT = 0.05
+
+_IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.*)$')
+
+
+def measure_import(module):
+    """Import a module in a new interpreter with -X importtime.
+
+    :param module: a name of the module
+    :return: a dictionary of the cumulative import times in seconds
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [TOP_DIR, env.get("PYTHONPATH")]))
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        env=env, cwd=TOP_DIR, stderr=subprocess.PIPE, universal_newlines=True, check=True
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        matched = _IMPORT_TIME_RE.match(line)
+        if matched:
+            times[matched.group(3).strip()] = int(matched.group(2)) / 1000000
+
+    return times
+
+
+class KdumpImportTimeTestCase(TestCase):
+
+    def test_import_time(self):
+        for module, limit in IMPORT_TIME_LIMITS.items():
+            with self.subTest(module=module):
+                times = measure_import(module)
+                self.assertIn(module, times)
+                self.assertLess(times[module], limit)
+
+    def test_service_lazy_imports(self):
+        times = measure_import("com_redhat_kdump.service.kdump")
+
+        for module in LAZY_SERVICE_IMPORTS:
+            self.assertNotIn(module, times)
+
+
+def _start_dbus_daemon():
+    """Start a private message bus and return the process and its address."""
+    process = subprocess.Popen(
+        ["dbus-daemon", "--session", "--nofork", "--print-address"],
+        stdout=subprocess.PIPE, universal_newlines=True
+    )
+    return process, process.stdout.readline().strip()
+
+
+def _has_message_bus():
+    if not shutil.which("dbus-daemon"):
+        return False
+
+    try:
+        from gi.repository import Gio  # pylint: disable=unused-import,no-name-in-module
+    except ImportError:
+        return False
+
+    return True
+
+
+@skipUnless(_has_message_bus(), "dbus-daemon or Gio is not available")
+class KdumpServiceStartupTestCase(TestCase):
+
+    def setUp(self):
+        from dasbus.connection import AddressedMessageBus
+
+        self._process, address = _start_dbus_daemon()
+        self._bus = AddressedMessageBus(address)
+
+    def tearDown(self):
+        self._bus.disconnect()
+        self._process.terminate()
+        self._process.wait()
+        self._process.stdout.close()
+
+    def test_publish(self):
+        from com_redhat_kdump.service.kdump import KdumpService
+
+        with patch("com_redhat_kdump.service.kdump.DBus", self._bus):
+            service = KdumpService()
+            service.publish()
+
+        self.assertTrue(self._bus.proxy.NameHasOwner(KDUMP.service_name))
+
+    @benchmark
+    def test_publish_benchmark(self):
+        from com_redhat_kdump.service.kdump import KdumpService
+
+        with patch("com_redhat_kdump.service.kdump.DBus", self._bus), \
+                patch("com_redhat_kdump.service.kdump.log") as log:
+            start = time.monotonic()
+            service = KdumpService(start_time=start)
+            service.publish()
+            elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, STARTUP_TIME_TARGET)
+        log.warning.assert_not_called()
+
+
+@patch("blivet.arch.get_arch", return_value="x86_64")
+class KdumpSpokeStartupTestCase(TestCase):
+
+    def setUp(self):
+        common.memoryProbe.invalidate()
+
+        patcher = patch.dict(sys.modules, mock_ui_modules())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _import_spoke(self, name):
+        # Drop the modules the spoke should not import.
+        for module in [name] + SPOKE_LAZY_IMPORTS:
+            sys.modules.pop(module, None)
+
+        return importlib.import_module(name)
+
+    def _start_spoke(self, module):
+        proxy = MagicMock()
+        proxy.Capabilities = KdumpCapabilities.to_structure(KdumpCapabilities())
+
+        with patch.object(module, "is_module_available", return_value=True), \
+                patch.object(module, "get_kdump_proxy", return_value=proxy), \
+                patch.object(module, "STORAGE"), \
+                patch.object(module, "threadMgr") as thread_mgr, \
+                patch.object(module, "probeMemUsage") as probe_mem_usage, \
+                patch("com_redhat_kdump.common.getDeviceDrivers", return_value=set()):
+            self.assertTrue(module.KdumpSpoke.should_run(None, None))
+            spoke = module.KdumpSpoke()
+            spoke.initialize()
+
+        # The page usage is not probed at the startup.
+        probe_mem_usage.assert_not_called()
+        thread_mgr.add.assert_not_called()
+
+        for name in SPOKE_LAZY_IMPORTS:
+            self.assertNotIn(name, sys.modules)
+
+        return spoke
+
+    def _measure_spoke(self, module):
+        start = time.monotonic()
+
+        for _i in range(10):
+            self._start_spoke(module)
+
+        return (time.monotonic() - start) / 10
+
+    def test_gui_spoke(self, _mock_arch):
+        module = self._import_spoke("com_redhat_kdump.gui.spokes.kdump")
+        self._start_spoke(module)
+
+    def test_tui_spoke(self, _mock_arch):
+        module = self._import_spoke("com_redhat_kdump.tui.spokes.kdump")
+        self._start_spoke(module)
+
+    @benchmark
+    def test_spoke_benchmark(self, _mock_arch):
+        for name in ("com_redhat_kdump.gui.spokes.kdump", "com_redhat_kdump.tui.spokes.kdump"):
+            with self.subTest(spoke=name):
+                module = self._import_spoke(name)
+                self.assertLess(self._measure_spoke(module), SPOKE_TIME_LIMIT)
@@ -0,0 +1,133 @@
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
+from textwrap import dedent
+from unittest.case import TestCase
+from com_redhat_kdump import reservation
+from com_redhat_kdump.plan import Host, plan_host, read_inventory, main
+
+SETTINGS = {
+    "kdump_enabled": True,
+    "fadump_enabled": False,
+    "reserved_memory": "auto",
+}
+
+
+class KdumpPlanTestCase(TestCase):
+
+    def setUp(self):
+        reservation.loadReservationRules(path=None)
+
+    def tearDown(self):
+        reservation._reservationRules = None
+
+    def test_plan_host_auto(self):
+        host = Host("a", "x86_64", 16 * 1024)
+        self.assertEqual(
+            plan_host(SETTINGS, host),
+            ("crashkernel=1G-4G:192M,4G-64G:256M,64G-:512M", None)
+        )
+
+        host = Host("b", "riscv64", 16 * 1024)
+        self.assertEqual(plan_host(SETTINGS, host), ("crashkernel=auto", None))
+
+    def test_plan_host_fadump(self):
+        settings = dict(SETTINGS, fadump_enabled=True)
+
+        args, _warning = plan_host(settings, Host("a", "ppc64le", 64 * 1024, fadump=True))
+        self.assertTrue(args.startswith("fadump=on crashkernel=4G-16G:768M,"))
+
+        args, _warning = plan_host(settings, Host("b", "ppc64le", 64 * 1024, fadump=False))
+        self.assertEqual(args, "crashkernel=4G-16G:768M,16G-64G:1G,64G-128G:2G,128G-1T:4G,1T-2T:6G,"
+                               "2T-4T:12G,4T-8T:20G,8T-16T:36G,16T-32T:64G,32T-64T:128G,64T-:180G")
+
+    def test_plan_host_dump_threads(self):
+        settings = dict(SETTINGS, dump_threads=-1)
+        self.assertEqual(
+            plan_host(settings, Host("a", "x86_64", 16 * 1024, cpus=4)),
+            ("crashkernel=1G-4G:240M,4G-64G:304M,64G-:560M", None)
+        )
+        self.assertEqual(
+            plan_host(settings, Host("b", "x86_64", 16 * 1024, cpus=1)),
+            ("crashkernel=1G-4G:192M,4G-64G:256M,64G-:512M", None)
+        )
+
+    def test_plan_host_reserve_mb(self):
+        settings = dict(SETTINGS, reserved_memory="2048")
+        self.assertEqual(plan_host(settings, Host("a", "x86_64", 64 * 1024)), ("crashkernel=2048M", None))
+        self.assertEqual(plan_host(settings, Host("b", "x86_64", 2 * 1024)), ("crashkernel=1536M", None))
+
+        settings = dict(SETTINGS, kdump_enabled=False)
+        self.assertEqual(plan_host(settings, Host("c", "x86_64", 64 * 1024)), ("", None))
+
+    def test_plan_host_range_table(self):
+        settings = dict(SETTINGS, reserved_memory="x86_64=1G-4G:192M,4G-:256M;aarch64=1G-:256M")
+        self.assertEqual(
+            plan_host(settings, Host("a", "x86_64", 64 * 1024)),
+            ("crashkernel=1G-4G:192M,4G-:256M", None)
+        )
+        self.assertEqual(
+            plan_host(settings, Host("b", "aarch64", 64 * 1024)),
+            ("crashkernel=1G-:256M", "The reservation of 256 MB is out of bounds (512 - 65024 MB)")
+        )
+        self.assertEqual(
+            plan_host(settings, Host("c", "s390x", 64 * 1024)),
+            ("crashkernel=1G-4G:192M,4G-64G:256M,64G-:512M", "No reservation is specified for s390x")
+        )
+
+    def test_read_inventory(self):
+        records = list(read_inventory(io.StringIO(dedent("""\
+        host,arch,memory,cpus,fadump
+        a,x86_64,64G,16,no
+        b,ppc64le,4096,8,yes
+        """))))
+        hosts = [Host.from_record(record) for record in records]
+        self.assertEqual([h.name for h in hosts], ["a", "b"])
+        self.assertEqual([h.memory for h in hosts], [64 * 1024, 4096])
+        self.assertEqual([h.cpus for h in hosts], [16, 8])
+        self.assertEqual([h.fadump for h in hosts], [False, True])
+
+        records = list(read_inventory(io.StringIO(dedent("""\
+        {"host": "a", "arch": "x86_64", "memory": "1T", "cpus": 64, "fadump": false}
+
+        {"host": "b", "arch": "aarch64", "memory": 8192}
+        """))))
+        hosts = [Host.from_record(record) for record in records]
+        self.assertEqual([h.memory for h in hosts], [1024 * 1024, 8192])
+        self.assertEqual([h.arch for h in hosts], ["x86_64", "aarch64"])
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            kickstart = os.path.join(tmp, "ks.cfg")
+            inventory = os.path.join(tmp, "inventory.csv")
+
+            with open(kickstart, "w") as f:
+                f.write(dedent("""
+                lang en_US.UTF-8
+                %addon com_redhat_kdump --enable --reserve-mb='x86_64=1G-:256M;*=auto'
+                %end
+                """))
+
+            with open(inventory, "w") as f:
+                f.write("host,arch,memory\n")
+                for i in range(100):
+                    f.write("host%d,%s,%d\n" % (i, "x86_64" if i % 2 else "s390x", 4096 + i))
+                f.write("broken,x86_64,lots\n")
+
+            output = io.StringIO()
+            with redirect_stdout(output):
+                self.assertEqual(main(["-j", "2", "--chunk-size", "7", kickstart, inventory]), 0)
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], "host,arguments,warning")
+        self.assertEqual(lines[1], 'host0,"crashkernel=1G-4G:192M,4G-64G:256M,64G-:512M",')
+        self.assertEqual(lines[2], "host1,crashkernel=1G-:256M,")
+        self.assertEqual(len(lines), 102)
+        self.assertTrue(lines[-1].startswith("broken,,Invalid record:"))
+
+    def test_main_invalid_kickstart(self):
+        with tempfile.NamedTemporaryFile("w") as f:
+            f.write("%addon com_redhat_kdump --reserve-mb=invalid\n%end\n")
+            f.flush()
+            self.assertEqual(main([f.name, "-"]), 1)
@@ -0,0 +1,162 @@
+from unittest.case import TestCase
+from unittest.mock import Mock
+
+from dasbus.signal import Signal
+from dasbus.typing import get_variant, Bool, Int, Str, Dict, Structure
+
+from com_redhat_kdump.constants import KDUMP
+from com_redhat_kdump.proxy import CachedProxy, KDUMP_PROPERTIES, KDUMP_CONSTANT_PROPERTIES
+from com_redhat_kdump.structures import KdumpCapabilities
+
+TYPES = {
+    "KdumpEnabled": Bool,
+    "FadumpEnabled": Bool,
+    "ReservedMemory": Str,
+    "DumpLevel": Int,
+    "DumpThreads": Int,
+    "Drivers": Str,
+    "KdumpConf": Dict[Str, Str],
+    "Capabilities": Structure,
+}
+
+
+class MockKdumpProxy(object):
+    """A proxy of the kdump module that counts the property reads."""
+
+    def __init__(self):
+        self.reads = 0
+        self.get_all_calls = 0
+        self.values = {
+            "KdumpEnabled": False,
+            "FadumpEnabled": False,
+            "ReservedMemory": "auto",
+            "DumpLevel": -1,
+            "DumpThreads": 0,
+            "Drivers": "all",
+            "KdumpConf": {},
+            "Capabilities": KdumpCapabilities.to_structure(KdumpCapabilities()),
+        }
+        self.PropertiesChanged = Signal()
+        self.SetConfiguration = Mock()
+
+    def GetAll(self, interface_name):
+        self.get_all_calls += 1
+        return {name: get_variant(TYPES[name], value) for name, value in self.values.items()}
+
+    def __getattr__(self, name):
+        if name in ("values", "reads", "get_all_calls"):
+            raise AttributeError(name)
+        self.reads += 1
+        return self.values[name]
+
+    def __setattr__(self, name, value):
+        if name in KDUMP_PROPERTIES:
+            self.values[name] = value
+        else:
+            super().__setattr__(name, value)
+
+
+class KdumpCachedProxyTestCase(TestCase):
+
+    def setUp(self):
+        self._dbus_proxy = MockKdumpProxy()
+        self._proxy = CachedProxy(
+            self._dbus_proxy, KDUMP.interface_name, KDUMP_PROPERTIES, KDUMP_CONSTANT_PROPERTIES
+        )
+
+    def test_cached_reads(self):
+        for _i in range(10):
+            self.assertEqual(self._proxy.KdumpEnabled, False)
+            self.assertEqual(self._proxy.ReservedMemory, "auto")
+
+        self.assertEqual(self._dbus_proxy.get_all_calls, 1)
+        self.assertEqual(self._dbus_proxy.reads, 0)
+        self.assertEqual(self._proxy.misses, 1)
+        self.assertEqual(self._proxy.hits, 19)
+
+    def test_properties_changed(self):
+        self.assertEqual(self._proxy.KdumpEnabled, False)
+
+        self._dbus_proxy.PropertiesChanged.emit(
+            KDUMP.interface_name,
+            {"KdumpEnabled": get_variant(Bool, True), "ReservedMemory": get_variant(Str, "256")},
+            []
+        )
+        self.assertEqual(self._proxy.KdumpEnabled, True)
+        self.assertEqual(self._proxy.ReservedMemory, "256")
+        self.assertEqual(self._dbus_proxy.get_all_calls, 1)
+        self.assertEqual(self._dbus_proxy.reads, 0)
+
+        # Changes of other interfaces are ignored.
+        self._dbus_proxy.PropertiesChanged.emit(
+            "org.example.Other", {"KdumpEnabled": get_variant(Bool, False)}, []
+        )
+        self.assertEqual(self._proxy.KdumpEnabled, True)
+
+        # Invalidated properties are read again.
+        self._dbus_proxy.PropertiesChanged.emit(KDUMP.interface_name, {}, ["FadumpEnabled"])
+        self.assertEqual(self._proxy.FadumpEnabled, False)
+        self.assertEqual(self._dbus_proxy.reads, 1)
+
+    def test_writes(self):
+        self.assertEqual(self._proxy.ReservedMemory, "auto")
+        self._proxy.ReservedMemory = "256"
+
+        # The cached value is updated in place.
+        self.assertEqual(self._dbus_proxy.values["ReservedMemory"], "256")
+        self.assertEqual(self._proxy.ReservedMemory, "256")
+        self.assertEqual(self._dbus_proxy.get_all_calls, 1)
+        self.assertEqual(self._dbus_proxy.reads, 0)
+
+        # The service reports an adjusted value.
+        self._dbus_proxy.PropertiesChanged.emit(
+            KDUMP.interface_name, {"ReservedMemory": get_variant(Str, "192")}, []
+        )
+        self.assertEqual(self._proxy.ReservedMemory, "192")
+
+    def test_methods(self):
+        self.assertEqual(self._proxy.KdumpEnabled, False)
+        self._dbus_proxy.values["KdumpEnabled"] = True
+        self._dbus_proxy.values["KdumpConf"] = {"path": "/var/crash"}
+
+        # The cache is refilled by one GetAll call.
+        self._proxy.SetConfiguration({})
+        self._dbus_proxy.SetConfiguration.assert_called_once_with({})
+        self.assertEqual(self._dbus_proxy.get_all_calls, 2)
+
+        self.assertEqual(self._proxy.KdumpEnabled, True)
+        self.assertEqual(self._proxy.KdumpConf, {"path": "/var/crash"})
+        self.assertEqual(self._dbus_proxy.get_all_calls, 2)
+        self.assertEqual(self._dbus_proxy.reads, 0)
+
+        # Signals are not wrapped.
+        self.assertIs(self._proxy.PropertiesChanged, self._dbus_proxy.PropertiesChanged)
+
+    def test_constants(self):
+        capabilities = KdumpCapabilities.from_structure(self._proxy.Capabilities)
+        self.assertEqual(capabilities.fadump, False)
+
+        self._proxy.invalidate()
+        self._dbus_proxy.PropertiesChanged.emit(KDUMP.interface_name, {}, ["Capabilities"])
+        self._proxy.SetConfiguration({})
+
+        # The capabilities are never read again.
+        self.assertEqual(self._proxy.KdumpEnabled, False)
+        KdumpCapabilities.from_structure(self._proxy.Capabilities)
+        self.assertEqual(self._dbus_proxy.get_all_calls, 2)
+        self.assertEqual(self._dbus_proxy.reads, 0)
+        self.assertIn("Capabilities", self._proxy._cache)
+
+    def test_structures(self):
+        capabilities = KdumpCapabilities.from_structure(self._proxy.Capabilities)
+        self.assertEqual(capabilities.fadump, False)
+
+        capabilities.fadump = True
+        self._dbus_proxy.PropertiesChanged.emit(
+            KDUMP.interface_name,
+            {"Capabilities": get_variant(Structure, KdumpCapabilities.to_structure(capabilities))},
+            []
+        )
+
+        capabilities = KdumpCapabilities.from_structure(self._proxy.Capabilities)
+        self.assertEqual(capabilities.fadump, True)
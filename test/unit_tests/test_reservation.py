@@ -0,0 +1,72 @@
+import tempfile
+from textwrap import dedent
+from unittest.case import TestCase
+from com_redhat_kdump import reservation
+
+
+class KdumpReservationRulesTestCase(TestCase):
+
+    def tearDown(self):
+        # Drop the rules loaded by the test case
+        reservation._reservationRules = None
+
+    def test_recommended_memory_x86(self):
+        reservation.loadReservationRules(path=None)
+        self.assertEqual(192, reservation.computeRecommendedMemory(2048, "x86_64"))
+        self.assertEqual(256, reservation.computeRecommendedMemory(16 * 1024, "x86_64", cpus=64))
+        self.assertEqual(512, reservation.computeRecommendedMemory(1024 * 1024, "x86_64"))
+
+    def test_recommended_memory_aarch64(self):
+        reservation.loadReservationRules(path=None)
+        self.assertEqual(512, reservation.computeRecommendedMemory(2048, "aarch64"))
+        self.assertEqual(576, reservation.computeRecommendedMemory(128 * 1024, "aarch64"))
+        self.assertEqual(676, reservation.computeRecommendedMemory(128 * 1024, "aarch64", pageSize=65536))
+        self.assertEqual(826, reservation.computeRecommendedMemory(
+            128 * 1024, "aarch64", pageSize=65536, drivers=["mlx5_core", "nvme"]
+        ))
+
+    def test_recommended_memory_ppc64le(self):
+        reservation.loadReservationRules(path=None)
+        self.assertEqual((384, 64 * 1024 - 1024, 1), reservation.computeMemoryBounds(64 * 1024, "ppc64le"))
+        self.assertEqual(2048, reservation.computeRecommendedMemory(64 * 1024, "ppc64le"))
+
+    def test_recommended_memory_bounds(self):
+        reservation.loadReservationRules(path=None)
+        self.assertEqual(0, reservation.computeRecommendedMemory(512, "x86_64"))
+        self.assertEqual(188, reservation.computeRecommendedMemory(700, "x86_64"))
+
+    def test_reservation_rules_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".conf") as f:
+            f.write(dedent("""
+            [x86_64]
+            lower = 128
+            step = 64
+            tiers = 0:128 65536:384
+            per_cpu_kb = 256
+            drivers = mlx5_core:100
+            """))
+            f.flush()
+            reservation.loadReservationRules(path=f.name)
+
+        self.assertEqual((128, 128 * 1024 - 512, 64), reservation.computeMemoryBounds(128 * 1024, "x86_64"))
+        self.assertEqual(448, reservation.computeRecommendedMemory(128 * 1024, "x86_64", cpus=128))
+        self.assertEqual(576, reservation.computeRecommendedMemory(
+            128 * 1024, "x86_64", cpus=128, drivers=["mlx5_core"]
+        ))
+        self.assertEqual((160, 128 * 1024 - 512, 1), reservation.computeMemoryBounds(128 * 1024, "s390x"))
+
+    def test_check_reserved_memory(self):
+        reservation.loadReservationRules(path=None)
+        table = "1G-4G:192M,4G-64G:256M,64G-:512M"
+        self.assertIsNone(reservation.checkReservedMemory(table, 16 * 1024, "x86_64"))
+        self.assertIsNone(reservation.checkReservedMemory("auto", 16 * 1024, "x86_64"))
+        self.assertIsNone(reservation.checkReservedMemory("x86_64=" + table + ";*=auto", 16 * 1024, "s390x"))
+        self.assertEqual(
+            reservation.checkReservedMemory(table, 16 * 1024, "aarch64"),
+            "The reservation of 256 MB is out of bounds (512 - 15872 MB)"
+        )
+        self.assertEqual(
+            reservation.checkReservedMemory("x86_64=" + table, 16 * 1024, "s390x"),
+            "No reservation is specified for s390x"
+        )
+        self.assertTrue(reservation.checkReservedMemory("1G-4G", 16 * 1024, "x86_64").startswith("Invalid value"))
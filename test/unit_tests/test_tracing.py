@@ -0,0 +1,178 @@
+import json
+import os
+import tempfile
+from unittest.case import TestCase
+from unittest.mock import patch, Mock
+
+from dasbus.signal import Signal
+
+from com_redhat_kdump.service.installation import KdumpInstallationTask, KdumpTracingTask
+from com_redhat_kdump.tracing import Span, Tracer, tracer, read_spans
+
+
+class TracerTestCase(TestCase):
+
+    def test_span(self):
+        t = Tracer(enabled=True)
+
+        with t.span("test", command="kdumpctl") as span:
+            span.set("rc", 0)
+
+        with self.assertRaises(ValueError):
+            with t.span("failure"):
+                raise ValueError()
+
+        first, second = t.spans
+        self.assertEqual(first.name, "test")
+        self.assertEqual(first.outcome, "ok")
+        self.assertEqual(first.attributes, {"command": "kdumpctl", "rc": "0"})
+        self.assertGreaterEqual(first.duration, 0)
+        self.assertEqual(second.name, "failure")
+        self.assertEqual(second.outcome, "ValueError")
+
+    def test_disabled(self):
+        t = Tracer(enabled=False)
+
+        with t.span("test") as span:
+            span.set("rc", 0)
+
+        func = Mock(return_value=1)
+        self.assertEqual(t.traced("func")(func)(2), 1)
+        func.assert_called_once_with(2)
+
+        proxy = Mock()
+        self.assertIs(t.trace_proxy(proxy, "DeviceTree"), proxy)
+        self.assertEqual(t.spans, [])
+
+    def test_traced(self):
+        t = Tracer(enabled=True)
+        func = t.traced("func")(lambda value: value * 2)
+
+        self.assertEqual(func(2), 4)
+        self.assertEqual([span.name for span in t.spans], ["func"])
+
+    def test_trace_proxy(self):
+        t = Tracer(enabled=True)
+        proxy = Mock()
+        proxy.GetDevices.return_value = ["sda"]
+        proxy.PropertiesChanged = Signal()
+        proxy.Name = "tree"
+
+        traced = t.trace_proxy(proxy, "DeviceTree")
+        self.assertEqual(traced.GetDevices(), ["sda"])
+        self.assertIs(traced.PropertiesChanged, proxy.PropertiesChanged)
+        self.assertEqual(traced.Name, "tree")
+
+        traced.Name = "other"
+        self.assertEqual(proxy.Name, "other")
+        self.assertEqual([span.name for span in t.spans], ["DeviceTree.GetDevices"])
+
+    def test_ring_buffer(self):
+        t = Tracer(capacity=3, enabled=True)
+
+        for i in range(5):
+            with t.span("span", index=i):
+                pass
+
+        self.assertEqual([span.attributes["index"] for span in t.spans], ["2", "3", "4"])
+
+        t.clear()
+        self.assertEqual(t.spans, [])
+
+    def test_write(self):
+        t = Tracer(enabled=True)
+
+        with t.span("test", command="systemctl enable"):
+            pass
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            t.write(path)
+
+            with open(path, "r") as f:
+                data = json.load(f)
+
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]["name"], "test")
+        self.assertEqual(data[0]["outcome"], "ok")
+        self.assertEqual(data[0]["attributes"], {"command": "systemctl enable"})
+
+
+    def test_export(self):
+        t = Tracer(enabled=False)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ui.trace.json")
+            t.export(path)
+            self.assertEqual(read_spans(path), [])
+
+            t.enabled = True
+            with t.span("getLuksDevices"):
+                pass
+
+            t.export(path)
+            span, = read_spans(path)
+            self.assertEqual(span.name, "getLuksDevices")
+            self.assertEqual(os.listdir(tmp), ["ui.trace.json"])
+
+        with self.assertLogs("com_redhat_kdump.tracing", level="WARNING"):
+            t.export("/nonexistent/ui.trace.json")
+
+
+class KdumpTracingTaskTestCase(TestCase):
+
+    def setUp(self):
+        self.addCleanup(setattr, tracer, "enabled", tracer.enabled)
+        tracer.clear()
+        tracer.enabled = True
+        self.addCleanup(tracer.clear)
+
+    @patch("com_redhat_kdump.service.installation.util")
+    @patch("shutil.which")
+    def test_installation_traced(self, mock_shutil, mock_util):
+        mock_shutil.return_value = True
+        mock_util.execWithRedirect.return_value = 0
+        KdumpInstallationTask(sysroot="/mnt/sysroot", kdump_enabled=True).run()
+
+        span, = tracer.spans
+        self.assertEqual(span.name, "execWithRedirect")
+        self.assertEqual(span.attributes, {"command": "systemctl enable", "rc": "0"})
+
+    def test_tracing_task(self):
+        with tracer.span("test"):
+            pass
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            KdumpTracingTask(path).run()
+
+            with open(path, "r") as f:
+                self.assertEqual([span["name"] for span in json.load(f)], ["test"])
+
+    def test_tracing_task_ui_spans(self):
+        with tracer.span("execWithRedirect"):
+            pass
+
+        ui_tracer = Tracer(enabled=True)
+        ui_tracer.record(Span("getLuksDevices", tracer.spans[0].start - 1, 0.5, "ok", {}))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            ui_path = os.path.join(tmp, "ui.trace.json")
+            ui_tracer.write(ui_path)
+
+            KdumpTracingTask(path, ui_path).run()
+
+            with open(path, "r") as f:
+                self.assertEqual([span["name"] for span in json.load(f)],
+                                 ["getLuksDevices", "execWithRedirect"])
+
+            # The UI has exported no spans.
+            KdumpTracingTask(path, os.path.join(tmp, "missing.json")).run()
+
+            with open(path, "r") as f:
+                self.assertEqual([span["name"] for span in json.load(f)], ["execWithRedirect"])
+
+    def test_tracing_task_failure(self):
+        with self.assertLogs("com_redhat_kdump.service.installation", level="WARNING"):
+            KdumpTracingTask("/nonexistent/trace.json").run()
@@ -0,0 +1,140 @@
+import importlib
+import sys
+import threading
+from unittest.case import TestCase
+from unittest.mock import patch, MagicMock
+
+from com_redhat_kdump import common
+from com_redhat_kdump.structures import KdumpCapabilities
+from .mock import MockSpoke, mock_ui_modules
+
+
+@patch("blivet.arch.get_arch", return_value="x86_64")
+class KdumpTuiSpokeTestCase(TestCase):
+
+    def setUp(self):
+        common.memoryProbe.invalidate()
+
+        patcher = patch.dict(sys.modules, mock_ui_modules())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        sys.modules.pop("com_redhat_kdump.tui.spokes.kdump", None)
+        self._module = importlib.import_module("com_redhat_kdump.tui.spokes.kdump")
+
+    def _create_spoke(self):
+        proxy = MagicMock()
+        proxy.KdumpEnabled = True
+        proxy.FadumpEnabled = False
+        proxy.ReservedMemory = "256"
+        proxy.DumpLevel = -1
+        proxy.Capabilities = KdumpCapabilities.to_structure(KdumpCapabilities())
+
+        with patch.object(self._module, "get_kdump_proxy", return_value=proxy):
+            return self._module.KdumpSpoke(), proxy
+
+    @patch("com_redhat_kdump.tui.spokes.kdump.getDumpEstimate", return_value=(1024, 10))
+    def test_refresh_unchanged(self, _mock_estimate, _mock_arch):
+        spoke, proxy = self._create_spoke()
+
+        with patch.object(MockSpoke, "refresh") as refresh:
+            spoke.refresh()
+            spoke.refresh()
+            refresh.assert_called_once_with(None)
+
+            # The window is rebuilt for changed inputs only.
+            proxy.ReservedMemory = "auto"
+            spoke.refresh()
+            self.assertEqual(refresh.call_count, 2)
+
+            spoke._scan_result = (0, ["sda2"])
+            spoke.refresh()
+            spoke.refresh()
+            self.assertEqual(refresh.call_count, 3)
+
+    def test_refresh_estimate(self, _mock_arch):
+        spoke, _proxy = self._create_spoke()
+
+        with patch.object(MockSpoke, "refresh") as refresh, \
+                patch.object(self._module, "getDumpEstimate", return_value=(1024, 10)) as estimate:
+            spoke.refresh()
+
+            # A new estimate is shown after the page usage is probed.
+            estimate.return_value = (512, 5)
+            spoke.refresh()
+            self.assertEqual(refresh.call_count, 2)
+
+    def test_mem_usage_probe(self, _mock_arch):
+        spoke, proxy = self._create_spoke()
+        proxy.KdumpEnabled = False
+
+        with patch.object(self._module, "threadMgr") as thread_mgr, \
+                patch.object(self._module, "STORAGE"), \
+                patch.object(self._module, "getDumpEstimate", return_value=(1024, 10)):
+            spoke.initialize()
+            spoke.refresh()
+            thread_mgr.add.assert_not_called()
+
+            # The page usage is probed once the dump level is shown.
+            proxy.KdumpEnabled = True
+            spoke.refresh()
+            proxy.DumpLevel = 1
+            spoke.refresh()
+            thread_mgr.add.assert_called_once()
+
+    def test_mem_usage_probe_redraw(self, _mock_arch):
+        spoke, _proxy = self._create_spoke()
+
+        with patch.object(MockSpoke, "refresh") as refresh, \
+                patch.object(self._module, "hubQ") as hub_q, \
+                patch.object(self._module, "probeMemUsage", return_value=None), \
+                patch.object(self._module, "getDumpEstimate", return_value=(1024, 10)) as estimate:
+            spoke.refresh()
+            spoke._probe_mem_usage()
+            hub_q.send_ready.assert_not_called()
+
+            # The screen is redrawn with the estimate of the probed pages.
+            self._module.probeMemUsage.return_value = {"free": 1024}
+            spoke._probe_mem_usage()
+            hub_q.send_ready.assert_called_once_with("KdumpSpoke")
+
+            estimate.return_value = (512, 5)
+            spoke.refresh()
+            self.assertEqual(refresh.call_count, 2)
+
+    def _scan_storage(self, spoke, **kwargs):
+        with patch.object(self._module, "STORAGE_SCAN_DELAY", 0), \
+                patch.object(self._module, "getTargetLuksDevices", **kwargs), \
+                patch.object(self._module, "hubQ") as hub_q, \
+                patch.object(self._module, "tracer"):
+            spoke._scan_generation += 1
+            self.assertFalse(spoke.ready)
+            spoke._scan_storage("/partitioning", {}, spoke._scan_generation, threading.Event())
+
+        return hub_q
+
+    def test_scan_storage(self, _mock_arch):
+        spoke, _proxy = self._create_spoke()
+        hub_q = self._scan_storage(spoke, return_value=["luks-sda2"])
+
+        self.assertTrue(spoke.ready)
+        self.assertEqual(spoke._luks_devs, ["luks-sda2"])
+        hub_q.send_ready.assert_called_once_with("KdumpSpoke")
+
+        # The result of an outdated scan is dropped.
+        spoke._scan_generation += 1
+        spoke._finish_storage_scan(spoke._scan_generation - 1, [])
+        self.assertFalse(spoke.ready)
+        self.assertEqual(spoke._luks_devs, ["luks-sda2"])
+
+    def test_scan_storage_failed(self, _mock_arch):
+        spoke, _proxy = self._create_spoke()
+        self._scan_storage(spoke, return_value=["luks-sda2"])
+
+        # The spoke is ready with the previous devices.
+        with self.assertLogs(self._module.log, "ERROR"):
+            hub_q = self._scan_storage(spoke, side_effect=RuntimeError("DBus error"))
+
+        self.assertTrue(spoke.ready)
+        self.assertEqual(spoke._luks_devs, ["luks-sda2"])
+        hub_q.send_ready.assert_called_once_with("KdumpSpoke")
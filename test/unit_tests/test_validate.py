@@ -0,0 +1,111 @@
+import io
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout, redirect_stderr
+from textwrap import dedent
+from unittest.case import TestCase
+from com_redhat_kdump import reservation
+from com_redhat_kdump.validate import check_reservation, validate_file, find_kickstarts, main
+from .mock import benchmark
+
+KICKSTART = """
+lang en_US.UTF-8
+rootpw --lock
+
+%addon com_redhat_kdump {}
+%end
+"""
+
+
+def write_kickstart(path, args):
+    with open(path, "w") as f:
+        f.write(KICKSTART.format(args))
+
+
+class KdumpValidateTestCase(TestCase):
+
+    def setUp(self):
+        reservation.loadReservationRules(path=None)
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+        reservation._reservationRules = None
+
+    def _path(self, *names):
+        return os.path.join(self._tmp.name, *names)
+
+    def test_check_reservation(self):
+        self.assertEqual(check_reservation("auto", ["x86_64"]), [])
+        self.assertEqual(check_reservation("256", ["x86_64", "aarch64"]), [
+            "The reservation of 256 MB for aarch64 is below the lower bound (512 MB)"
+        ])
+        self.assertEqual(check_reservation("4096", ["x86_64"], memory=4096), [
+            "The reservation of 4096 MB for x86_64 with 4096 MB of memory is out of bounds (160 - 3584 MB)"
+        ])
+        self.assertEqual(check_reservation("x86_64=1G-4G:1G,4G-:256M", ["x86_64", "s390x"]), [
+            "The reservation of 1024 MB for x86_64 with 1024 MB of memory is out of bounds (160 - 512 MB)"
+        ])
+
+    def test_validate_file(self):
+        write_kickstart(self._path("valid.ks"), "--enable --reserve-mb=1G-4G:192M,4G-:256M")
+        self.assertEqual(validate_file(self._path("valid.ks"), arches=["x86_64"]), [])
+
+        write_kickstart(self._path("disabled.ks"), "--disable --reserve-mb=1")
+        self.assertEqual(validate_file(self._path("disabled.ks")), [])
+
+        write_kickstart(self._path("invalid.ks"), "--enable --reserve-mb=1G-")
+        self.assertEqual(validate_file(self._path("invalid.ks")), [
+            (5, "Invalid value '1G-' for --reserve-mb")
+        ])
+
+        write_kickstart(self._path("unknown.ks"), "--enable --unknown")
+        messages = validate_file(self._path("unknown.ks"))
+        self.assertEqual([line for line, _message in messages], [5])
+
+        write_kickstart(self._path("quotes.ks"), "--enable --reserve-mb='256")
+        self.assertEqual(validate_file(self._path("quotes.ks")), [(5, "No closing quotation")])
+
+        write_kickstart(self._path("bounds.ks"), "--enable --reserve-mb=128")
+        self.assertEqual(validate_file(self._path("bounds.ks"), arches=["x86_64"]), [
+            (5, "The reservation of 128 MB for x86_64 is below the lower bound (160 MB)")
+        ])
+
+    def test_find_kickstarts(self):
+        os.makedirs(self._path("a", "b"))
+        for name in [("a", "1.ks"), ("a", "b", "2.ks"), ("a", "notes.txt")]:
+            write_kickstart(self._path(*name), "--enable")
+
+        self.assertEqual(list(find_kickstarts([self._path("a")], "*.ks")), [
+            self._path("a", "1.ks"), self._path("a", "b", "2.ks")
+        ])
+
+    def test_main(self):
+        write_kickstart(self._path("1.ks"), "--enable --reserve-mb=256")
+        write_kickstart(self._path("2.ks"), "--enable --reserve-mb=invalid")
+
+        output = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(io.StringIO()):
+            self.assertEqual(main(["-j", "2", "--arch", "x86_64", self._tmp.name]), 1)
+
+        self.assertEqual(output.getvalue().splitlines(), [
+            "{}:5: Invalid value 'invalid' for --reserve-mb".format(self._path("2.ks"))
+        ])
+
+    @benchmark
+    def test_validate_benchmark(self):
+        count = 2000
+        values = ["auto", "256", "1G-4G:192M,4G-64G:256M,64G-:512M",
+                  "x86_64=1G-:256M;ppc64*=2G-4G:384M,4G-:1G;*=auto"]
+
+        for i in range(count):
+            write_kickstart(self._path("%d.ks" % i), "--enable --reserve-mb='%s'" % values[i % len(values)])
+
+        start = time.monotonic()
+        for path in find_kickstarts([self._tmp.name]):
+            validate_file(path)
+        throughput = count / (time.monotonic() - start)
+
+        # kickstarts per second in a single process
+        self.assertGreater(throughput, 1000)